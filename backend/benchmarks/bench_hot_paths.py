@@ -0,0 +1,408 @@
+"""热点路径微基准测试
+
+在临时 SQLite 数据库（或内存数据库）中按指定规模生成考生数据，
+测量序列化、成绩导入、证书生成和报名等热点路径的耗时，
+结果以 JSON 输出，并可与保存的基线对比以发现性能回退。
+
+用法（在 backend 目录下执行）：
+
+    python benchmarks/bench_hot_paths.py --scale 1000 10000 --output bench.json
+    python benchmarks/bench_hot_paths.py --scale 1000 --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_hot_paths.py --scale 1000 --baseline benchmarks/baseline.json --tolerance 0.2
+
+存在回退时进程以非零状态退出，便于接入 CI。
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+from sqlalchemy import delete, insert
+from werkzeug.security import generate_password_hash
+
+from src.models.user import db, User
+from src.models.exam import Exam, Application, Score, Certificate
+from src.routes.exam import exam_bp
+from src.routes.application import application_bp
+from src.routes.score import score_bp
+
+PAGE_SIZE = 50
+INSERT_BATCH = 5000
+
+
+def build_app(database_uri):
+    """构建只包含基准测试所需蓝图的应用"""
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'benchmark'
+    app.config['JWT_SECRET_KEY'] = 'benchmark-jwt-secret-key-for-local-runs'
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    JWTManager(app)
+    app.register_blueprint(exam_bp, url_prefix='/api')
+    app.register_blueprint(application_bp, url_prefix='/api')
+    app.register_blueprint(score_bp, url_prefix='/api')
+
+    # 证书模块的生成接口与 score 模块的同名接口路径冲突，挂到独立前缀下单独测量
+    try:
+        from src.routes import certificate as certificate_routes
+        app.register_blueprint(certificate_routes.certificate_bp, url_prefix='/bench/certificates')
+        app.extensions['bench_certificate_routes'] = certificate_routes
+    except Exception as e:
+        app.extensions['bench_certificate_routes'] = e
+
+    db.init_app(app)
+    return app
+
+
+def seed(scale, rng):
+    """用批量 Core 插入生成指定规模的考生、报名和成绩"""
+    now = datetime.utcnow()
+    password_hash = generate_password_hash('benchmark')
+
+    admin = User(username='bench_admin', email='bench_admin@example.com', role='admin', password_hash=password_hash)
+    db.session.add(admin)
+
+    target_exam = Exam(
+        name='基准测试考试', exam_type='bench', status='published', max_applicants=0,
+        start_time=now - timedelta(days=10), end_time=now - timedelta(days=10, hours=-2),
+        registration_start=now - timedelta(days=40), registration_end=now - timedelta(days=20)
+    )
+    open_exam = Exam(
+        name='开放报名考试', exam_type='bench', status='published', max_applicants=0,
+        start_time=now + timedelta(days=30), end_time=now + timedelta(days=30, hours=2),
+        registration_start=now - timedelta(days=1), registration_end=now + timedelta(days=10)
+    )
+    db.session.add_all([target_exam, open_exam])
+    db.session.commit()
+
+    for start in range(0, scale, INSERT_BATCH):
+        stop = min(start + INSERT_BATCH, scale)
+        db.session.execute(insert(User), [
+            {
+                'username': f'student{i}',
+                'email': f'student{i}@example.com',
+                'password_hash': password_hash,
+                'role': 'student',
+                'phone': f'138{i:08d}',
+                'created_at': now,
+                'updated_at': now
+            }
+            for i in range(start, stop)
+        ])
+    db.session.commit()
+
+    user_ids = [row[0] for row in db.session.query(User.id).filter(User.role == 'student').order_by(User.id)]
+
+    for start in range(0, len(user_ids), INSERT_BATCH):
+        batch = user_ids[start:start + INSERT_BATCH]
+        db.session.execute(insert(Application), [
+            {
+                'user_id': user_id,
+                'exam_id': target_exam.id,
+                'application_data': {
+                    'name': f'考生{user_id}',
+                    'gender': rng.choice(['男', '女']),
+                    'phone': f'138{user_id:08d}',
+                    'email': f'student{user_id}@example.com',
+                    'id_type': '身份证',
+                    'id_number': f'1101011990{user_id:08d}',
+                    'address': '北京市海淀区'
+                },
+                'status': 'approved',
+                'submitted_at': now - timedelta(days=30),
+                'approved_at': now - timedelta(days=25)
+            }
+            for user_id in batch
+        ])
+        db.session.execute(insert(Score), [
+            {
+                'user_id': user_id,
+                'exam_id': target_exam.id,
+                'score': round(rng.uniform(20, 100), 1),
+                'is_passed': rng.random() < 0.6,
+                'imported_at': now
+            }
+            for user_id in batch
+        ])
+    db.session.commit()
+
+    return {
+        'admin_id': admin.id,
+        'target_exam_id': target_exam.id,
+        'open_exam_id': open_exam.id,
+        'user_ids': user_ids,
+        'password_hash': password_hash
+    }
+
+
+class Case:
+    """一个基准测试用例：setup 不计时，run 计时"""
+
+    def __init__(self, name, run, setup=None, ops=1):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.ops = ops
+
+
+def build_cases(app, client, ctx, args, rng):
+    admin_headers = {'Authorization': f"Bearer {create_access_token(identity=str(ctx['admin_id']))}"}
+    exam_id = ctx['target_exam_id']
+    import_size = min(args.import_size, len(ctx['user_ids']))
+    cases = []
+
+    def check(response):
+        if response.status_code >= 400:
+            raise RuntimeError(f'HTTP {response.status_code}: {response.get_data(as_text=True)[:200]}')
+
+    def exam_to_dict():
+        Exam.query.get(exam_id).to_dict()
+
+    def application_page_to_dict():
+        page = Application.query.filter_by(exam_id=exam_id).paginate(page=1, per_page=PAGE_SIZE, error_out=False)
+        [application.to_dict() for application in page.items]
+
+    import_payload = {}
+
+    def setup_import():
+        sample = rng.sample(ctx['user_ids'], import_size)
+        import_payload['body'] = {
+            'exam_id': exam_id,
+            'scores': [
+                {'user_id': user_id, 'score': round(rng.uniform(20, 100), 1), 'is_passed': True}
+                for user_id in sample
+            ]
+        }
+
+    def import_scores():
+        check(client.post('/api/scores/import', json=import_payload['body'], headers=admin_headers))
+
+    def clear_certificates():
+        db.session.execute(delete(Certificate).where(Certificate.exam_id == exam_id))
+        db.session.commit()
+
+    def generate_certificates_score():
+        check(client.post('/api/certificates/generate', json={'exam_id': exam_id}, headers=admin_headers))
+
+    cases += [
+        Case('exam_to_dict', exam_to_dict),
+        Case('application_page_to_dict', application_page_to_dict, ops=PAGE_SIZE),
+        Case('import_scores', import_scores, setup=setup_import, ops=import_size),
+        Case('generate_certificates[score]', generate_certificates_score, setup=clear_certificates),
+    ]
+
+    certificate_routes = app.extensions['bench_certificate_routes']
+    if isinstance(certificate_routes, Exception):
+        reason = f'证书模块无法加载: {certificate_routes}'
+        cases += [
+            Case('generate_certificates[certificate]', None, setup=reason),
+            Case('generate_certificate_number', None, setup=reason),
+        ]
+    else:
+        issued_user_ids = ctx['user_ids'][:min(args.issue_size, len(ctx['user_ids']))]
+
+        def clear_issued_certificates():
+            certificate_model = certificate_routes.Certificate
+            db.session.execute(delete(certificate_model).where(certificate_model.exam_id == exam_id))
+            db.session.commit()
+
+        def generate_certificates_certificate():
+            check(client.post('/bench/certificates/generate', json={
+                'exam_id': exam_id,
+                'user_ids': issued_user_ids
+            }, headers=admin_headers))
+
+        def generate_certificate_number():
+            certificate_routes.generate_certificate_number(Exam.query.get(exam_id), 'initial')
+
+        cases += [
+            Case('generate_certificates[certificate]', generate_certificates_certificate,
+                 setup=clear_issued_certificates, ops=len(issued_user_ids)),
+            Case('generate_certificate_number', generate_certificate_number),
+        ]
+
+    applicants = {}
+
+    def setup_create_application():
+        # 每轮使用一批全新的考生，避免命中“已报名”分支
+        now = datetime.utcnow()
+        tag = f'{time.time_ns()}'
+        db.session.execute(insert(User), [
+            {
+                'username': f'applicant{tag}_{i}',
+                'email': f'applicant{tag}_{i}@example.com',
+                'password_hash': ctx['password_hash'],
+                'role': 'student',
+                'created_at': now,
+                'updated_at': now
+            }
+            for i in range(args.applications)
+        ])
+        db.session.commit()
+        ids = [row[0] for row in db.session.query(User.id).filter(User.username.like(f'applicant{tag}_%'))]
+        applicants['headers'] = [
+            {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'} for user_id in ids
+        ]
+
+    def create_application():
+        for headers in applicants['headers']:
+            check(client.post('/api/applications', json={
+                'exam_id': ctx['open_exam_id'],
+                'application_data': {'name': '新考生', 'phone': '13900000000', 'id_number': '110101199001010000'}
+            }, headers=headers))
+
+    cases.append(Case('create_application', create_application, setup=setup_create_application,
+                      ops=args.applications))
+    return cases
+
+
+def run_case(case, repeat):
+    """执行用例并返回耗时统计（毫秒）"""
+    if case.run is None:
+        return {'status': 'skipped', 'error': case.setup}
+
+    timings = []
+    for _ in range(repeat):
+        db.session.remove()
+        if case.setup:
+            case.setup()
+            db.session.remove()
+
+        started = time.perf_counter()
+        try:
+            case.run()
+        except Exception as e:
+            db.session.rollback()
+            return {'status': 'error', 'error': str(e)}
+        timings.append((time.perf_counter() - started) * 1000)
+
+    median = statistics.median(timings)
+    return {
+        'status': 'ok',
+        'median_ms': round(median, 3),
+        'min_ms': round(min(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'per_op_ms': round(median / case.ops, 4),
+        'ops': case.ops,
+        'repeat': repeat
+    }
+
+
+def run_scale(scale, args):
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix='exam-bench-')
+    database_uri = 'sqlite://' if args.memory else f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    app = build_app(database_uri)
+
+    try:
+        with app.app_context():
+            db.create_all()
+            seed_started = time.perf_counter()
+            ctx = seed(scale, rng)
+            print(f'[scale={scale}] 数据生成耗时 {time.perf_counter() - seed_started:.1f}s', file=sys.stderr)
+
+            client = app.test_client()
+            results = []
+            for case in build_cases(app, client, ctx, args, rng):
+                result = run_case(case, args.repeat)
+                result.update({'case': case.name, 'scale': scale})
+                results.append(result)
+                print(f"[scale={scale}] {case.name}: {result.get('median_ms', result['status'])}", file=sys.stderr)
+
+            db.session.remove()
+            db.engine.dispose()
+            return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results, baseline, tolerance):
+    """与基线对比，返回回退列表"""
+    baseline_index = {
+        (r['case'], r['scale']): r for r in baseline.get('results', []) if r.get('status') == 'ok'
+    }
+    regressions = []
+    for result in results:
+        previous = baseline_index.get((result['case'], result['scale']))
+        if result.get('status') != 'ok' or previous is None:
+            continue
+
+        ratio = result['median_ms'] / previous['median_ms'] if previous['median_ms'] else 1.0
+        result['baseline_median_ms'] = previous['median_ms']
+        result['ratio'] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(result)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='热点路径微基准测试')
+    parser.add_argument('--scale', type=int, nargs='+', default=[1000], help='考生规模，例如 1000 10000 100000')
+    parser.add_argument('--repeat', type=int, default=5, help='每个用例重复次数')
+    parser.add_argument('--import-size', type=int, default=1000, help='单次成绩导入条数')
+    parser.add_argument('--issue-size', type=int, default=500, help='单次证书生成人数')
+    parser.add_argument('--applications', type=int, default=50, help='每轮报名请求数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--memory', action='store_true', help='使用内存数据库而不是临时文件')
+    parser.add_argument('--output', help='结果输出文件（默认输出到标准输出）')
+    parser.add_argument('--baseline', help='用于对比的基线文件')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='允许的相对变慢比例')
+    parser.add_argument('--save-baseline', help='把本次结果保存为基线')
+    args = parser.parse_args()
+
+    results = []
+    for scale in args.scale:
+        results.extend(run_scale(scale, args))
+
+    report = {
+        'meta': {
+            'created_at': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'memory_db': args.memory,
+            'repeat': args.repeat,
+            'seed': args.seed
+        },
+        'results': results
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        report['regressions'] = [f"{r['case']}@{r['scale']}" for r in regressions]
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            f.write(output)
+
+    for r in regressions:
+        print(f"性能回退: {r['case']} @ {r['scale']}: {r['baseline_median_ms']}ms -> {r['median_ms']}ms "
+              f"(x{r['ratio']})", file=sys.stderr)
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,332 @@
+"""端到端并发压测
+
+在多进程 WSGI 服务器（默认 gunicorn）下启动后端，模拟两个高峰场景：
+
+- registration：大量考生在 ``registration_start`` 前登录，到点后同时调用 ``POST /api/applications``，
+  结束后检查报名人数是否超过 ``max_applicants``（超额报名）
+- results-day：放榜时考生反复查询 ``/api/my-scores`` 和 ``/api/certificates/my-certificates``
+
+每类请求输出 p50/p95/p99 延迟、错误率和状态码分布。
+
+用法（在 backend 目录下执行，需要 ``pip install gunicorn``）：
+
+    python benchmarks/load_test.py --users 2000 --concurrency 200 --workers 4
+    python benchmarks/load_test.py --base-url http://localhost:5001 --scenario results-day
+
+指定 ``--base-url`` 时不会启动服务器，而是直接压测已有实例。
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Recorder:
+    """线程安全地记录每类请求的延迟和状态码"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = defaultdict(list)
+        self._statuses = defaultdict(Counter)
+
+    def record(self, operation, latency_ms, status):
+        with self._lock:
+            self._latencies[operation].append(latency_ms)
+            self._statuses[operation][status] += 1
+
+    def summary(self):
+        report = {}
+        for operation, latencies in self._latencies.items():
+            latencies = sorted(latencies)
+            statuses = self._statuses[operation]
+            errors = sum(count for status, count in statuses.items() if status == 'error' or status >= 500)
+            report[operation] = {
+                'requests': len(latencies),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'max_ms': round(latencies[-1], 2),
+                'error_rate': round(errors / len(latencies), 4),
+                'statuses': {str(status): count for status, count in statuses.items()}
+            }
+        return report
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Client:
+    def __init__(self, base_url, recorder, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.timeout = timeout
+
+    def request(self, operation, method, path, body=None, token=None):
+        """发送请求并记录延迟，返回 (状态码, JSON 响应)"""
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                status, payload = resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            status, payload = e.code, e.read()
+        except Exception:
+            self.recorder.record(operation, (time.perf_counter() - started) * 1000, 'error')
+            return None, None
+
+        self.recorder.record(operation, (time.perf_counter() - started) * 1000, status)
+        try:
+            return status, json.loads(payload) if payload else None
+        except ValueError:
+            return status, None
+
+
+def start_server(args):
+    """用 gunicorn 启动后端，返回进程和临时目录"""
+    if not shutil.which(args.server_cmd):
+        sys.exit(f'找不到 {args.server_cmd}，请先 pip install gunicorn 或使用 --base-url 指向已有实例')
+
+    workdir = tempfile.mkdtemp(prefix='exam-load-')
+    env = dict(os.environ)
+    env.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(workdir, 'load.db')}")
+
+    # 与生产环境一样不预加载应用（见 gunicorn.conf.py），各 worker 分别导入应用并启动后台线程；
+    # 先在单独的进程中导入一次，完成建表和默认管理员初始化，避免多个 worker 同时建表
+    subprocess.run([sys.executable, '-c', 'import src.main'], cwd=BACKEND_DIR, env=env, check=True)
+
+    cmd = [
+        args.server_cmd,
+        '-c', os.path.join(BACKEND_DIR, 'gunicorn.conf.py'),
+        '--workers', str(args.workers),
+        '--bind', f'127.0.0.1:{args.port}',
+        '--chdir', BACKEND_DIR,
+        '--log-level', 'warning',
+        '--access-logfile', os.devnull,
+        'src.main:app'
+    ]
+    if args.worker_class:
+        cmd[1:1] = ['--worker-class', args.worker_class]
+
+    process = subprocess.Popen(cmd, env=env)
+    return process, workdir
+
+
+def wait_until_ready(base_url, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f'{base_url}/api/exams', timeout=2) as resp:
+                if resp.status == 200:
+                    return
+        except Exception:
+            pass
+        time.sleep(0.5)
+    sys.exit('后端在超时时间内没有就绪')
+
+
+def admin_login(client, args):
+    status, body = client.request('setup', 'POST', '/api/auth/login', {
+        'username': args.admin_username,
+        'password': args.admin_password
+    })
+    if status != 200:
+        sys.exit(f'管理员登录失败: {status} {body}')
+    return body['access_token']
+
+
+def register_candidates(client, pool, count, run_id):
+    """注册压测考生，返回 (用户名, 用户ID) 列表"""
+
+    def register(i):
+        username = f'load_{run_id}_{i}'
+        status, body = client.request('setup', 'POST', '/api/auth/register', {
+            'username': username,
+            'email': f'{username}@example.com',
+            'password': 'load-test-password'
+        })
+        if status == 201:
+            return username, body['user']['id']
+        return None
+
+    return [candidate for candidate in pool.map(register, range(count)) if candidate]
+
+
+def login(client, username):
+    status, body = client.request('login', 'POST', '/api/auth/login', {
+        'username': username,
+        'password': 'load-test-password'
+    })
+    return body['access_token'] if status == 200 else None
+
+
+def run_registration(client, pool, args, admin_token, candidates):
+    """报名开放瞬间的并发报名"""
+    registration_start = datetime.utcnow() + timedelta(seconds=args.lead_seconds)
+    capacity = args.capacity if args.capacity is not None else max(1, len(candidates) // 2)
+
+    status, body = client.request('setup', 'POST', '/api/exams', {
+        'name': f'压测考试 {datetime.utcnow().isoformat()}',
+        'start_time': (registration_start + timedelta(days=30)).isoformat(),
+        'end_time': (registration_start + timedelta(days=30, hours=2)).isoformat(),
+        'registration_start': registration_start.isoformat(),
+        'registration_end': (registration_start + timedelta(days=7)).isoformat(),
+        'status': 'published',
+        'max_applicants': capacity
+    }, token=admin_token)
+    if status != 201:
+        sys.exit(f'创建考试失败: {status} {body}')
+    exam_id = body['exam']['id']
+
+    start_at = time.time() + args.lead_seconds
+
+    def candidate(entry):
+        username, _ = entry
+        token = login(client, username)
+        if not token:
+            return
+        delay = start_at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        client.request('create_application', 'POST', '/api/applications', {
+            'exam_id': exam_id,
+            'application_data': {'name': username, 'phone': '13800000000', 'id_number': username}
+        }, token=token)
+
+    started = time.perf_counter()
+    list(pool.map(candidate, candidates))
+    elapsed = time.perf_counter() - started
+
+    status, exam = client.request('setup', 'GET', f'/api/exams/{exam_id}')
+    application_count = exam.get('application_count', 0) if status == 200 else None
+
+    return exam_id, {
+        'exam_id': exam_id,
+        'capacity': capacity,
+        'application_count': application_count,
+        'overbooking_violations': max(0, application_count - capacity) if application_count is not None else None,
+        'elapsed_s': round(elapsed, 2)
+    }
+
+
+def run_results_day(client, pool, args, admin_token, candidates, exam_id):
+    """放榜当天的成绩和证书查询高峰"""
+    status, body = client.request('setup', 'POST', '/api/scores/import', {
+        'exam_id': exam_id,
+        'scores': [
+            {'user_id': user_id, 'score': 50 + (user_id % 50), 'is_passed': user_id % 3 != 0}
+            for _, user_id in candidates
+        ]
+    }, token=admin_token)
+    if status != 200:
+        print(f'成绩导入失败: {status} {body}', file=sys.stderr)
+
+    def candidate(entry):
+        username, _ = entry
+        token = login(client, username)
+        if not token:
+            return
+        for _ in range(args.polls):
+            client.request('my_scores', 'GET', '/api/my-scores', token=token)
+            client.request('my_certificates', 'GET', '/api/certificates/my-certificates', token=token)
+
+    started = time.perf_counter()
+    list(pool.map(candidate, candidates))
+    return {'elapsed_s': round(time.perf_counter() - started, 2)}
+
+
+def print_report(report):
+    print(f"{'operation':<22}{'requests':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>9}")
+    for operation, stats in sorted(report['operations'].items()):
+        print(f"{operation:<22}{stats['requests']:>10}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+              f"{stats['p99_ms']:>10}{stats['error_rate']:>9.2%}")
+    for name, scenario in report['scenarios'].items():
+        print(f'{name}: {json.dumps(scenario, ensure_ascii=False)}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='报名开放与放榜高峰的并发压测')
+    parser.add_argument('--base-url', help='压测已有实例，不自动启动服务器')
+    parser.add_argument('--scenario', choices=['registration', 'results-day', 'all'], default='all')
+    parser.add_argument('--users', type=int, default=1000, help='虚拟考生数量')
+    parser.add_argument('--concurrency', type=int, default=200, help='并发虚拟用户数')
+    parser.add_argument('--capacity', type=int, help='考试报名上限（默认为考生数的一半）')
+    parser.add_argument('--lead-seconds', type=float, default=10, help='距离报名开始的准备时间')
+    parser.add_argument('--polls', type=int, default=5, help='放榜场景每位考生的查询次数')
+    parser.add_argument('--timeout', type=float, default=30, help='单个请求超时（秒）')
+    parser.add_argument('--server-cmd', default='gunicorn')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--worker-class', help='gunicorn worker 类型，例如 gthread、gevent')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--admin-username', default='admin')
+    parser.add_argument('--admin-password', default='admin123')
+    parser.add_argument('--output', help='以 JSON 保存报告')
+    args = parser.parse_args()
+
+    process = workdir = None
+    base_url = args.base_url
+    if not base_url:
+        process, workdir = start_server(args)
+        base_url = f'http://127.0.0.1:{args.port}'
+
+    try:
+        wait_until_ready(base_url, timeout=60)
+        recorder = Recorder()
+        client = Client(base_url, recorder, args.timeout)
+        scenarios = {}
+
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            admin_token = admin_login(client, args)
+            candidates = register_candidates(client, pool, args.users, uuid.uuid4().hex[:8])
+            print(f'已注册 {len(candidates)} 名考生', file=sys.stderr)
+
+            exam_id, registration = run_registration(client, pool, args, admin_token, candidates)
+            if args.scenario in ('registration', 'all'):
+                scenarios['registration'] = registration
+            if args.scenario in ('results-day', 'all'):
+                scenarios['results_day'] = run_results_day(client, pool, args, admin_token, candidates, exam_id)
+
+        operations = recorder.summary()
+        operations.pop('setup', None)
+        if args.scenario == 'results-day':
+            operations.pop('create_application', None)
+        report = {'base_url': base_url, 'users': len(candidates), 'operations': operations, 'scenarios': scenarios}
+
+        print_report(report)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+        violations = scenarios.get('registration', {}).get('overbooking_violations')
+        return 1 if violations else 0
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
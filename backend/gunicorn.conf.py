@@ -0,0 +1,59 @@
+"""gunicorn 配置
+
+worker 类型按数据库选择：
+
+- PostgreSQL 使用 gevent worker：``/api/me/events`` 的每个 SSE 长连接只占用一个协程，
+  单个 worker 可以同时保持上千个空闲连接，普通接口同样以协程方式并发处理；
+- SQLite（默认）使用 gthread worker：标准库 sqlite3 驱动的调用不会让出，等待写锁或 fsync 时
+  会阻塞整个 gevent 事件循环，该 worker 上的所有请求都随之停顿。gthread 下每个 SSE 连接占用
+  一个线程，``EVENTS_MAX_CONNECTIONS`` 默认设为线程数的一半，超过时 SSE 接口返回 503，
+  避免长连接占满线程后普通接口无法响应。
+
+数据库地址与应用相同，取 ``SQLALCHEMY_DATABASE_URI``，其次是 ``DATABASE_URL``。gevent worker 中
+psycopg2 通过 psycogreen 改为协作式等待。访问日志只记录路径，不记录查询参数。
+
+用法（在 backend 目录下执行）：
+
+    gunicorn -c gunicorn.conf.py src.main:app
+
+不要开启 preload_app：证书过期扫描、事件总线轮询等后台线程在导入应用时启动，
+预加载时它们只存在于主进程，fork 出的 worker 中不会运行。过期扫描、通知发送、归档等
+处理共享数据的后台任务通过 ``BACKGROUND_JOBS_LOCK`` 文件锁只在一个 worker 中运行
+（见 src/utils/background.py）。
+"""
+import os
+import re
+import tempfile
+
+_database_uri = os.getenv('SQLALCHEMY_DATABASE_URI') or os.getenv('DATABASE_URL') or 'sqlite://'
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5001')
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+worker_class = os.getenv(
+    'GUNICORN_WORKER_CLASS', 'gevent' if _database_uri.startswith('postgresql') else 'gthread'
+)
+# 每个 worker 的线程数（仅对 gthread worker 生效）
+threads = int(os.getenv('GUNICORN_THREADS', '16'))
+# 每个 worker 的最大并发连接数（仅对 gevent 等异步 worker 生效）
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '2000'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+keepalive = 5
+preload_app = False
+accesslog = '-'
+# 与默认格式相同，但请求行中不含查询参数
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(m)s %(U)s %(H)s" %(s)s %(b)s "%(f)s" "%(a)s"'
+
+# worker 继承主进程的环境变量
+os.environ.setdefault(
+    'BACKGROUND_JOBS_LOCK', os.path.join(tempfile.gettempdir(), 'exam-system-%s.lock' % re.sub(r'[^\w.-]', '_', bind))
+)
+
+
+def post_fork(server, worker):
+    # 按实际使用的 worker 类型（命令行参数可以覆盖本文件的设置），在导入应用之前执行
+    worker_type = type(worker).__name__
+    if worker_type == 'ThreadWorker':
+        os.environ.setdefault('EVENTS_MAX_CONNECTIONS', str(max(worker.cfg.threads // 2, 1)))
+    elif worker_type == 'GeventWorker' and _database_uri.startswith('postgresql'):
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
@@ -0,0 +1,357 @@
+"""批量生成压测数据
+
+按 models/user.py、models/exam.py、models/certificate.py 的表结构生成大规模的用户、考试、报名
+（含 ``application_data`` JSON）、成绩、证书及换证/补证申请。数据全部通过 Core 批量插入，
+每批一个短事务，主键由脚本预先分配，不经过 ORM ``add()``；相同 ``--seed`` 生成的数据完全一致。
+
+用法（在 backend 目录下执行）：
+
+    python scripts/generate_data.py --database-uri sqlite:////tmp/scale.db --users 200000 --applications 1000000
+    SQLALCHEMY_DATABASE_URI=postgresql://... python scripts/generate_data.py --applications 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import event, func, select
+from werkzeug.security import generate_password_hash
+
+from src.models.user import db, User
+from src.models.exam import Exam, Application, Score, Certificate, FormConfig
+from src.models.user_version import UserExam
+from src.utils.normalize import extract_search_fields
+
+try:
+    from src.models import certificate as certificate_models
+except Exception as e:  # 证书模块依赖的数据库模块不可用时仍然生成其余数据
+    certificate_models = None
+    certificate_models_error = e
+
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈'
+GIVEN_NAMES = '伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉兰萍红鹏建国志鑫宇晨浩然子轩欣怡梓涵思雨'
+REGIONS = ['110101', '310104', '440106', '330106', '320102', '510104', '420106', '610113', '370102', '500103']
+CITIES = ['北京市', '上海市', '广州市', '杭州市', '南京市', '成都市', '武汉市', '西安市', '济南市', '重庆市']
+EXAM_TYPES = ['职业资格', '技能等级', '学历考试', '语言能力', '专业技术']
+ID_WEIGHTS = [7, 9, 10, 5, 8, 4, 2, 1, 6, 3, 7, 9, 10, 5, 8, 4, 2]
+ID_CHECK_CODES = '10X98765432'
+
+
+def build_app(database_uri):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def id_number(rng, birth):
+    """生成带正确校验位的18位身份证号"""
+    body = f"{rng.choice(REGIONS)}{birth.strftime('%Y%m%d')}{rng.randint(0, 999):03d}"
+    checksum = sum(int(d) * w for d, w in zip(body, ID_WEIGHTS)) % 11
+    return body + ID_CHECK_CODES[checksum]
+
+
+def person_name(rng):
+    return rng.choice(SURNAMES) + ''.join(rng.choice(GIVEN_NAMES) for _ in range(rng.randint(1, 2)))
+
+
+class BulkWriter:
+    """按批次写入，每批一个短事务"""
+
+    def __init__(self, engine, batch_size):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.counts = {}
+        self._pending = {}
+
+    def add(self, table, row):
+        rows = self._pending.setdefault(table, [])
+        rows.append(row)
+        if len(rows) >= self.batch_size:
+            self.flush(table)
+
+    def flush(self, table=None):
+        tables = [table] if table is not None else list(self._pending)
+        for t in tables:
+            rows = self._pending.get(t)
+            if not rows:
+                continue
+            with self.engine.begin() as conn:
+                conn.execute(t.insert(), rows)
+            self.counts[t.name] = self.counts.get(t.name, 0) + len(rows)
+            self._pending[t] = []
+
+
+def next_id(conn, model):
+    return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def generate(args):
+    rng = random.Random(args.seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    writer = BulkWriter(db.engine, args.batch_size)
+
+    with db.engine.connect() as conn:
+        first_user_id = next_id(conn, User)
+        first_exam_id = next_id(conn, Exam)
+        first_application_id = next_id(conn, Application)
+        first_score_id = next_id(conn, Score)
+        first_certificate_id = next_id(conn, Certificate)
+        first_form_config_id = next_id(conn, FormConfig)
+        if certificate_models:
+            first_issued_id = next_id(conn, certificate_models.Certificate)
+            first_renewal_id = next_id(conn, certificate_models.CertificateRenewalApplication)
+
+    password_hash = generate_password_hash(args.password)
+
+    # 用户
+    profiles = []
+    for i in range(args.users):
+        user_id = first_user_id + i
+        birth = datetime(1970, 1, 1) + timedelta(days=rng.randint(0, 365 * 35))
+        phone = f'1{rng.choice("3578")}{rng.randint(0, 999999999):09d}'
+        profiles.append((person_name(rng), phone, id_number(rng, birth), rng.choice(['男', '女'])))
+        writer.add(User.__table__, {
+            'id': user_id,
+            'username': f'{args.prefix}{user_id}',
+            'email': f'{args.prefix}{user_id}@example.com',
+            'password_hash': password_hash,
+            'role': 'student',
+            'phone': phone,
+            'created_at': now - timedelta(days=rng.randint(0, 1000)),
+            'updated_at': now
+        })
+    writer.flush()
+
+    # 考试：大部分已结束，少量正在报名
+    exams = []
+    form_config_id = first_form_config_id
+    for i in range(args.exams):
+        exam_id = first_exam_id + i
+        closed = rng.random() < args.closed_ratio
+        start = now - timedelta(days=rng.randint(30, 900)) if closed else now + timedelta(days=rng.randint(20, 90))
+        exams.append((exam_id, closed, start))
+        writer.add(Exam.__table__, {
+            'id': exam_id,
+            'name': f'{rng.choice(EXAM_TYPES)}考试 第{i + 1}期',
+            'start_time': start,
+            'end_time': start + timedelta(hours=2),
+            'registration_start': start - timedelta(days=40),
+            'registration_end': start - timedelta(days=10),
+            'location': rng.choice(CITIES),
+            'exam_type': rng.choice(EXAM_TYPES),
+            'organizer': '考试中心',
+            'description': '批量生成的压测考试',
+            'status': 'closed' if closed else 'published',
+            'max_applicants': 0,
+            'contact_phone': '010-12345678',
+            'contact_email': 'exam@example.com',
+            'created_at': start - timedelta(days=60),
+            'updated_at': now
+        })
+        if rng.random() < 0.5:
+            writer.add(FormConfig.__table__, {
+                'id': form_config_id,
+                'exam_id': exam_id,
+                'config_json': {'fields': [
+                    {'name': 'name', 'label': '姓名', 'type': 'text', 'required': True},
+                    {'name': 'phone', 'label': '联系电话', 'type': 'text', 'required': True},
+                    {'name': 'id_number', 'label': '身份证件号码', 'type': 'text', 'required': True},
+                    {'name': 'education', 'label': '学历', 'type': 'select', 'required': False,
+                     'options': ['大专', '本科', '硕士', '博士']}
+                ]},
+                'created_at': start - timedelta(days=60),
+                'updated_at': now
+            })
+            form_config_id += 1
+    writer.flush()
+
+    # 报名、成绩、证书：每场考试使用一段连续且不重复的考生
+    per_exam = max(1, min(args.users, args.applications // max(1, args.exams)))
+    application_id = first_application_id
+    score_id = first_score_id
+    certificate_id = first_certificate_id
+    issued_id = first_issued_id if certificate_models else None
+    renewal_id = first_renewal_id if certificate_models else None
+    issued_tables = certificate_models is not None
+
+    for exam_index, (exam_id, closed, start) in enumerate(exams):
+        offset = rng.randrange(args.users)
+        for j in range(per_exam):
+            if application_id - first_application_id >= args.applications:
+                break
+            user_index = (offset + j) % args.users
+            user_id = first_user_id + user_index
+            name, phone, id_no, gender = profiles[user_index]
+            submitted_at = start - timedelta(days=rng.randint(11, 40), seconds=rng.randint(0, 86399))
+
+            status = 'approved'
+            if not closed:
+                status = rng.choices(['pending', 'approved', 'rejected'], weights=[6, 3, 1])[0]
+            elif rng.random() < 0.05:
+                status = 'rejected'
+
+            application_data = {
+                'name': name,
+                'gender': gender,
+                'phone': phone,
+                'email': f'{args.prefix}{user_id}@example.com',
+                'id_type': '身份证',
+                'id_number': id_no,
+                'address': f'{rng.choice(CITIES)}某区某街道{rng.randint(1, 999)}号',
+                'remarks': ''
+            }
+            # Core 插入不经过 ORM 事件，检索列需要手动填充
+            writer.add(Application.__table__, {
+                'id': application_id,
+                'user_id': user_id,
+                'exam_id': exam_id,
+                'application_data': application_data,
+                **extract_search_fields(application_data),
+                'status': status,
+                'admission_ticket_path': None,
+                'submitted_at': submitted_at,
+                'approved_at': submitted_at + timedelta(days=2) if status == 'approved' else None,
+                'rejected_reason': '资料不完整' if status == 'rejected' else None
+            })
+            application_id += 1
+            # 成绩和证书只生成给已报名的考生，一行即可覆盖
+            writer.add(UserExam.__table__, {'user_id': user_id, 'exam_id': exam_id})
+
+            if not closed or status != 'approved':
+                continue
+
+            score = round(min(100.0, max(0.0, rng.gauss(args.mean_score, 15))), 1)
+            passed = score >= 60
+            writer.add(Score.__table__, {
+                'id': score_id,
+                'user_id': user_id,
+                'exam_id': exam_id,
+                'score': score,
+                'is_passed': passed,
+                'imported_at': start + timedelta(days=20)
+            })
+            score_id += 1
+
+            if not passed:
+                continue
+
+            issue_date = start + timedelta(days=30)
+            certificate_number = f'{issue_date.year}{exam_id:04d}{user_index:07d}'
+            writer.add(Certificate.__table__, {
+                'id': certificate_id,
+                'user_id': user_id,
+                'exam_id': exam_id,
+                'certificate_number': certificate_number,
+                'issue_date': issue_date,
+                'status': 'issued',
+                'created_at': issue_date,
+                'updated_at': issue_date
+            })
+            certificate_id += 1
+
+            if not issued_tables:
+                continue
+
+            expiry_date = issue_date + timedelta(days=36 * 30)
+            writer.add(certificate_models.Certificate.__table__, {
+                'id': issued_id,
+                'certificate_number': f'E{exam_id:04d}-{issue_date.year}-I-{user_index:07d}',
+                'user_id': user_id,
+                'exam_id': exam_id,
+                'certificate_type': 'initial',
+                'status': 'active' if expiry_date > now else 'expired',
+                'issue_date': issue_date,
+                'expiry_date': expiry_date,
+                'template_id': None,
+                'certificate_data': {
+                    'exam_name': f'考试 {exam_id}',
+                    'user_name': name,
+                    'issue_date': issue_date.strftime('%Y-%m-%d'),
+                    'expiry_date': expiry_date.strftime('%Y-%m-%d')
+                },
+                'created_at': issue_date,
+                'updated_at': issue_date
+            })
+
+            if rng.random() < args.renewal_rate:
+                reviewed = rng.random() < 0.7
+                writer.add(certificate_models.CertificateRenewalApplication.__table__, {
+                    'id': renewal_id,
+                    'user_id': user_id,
+                    'original_certificate_id': issued_id,
+                    'application_type': rng.choice(['renewal', 'replacement']),
+                    'reason': rng.choice(['证书即将到期', '证书遗失', '证书损毁', '个人信息变更']),
+                    'status': rng.choice(['approved', 'rejected']) if reviewed else 'pending',
+                    'reviewer_id': None,
+                    'review_comment': '批量生成' if reviewed else None,
+                    'reviewed_at': now if reviewed else None,
+                    'new_certificate_id': None,
+                    'supporting_documents': {},
+                    'created_at': now - timedelta(days=rng.randint(0, 60)),
+                    'updated_at': now
+                })
+                renewal_id += 1
+
+            issued_id += 1
+
+        print(f'考试 {exam_index + 1}/{len(exams)} 完成，累计报名 {application_id - first_application_id}',
+              file=sys.stderr)
+
+    writer.flush()
+    return writer.counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量生成压测数据')
+    parser.add_argument('--database-uri', default=os.getenv(
+        'SQLALCHEMY_DATABASE_URI',
+        f"sqlite:///{os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'database', 'app.db')}"
+    ))
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--exams', type=int, default=50)
+    parser.add_argument('--applications', type=int, default=1000000)
+    parser.add_argument('--closed-ratio', type=float, default=0.8, help='已结束考试的比例')
+    parser.add_argument('--mean-score', type=float, default=65)
+    parser.add_argument('--renewal-rate', type=float, default=0.02, help='证书中提交换证/补证申请的比例')
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=20240801)
+    parser.add_argument('--prefix', default='gen', help='生成用户名的前缀')
+    parser.add_argument('--password', default='password123', help='所有生成用户的密码')
+    parser.add_argument('--fast-sqlite', action='store_true',
+                        help='SQLite 下关闭同步写盘以加快生成（仅用于一次性的压测库）')
+    args = parser.parse_args()
+
+    app = build_app(args.database_uri)
+    with app.app_context():
+        if args.fast_sqlite and db.engine.dialect.name == 'sqlite':
+            @event.listens_for(db.engine, 'connect')
+            def _fast_pragmas(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                cursor.execute('PRAGMA journal_mode=WAL')
+                cursor.execute('PRAGMA synchronous=OFF')
+                cursor.close()
+            db.engine.dispose()
+
+        db.create_all()
+        if certificate_models is None:
+            print(f'证书模块无法加载，跳过 certificates 和换证申请表: {certificate_models_error}', file=sys.stderr)
+
+        started = time.perf_counter()
+        counts = generate(args)
+        elapsed = time.perf_counter() - started
+
+    total = sum(counts.values())
+    for table, count in sorted(counts.items()):
+        print(f'{table:<36}{count:>12}')
+    print(f'共写入 {total} 行，耗时 {elapsed:.1f}s（{total / elapsed:.0f} 行/秒）')
+
+
+if __name__ == '__main__':
+    main()
@@ -18,6 +18,27 @@ from src.routes.exam import exam_bp
 from src.routes.application import application_bp
 from src.routes.score import score_bp
 from src.routes.certificate import certificate_bp
+from src.routes.admin import admin_bp
+from src.routes.pass_list import pass_list_bp
+from src.routes.me import me_bp
+from src.utils.profiler import init_profiler
+from src.utils.slow_query import init_slow_query_log
+from src.utils.search import init_application_search
+from src.utils.schema import upgrade_schema
+from src.utils.certificate_verify import init_certificate_verify
+from src.utils.pass_list import init_pass_list
+from src.utils.idempotency import init_idempotency
+from src.utils.single_flight import init_single_flight
+from src.utils.background import init_background_jobs
+from src.utils.stats_backfill import init_stats_backfill
+from src.utils.expiry_sweeper import init_expiry_sweeper
+from src.utils.events import init_event_bus
+from src.utils.notifications import init_notifications
+from src.utils.audit import init_audit_log
+from src.utils.archive import init_archiver
+from src.utils.deletion import init_deleter
+from src.utils.write_coordinator import init_write_coordinator
+from src.utils.static_publisher import init_static_publisher
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 
@@ -25,12 +46,95 @@ app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'sta
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT')
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-string')
 
+# 性能分析配置
+app.config['PROFILE_DIR'] = os.getenv('PROFILE_DIR', os.path.join(os.path.dirname(__file__), 'profiles'))
+app.config['PROFILE_SAMPLE_RATE'] = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+app.config['PROFILE_MAX_FILES'] = int(os.getenv('PROFILE_MAX_FILES', '200'))
+
+# 慢查询日志配置
+app.config['SLOW_QUERY_THRESHOLD_MS'] = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '200'))
+app.config['SLOW_QUERY_BUFFER_SIZE'] = int(os.getenv('SLOW_QUERY_BUFFER_SIZE', '500'))
+app.config['SLOW_QUERY_LOG_FILE'] = os.getenv('SLOW_QUERY_LOG_FILE')
+
+# 证书公开验证缓存配置
+app.config['CERT_VERIFY_CACHE_SIZE'] = int(os.getenv('CERT_VERIFY_CACHE_SIZE', '50000'))
+app.config['CERT_VERIFY_CACHE_TTL'] = int(os.getenv('CERT_VERIFY_CACHE_TTL', '60'))
+app.config['CERT_VERIFY_FILTER_CAPACITY'] = int(os.getenv('CERT_VERIFY_FILTER_CAPACITY', '1000000'))
+app.config['CERT_VERIFY_FILTER_REFRESH_SECONDS'] = int(os.getenv('CERT_VERIFY_FILTER_REFRESH_SECONDS', '10'))
+
+# 成绩发布查询表缓存时间（秒）和最多缓存的考试数
+app.config['PASS_LIST_CACHE_TTL'] = int(os.getenv('PASS_LIST_CACHE_TTL', '300'))
+app.config['PASS_LIST_CACHE_SIZE'] = int(os.getenv('PASS_LIST_CACHE_SIZE', '64'))
+
+# 证书过期扫描间隔（秒，0 表示不启动后台扫描）及每批处理数量
+app.config['CERT_EXPIRY_SWEEP_INTERVAL'] = int(os.getenv('CERT_EXPIRY_SWEEP_INTERVAL', '3600'))
+app.config['CERT_EXPIRY_SWEEP_BATCH_SIZE'] = int(os.getenv('CERT_EXPIRY_SWEEP_BATCH_SIZE', '500'))
+
+# 状态变化推送（SSE）：心跳间隔、跨进程版本号轮询间隔（秒）
+app.config['EVENTS_HEARTBEAT_SECONDS'] = int(os.getenv('EVENTS_HEARTBEAT_SECONDS', '15'))
+app.config['EVENTS_POLL_INTERVAL'] = float(os.getenv('EVENTS_POLL_INTERVAL', '2'))
+# 每个进程最多保持的事件流连接数，0 表示不限制（gthread worker 由 gunicorn.conf.py 设置默认值）
+app.config['EVENTS_MAX_CONNECTIONS'] = int(os.getenv('EVENTS_MAX_CONNECTIONS', '0'))
+
+# 考生通知：配置 MAIL_SERVER 启用邮件，配置 SMS_GATEWAY_URL 启用短信
+app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER')
+app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT', '25'))
+app.config['MAIL_USE_TLS'] = os.getenv('MAIL_USE_TLS', 'false').lower() == 'true'
+app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
+app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
+app.config['MAIL_DEFAULT_SENDER'] = os.getenv('MAIL_DEFAULT_SENDER', 'noreply@localhost')
+app.config['SMS_GATEWAY_URL'] = os.getenv('SMS_GATEWAY_URL')
+app.config['NOTIFY_BATCH_SIZE'] = int(os.getenv('NOTIFY_BATCH_SIZE', '100'))
+app.config['NOTIFY_RATE_LIMIT'] = float(os.getenv('NOTIFY_RATE_LIMIT', '20'))
+app.config['NOTIFY_MAX_ATTEMPTS'] = int(os.getenv('NOTIFY_MAX_ATTEMPTS', '6'))
+
+# 审计日志：批量写入间隔（秒）及可选的 JSON Lines 文件
+app.config['AUDIT_FLUSH_INTERVAL'] = float(os.getenv('AUDIT_FLUSH_INTERVAL', '1'))
+app.config['AUDIT_LOG_FILE'] = os.getenv('AUDIT_LOG_FILE')
+
+# 自动归档：考试结束并关闭超过该天数后归档报名和成绩（0 表示只手动归档）
+app.config['ARCHIVE_AFTER_DAYS'] = int(os.getenv('ARCHIVE_AFTER_DAYS', '0'))
+
+# 后台分批删除考试和用户：每批删除的子记录数
+app.config['DELETE_BATCH_SIZE'] = int(os.getenv('DELETE_BATCH_SIZE', '1000'))
+
+# 报名写入分组提交：由单个写入线程每隔几毫秒合并提交一次（SQLite 高并发报名时开启）
+app.config['WRITE_COORDINATOR_ENABLED'] = os.getenv('WRITE_COORDINATOR_ENABLED', 'false').lower() == 'true'
+app.config['WRITE_GROUP_WINDOW_MS'] = int(os.getenv('WRITE_GROUP_WINDOW_MS', '5'))
+
+# 请求合并跨 worker 共享结果的目录（不设置时只在进程内合并）
+app.config['SINGLE_FLIGHT_DIR'] = os.getenv('SINGLE_FLIGHT_DIR')
+
+# 公开考试目录的静态快照目录，由 nginx 直接返回（不设置时不发布）
+app.config['STATIC_SNAPSHOT_DIR'] = os.getenv('STATIC_SNAPSHOT_DIR')
+
+# 后台任务锁文件，多 worker 部署时只有拿到锁的进程运行过期扫描、通知发送等任务（gunicorn.conf.py 中设置默认值）
+app.config['BACKGROUND_JOBS_LOCK'] = os.getenv('BACKGROUND_JOBS_LOCK')
+
 # 启用CORS
 CORS(app, origins=['http://localhost:3000', 'http://localhost:5173'])
 
 # 初始化JWT
 jwt = JWTManager(app)
 
+# 按需请求性能分析
+init_profiler(app)
+
+# 慢查询日志
+init_slow_query_log(app)
+
+# 证书公开验证
+init_certificate_verify(app)
+
+# 成绩发布查询
+init_pass_list(app)
+
+# POST 接口幂等键
+init_idempotency(app)
+
+# 热点只读接口的请求合并
+init_single_flight(app)
+
 # 注册蓝图
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -38,14 +142,25 @@ app.register_blueprint(exam_bp, url_prefix='/api')
 app.register_blueprint(application_bp, url_prefix='/api')
 app.register_blueprint(score_bp, url_prefix='/api')
 app.register_blueprint(certificate_bp, url_prefix='/api/certificates')
+app.register_blueprint(admin_bp, url_prefix='/api/admin')
+app.register_blueprint(pass_list_bp, url_prefix='/api')
+app.register_blueprint(me_bp, url_prefix='/api/me')
 
 # 数据库配置
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+# SQLALCHEMY_DATABASE_URI 优先，其次是 docker-compose 等部署使用的 DATABASE_URL
+app.config['SQLALCHEMY_DATABASE_URI'] = (
+    os.getenv('SQLALCHEMY_DATABASE_URI')
+    or os.getenv('DATABASE_URL')
+    or f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 
 with app.app_context():
     db.create_all()
+    # 给从旧版本升级的数据库补齐新增的列
+    upgrade_schema(app)
+    init_application_search(app)
     
     # 创建默认管理员账户（如果不存在）
     from src.models.user import User
@@ -61,6 +176,36 @@ with app.app_context():
         db.session.commit()
         print("默认管理员账户已创建: admin/admin123")
 
+# 多 worker 部署时只在一个进程中运行的后台任务
+init_background_jobs(app)
+
+# 升级后补算已有考试的统计计数器和用户涉及的考试
+init_stats_backfill(app)
+
+# 证书过期后台扫描
+init_expiry_sweeper(app)
+
+# 状态变化推送
+init_event_bus(app)
+
+# 考生通知后台发送
+init_notifications(app)
+
+# 审计日志后台写入
+init_audit_log(app)
+
+# 已关闭考试自动归档
+init_archiver(app)
+
+# 考试和用户的后台分批删除
+init_deleter(app)
+
+# 报名写入分组提交
+init_write_coordinator(app)
+
+# 公开考试目录的静态快照
+init_static_publisher(app)
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
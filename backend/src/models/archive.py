@@ -0,0 +1,66 @@
+from datetime import datetime
+from sqlalchemy import event, delete
+from sqlalchemy.orm import Session
+from src.models.user import db
+from src.models.exam import Exam, Application, Score
+
+class ApplicationArchive(db.Model):
+    """已归档考试的报名记录
+
+    列与 application 表一致（保留原 id），由 src.utils.archive 整场考试批量迁入，恢复时原样迁回。
+    """
+    __tablename__ = 'application_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    exam_id = db.Column(db.Integer, nullable=False, index=True)
+    application_data = db.Column(db.JSON)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    admission_ticket_path = db.Column(db.String(500))
+    submitted_at = db.Column(db.DateTime)
+    approved_at = db.Column(db.DateTime)
+    rejected_reason = db.Column(db.Text)
+    search_name = db.Column(db.String(100))
+    search_phone = db.Column(db.String(30))
+    search_id_number = db.Column(db.String(50))
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    user = db.relationship('User', primaryjoin='foreign(ApplicationArchive.user_id) == User.id', viewonly=True)
+    exam = db.relationship(
+        'Exam', primaryjoin='foreign(ApplicationArchive.exam_id) == Exam.id', viewonly=True,
+        backref=db.backref('archived_applications', viewonly=True, lazy=True)
+    )
+
+    def __repr__(self):
+        return f'<ApplicationArchive {self.id}>'
+
+    to_dict = Application.to_dict
+
+class ScoreArchive(db.Model):
+    """已归档考试的成绩记录，列与 score 表一致"""
+    __tablename__ = 'score_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    exam_id = db.Column(db.Integer, nullable=False, index=True)
+    score = db.Column(db.Float)
+    section_scores = db.Column(db.JSON)
+    is_passed = db.Column(db.Boolean, default=False)
+    imported_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    user = db.relationship('User', primaryjoin='foreign(ScoreArchive.user_id) == User.id', viewonly=True)
+    exam = db.relationship('Exam', primaryjoin='foreign(ScoreArchive.exam_id) == Exam.id', viewonly=True)
+
+    def __repr__(self):
+        return f'<ScoreArchive {self.id}>'
+
+    to_dict = Score.to_dict
+
+@event.listens_for(Session, 'after_flush')
+def _delete_archives_of_deleted_exams(session, flush_context):
+    exam_ids = [obj.id for obj in session.deleted if isinstance(obj, Exam)]
+    if exam_ids:
+        connection = session.connection()
+        connection.execute(delete(ApplicationArchive).where(ApplicationArchive.exam_id.in_(exam_ids)))
+        connection.execute(delete(ScoreArchive).where(ScoreArchive.exam_id.in_(exam_ids)))
@@ -0,0 +1,44 @@
+from datetime import datetime
+from sqlalchemy import event
+from src.models.user import db
+
+class AuditLog(db.Model):
+    """管理员操作审计日志（只追加）
+
+    由 src.utils.audit 在内存中缓冲后批量写入，diff 记录字段的 [修改前, 修改后]
+    或批量操作的摘要。记录写入后不允许修改或删除。
+    """
+    __tablename__ = 'audit_log'
+    __table_args__ = (
+        db.Index('ix_audit_log_target', 'target_type', 'target_id'),
+        db.Index('ix_audit_log_actor_created_at', 'actor_id', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    actor_id = db.Column(db.Integer)
+    action = db.Column(db.String(50), nullable=False, index=True)
+    target_type = db.Column(db.String(50), nullable=False)
+    target_id = db.Column(db.Integer)
+    diff = db.Column(db.JSON)
+    ip_address = db.Column(db.String(45))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<AuditLog {self.action} {self.target_type}:{self.target_id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'actor_id': self.actor_id,
+            'action': self.action,
+            'target_type': self.target_type,
+            'target_id': self.target_id,
+            'diff': self.diff,
+            'ip_address': self.ip_address,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+@event.listens_for(AuditLog, 'before_update')
+@event.listens_for(AuditLog, 'before_delete')
+def _reject_audit_log_changes(mapper, connection, target):
+    raise ValueError('审计日志只允许追加')
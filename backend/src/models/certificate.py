@@ -1,13 +1,13 @@
 from datetime import datetime
-from src.database import db
+from src.models.user import db
 
 class Certificate(db.Model):
     __tablename__ = 'certificates'
     
     id = db.Column(db.Integer, primary_key=True)
     certificate_number = db.Column(db.String(100), unique=True, nullable=False, index=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    exam_id = db.Column(db.Integer, db.ForeignKey('exams.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    exam_id = db.Column(db.Integer, db.ForeignKey('exam.id', ondelete='CASCADE'), nullable=False)
     
     # 证书类型：initial(初证), renewal(换证), replacement(补证)
     certificate_type = db.Column(db.String(20), nullable=False, default='initial')
@@ -20,7 +20,7 @@ class Certificate(db.Model):
     expiry_date = db.Column(db.DateTime, nullable=True)
     
     # 原证书信息（用于换证和补证）
-    original_certificate_id = db.Column(db.Integer, db.ForeignKey('certificates.id'), nullable=True)
+    original_certificate_id = db.Column(db.Integer, db.ForeignKey('certificates.id', ondelete='SET NULL'), nullable=True)
     original_certificate_number = db.Column(db.String(100), nullable=True)
     
     # 换证原因
@@ -36,13 +36,19 @@ class Certificate(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # 关系
-    user = db.relationship('User', backref='certificates')
-    exam = db.relationship('Exam', backref='certificates')
-    original_certificate = db.relationship('Certificate', remote_side=[id], backref='replacement_certificates')
+    # 关系（models/exam.py 中另有同名的 Certificate 模型，引用时使用完整路径；
+    # User/Exam 上的 certificates 反向关系属于该模型，这里使用 issued_certificates）
+    user = db.relationship('User', backref=db.backref('issued_certificates', passive_deletes='all'))
+    exam = db.relationship('Exam', backref=db.backref('issued_certificates', passive_deletes='all'))
+    original_certificate = db.relationship('src.models.certificate.Certificate', remote_side=[id], backref='replacement_certificates')
     
-    def to_dict(self):
-        return {
+    __table_args__ = (
+        # 过期扫描和“即将到期”查询按 status + expiry_date 范围检索
+        db.Index('ix_certificates_status_expiry_date', 'status', 'expiry_date'),
+    )
+    
+    def to_dict(self, include_related=True):
+        data = {
             'id': self.id,
             'certificate_number': self.certificate_number,
             'user_id': self.user_id,
@@ -58,10 +64,12 @@ class Certificate(db.Model):
             'certificate_data': self.certificate_data,
             'certificate_file_path': self.certificate_file_path,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'user': self.user.to_dict() if self.user else None,
-            'exam': self.exam.to_dict() if self.exam else None
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+        if include_related:
+            data['user'] = self.user.to_dict() if self.user else None
+            data['exam'] = self.exam.to_dict() if self.exam else None
+        return data
 
 class CertificateTemplate(db.Model):
     __tablename__ = 'certificate_templates'
@@ -106,8 +114,8 @@ class CertificateRenewalApplication(db.Model):
     __tablename__ = 'certificate_renewal_applications'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    original_certificate_id = db.Column(db.Integer, db.ForeignKey('certificates.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    original_certificate_id = db.Column(db.Integer, db.ForeignKey('certificates.id', ondelete='CASCADE'), nullable=False)
     
     # 申请类型：renewal(换证), replacement(补证)
     application_type = db.Column(db.String(20), nullable=False)
@@ -119,12 +127,12 @@ class CertificateRenewalApplication(db.Model):
     status = db.Column(db.String(20), nullable=False, default='pending')
     
     # 审核信息
-    reviewer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    reviewer_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
     review_comment = db.Column(db.Text, nullable=True)
     reviewed_at = db.Column(db.DateTime, nullable=True)
     
     # 新证书ID（完成后填写）
-    new_certificate_id = db.Column(db.Integer, db.ForeignKey('certificates.id'), nullable=True)
+    new_certificate_id = db.Column(db.Integer, db.ForeignKey('certificates.id', ondelete='SET NULL'), nullable=True)
     
     # 申请材料（JSON格式存储文件路径等）
     supporting_documents = db.Column(db.JSON, nullable=True)
@@ -133,10 +141,10 @@ class CertificateRenewalApplication(db.Model):
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # 关系
-    user = db.relationship('User', foreign_keys=[user_id], backref='renewal_applications')
-    original_certificate = db.relationship('Certificate', foreign_keys=[original_certificate_id])
+    user = db.relationship('User', foreign_keys=[user_id], backref=db.backref('renewal_applications', passive_deletes='all'))
+    original_certificate = db.relationship('src.models.certificate.Certificate', foreign_keys=[original_certificate_id])
     reviewer = db.relationship('User', foreign_keys=[reviewer_id])
-    new_certificate = db.relationship('Certificate', foreign_keys=[new_certificate_id])
+    new_certificate = db.relationship('src.models.certificate.Certificate', foreign_keys=[new_certificate_id])
     
     def to_dict(self):
         return {
@@ -0,0 +1,47 @@
+from datetime import datetime
+from src.models.user import db
+
+class DeletionJob(db.Model):
+    """后台分批删除任务
+
+    删除考试或用户时只创建任务，由 src.utils.deletion 的后台线程分批删除子记录，
+    deleted / total 为已删除和预计删除的子记录数。
+    status: pending, running, completed, failed
+    """
+    __tablename__ = 'deletion_job'
+    __table_args__ = (
+        db.Index('ix_deletion_job_target', 'target_type', 'target_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    target_type = db.Column(db.String(20), nullable=False)  # exam, user
+    target_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)
+    total = db.Column(db.Integer)
+    deleted = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    requested_by = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    # 处理过程中每批更新，用于判断执行任务的进程是否已退出
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DeletionJob {self.target_type}:{self.target_id} {self.status}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'target_type': self.target_type,
+            'target_id': self.target_id,
+            'status': self.status,
+            'total': self.total,
+            'deleted': self.deleted,
+            'progress': round(self.deleted / self.total, 4) if self.total else (1.0 if self.status == 'completed' else 0.0),
+            'error': self.error,
+            'requested_by': self.requested_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -1,6 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sqlalchemy import event
 from src.models.user import db
+from src.utils.normalize import extract_search_fields
 
 class Exam(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -13,24 +15,35 @@ class Exam(db.Model):
     exam_type = db.Column(db.String(50))
     organizer = db.Column(db.String(200))
     description = db.Column(db.Text)
-    status = db.Column(db.String(20), nullable=False, default='draft')  # draft, published, closed
+    status = db.Column(db.String(20), nullable=False, default='draft')  # draft, published, closed, deleting
     max_applicants = db.Column(db.Integer, default=0)  # 0表示无限制
     contact_phone = db.Column(db.String(20))
     contact_email = db.Column(db.String(120))
+    pass_rule = db.Column(db.JSON)  # 合格规则，见 src/utils/pass_rules.py
+    archived_at = db.Column(db.DateTime)  # 报名和成绩已迁入归档表，见 src/utils/archive.py
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # 关联关系
-    applications = db.relationship('Application', backref='exam', lazy=True, cascade='all, delete-orphan')
-    scores = db.relationship('Score', backref='exam', lazy=True, cascade='all, delete-orphan')
-    certificates = db.relationship('Certificate', backref='exam', lazy=True, cascade='all, delete-orphan')
-    form_config = db.relationship('FormConfig', backref='exam', uselist=False, cascade='all, delete-orphan')
+    # 关联关系：子表由数据库外键 ON DELETE CASCADE 删除，删除考试时不把子记录加载到会话中
+    applications = db.relationship('Application', backref='exam', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    scores = db.relationship('Score', backref='exam', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    certificates = db.relationship('src.models.exam.Certificate', backref='exam', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    form_config = db.relationship('FormConfig', backref='exam', uselist=False, cascade='all, delete-orphan', passive_deletes=True)
 
     def __repr__(self):
         return f'<Exam {self.name}>'
 
-    def to_dict(self):
-        return {
+    @classmethod
+    def visible(cls):
+        """不含正在删除的考试；删除任务执行期间考试不再展示，也不接受修改和报名"""
+        return cls.query.filter(cls.status != 'deleting')
+
+    @classmethod
+    def get_visible_or_404(cls, exam_id):
+        return cls.visible().filter(cls.id == exam_id).first_or_404()
+
+    def to_dict(self, include_application_count=True):
+        data = {
             'id': self.id,
             'name': self.name,
             'start_time': self.start_time.isoformat() if self.start_time else None,
@@ -45,15 +58,20 @@ class Exam(db.Model):
             'max_applicants': self.max_applicants,
             'contact_phone': self.contact_phone,
             'contact_email': self.contact_email,
+            'pass_rule': self.pass_rule,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'application_count': len(self.applications) if self.applications else 0
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+        if include_application_count:
+            applications = self.archived_applications if self.archived_at else self.applications
+            data['application_count'] = len(applications) if applications else 0
+        return data
 
 class Application(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    exam_id = db.Column(db.Integer, db.ForeignKey('exam.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    exam_id = db.Column(db.Integer, db.ForeignKey('exam.id', ondelete='CASCADE'), nullable=False)
     application_data = db.Column(db.JSON)  # 存储自定义表单数据
     status = db.Column(db.String(20), nullable=False, default='pending')  # pending, approved, rejected
     admission_ticket_path = db.Column(db.String(500))
@@ -61,14 +79,27 @@ class Application(db.Model):
     approved_at = db.Column(db.DateTime)
     rejected_reason = db.Column(db.Text)
     
+    # 从 application_data 中提取的检索列，写入时自动填充
+    search_name = db.Column(db.String(100))
+    search_phone = db.Column(db.String(30))
+    search_id_number = db.Column(db.String(50))
+    
     # 关联关系
-    user = db.relationship('User', backref='applications')
+    user = db.relationship('User', backref=db.backref('applications', passive_deletes='all'))
+    
+    __table_args__ = (
+        db.Index('ix_application_exam_search_name', 'exam_id', 'search_name'),
+        db.Index('ix_application_exam_search_phone', 'exam_id', 'search_phone'),
+        db.Index('ix_application_exam_search_id_number', 'exam_id', 'search_id_number'),
+        # 归档的报名保留原 id，SQLite 需使用 AUTOINCREMENT，已删除（迁入归档表）的 id 不再分配
+        {'sqlite_autoincrement': True}
+    )
 
     def __repr__(self):
         return f'<Application {self.id}>'
 
-    def to_dict(self):
-        return {
+    def to_dict(self, include_related=True):
+        data = {
             'id': self.id,
             'user_id': self.user_id,
             'exam_id': self.exam_id,
@@ -77,41 +108,59 @@ class Application(db.Model):
             'admission_ticket_path': self.admission_ticket_path,
             'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None,
             'approved_at': self.approved_at.isoformat() if self.approved_at else None,
-            'rejected_reason': self.rejected_reason,
-            'user': self.user.to_dict() if self.user else None,
-            'exam': self.exam.to_dict() if self.exam else None
+            'rejected_reason': self.rejected_reason
         }
+        if include_related:
+            data['user'] = self.user.to_dict() if self.user else None
+            data['exam'] = self.exam.to_dict() if self.exam else None
+        return data
+
+@event.listens_for(Application, 'before_insert')
+@event.listens_for(Application, 'before_update')
+def _fill_application_search_fields(mapper, connection, target):
+    for column, value in extract_search_fields(target.application_data).items():
+        setattr(target, column, value)
 
 class Score(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    exam_id = db.Column(db.Integer, db.ForeignKey('exam.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    exam_id = db.Column(db.Integer, db.ForeignKey('exam.id', ondelete='CASCADE'), nullable=False)
     score = db.Column(db.Float)
+    section_scores = db.Column(db.JSON)  # 分科成绩，如 {"理论": 80, "实操": 75}
     is_passed = db.Column(db.Boolean, default=False)
     imported_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # 关联关系
-    user = db.relationship('User', backref='scores')
+    user = db.relationship('User', backref=db.backref('scores', passive_deletes='all'))
+    
+    # 同报名表，归档的成绩保留原 id
+    __table_args__ = ({'sqlite_autoincrement': True},)
 
     def __repr__(self):
         return f'<Score {self.id}>'
 
-    def to_dict(self):
-        return {
+    def to_dict(self, include_related=True):
+        data = {
             'id': self.id,
             'user_id': self.user_id,
             'exam_id': self.exam_id,
             'score': self.score,
+            'section_scores': self.section_scores,
             'is_passed': self.is_passed,
-            'imported_at': self.imported_at.isoformat() if self.imported_at else None,
-            'user': self.user.to_dict() if self.user else None,
-            'exam': self.exam.to_dict() if self.exam else None
+            'imported_at': self.imported_at.isoformat() if self.imported_at else None
         }
+        if include_related:
+            data['user'] = self.user.to_dict() if self.user else None
+            data['exam'] = self.exam.to_dict() if self.exam else None
+        return data
+
+# 本表的证书状态与 models/certificate.py 中证书状态的对应关系：issued 即 active，其余同名
+CERTIFICATE_STATUS_ALIASES = {'issued': 'active'}
 
 class Certificate(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    exam_id = db.Column(db.Integer, db.ForeignKey('exam.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    exam_id = db.Column(db.Integer, db.ForeignKey('exam.id', ondelete='CASCADE'), nullable=False)
     certificate_number = db.Column(db.String(100), unique=True)
     issue_date = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(20), nullable=False, default='pending')  # pending, issued
@@ -119,13 +168,13 @@ class Certificate(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # 关联关系
-    user = db.relationship('User', backref='certificates')
+    user = db.relationship('User', backref=db.backref('certificates', passive_deletes='all'))
 
     def __repr__(self):
         return f'<Certificate {self.certificate_number}>'
 
-    def to_dict(self):
-        return {
+    def to_dict(self, include_related=True):
+        data = {
             'id': self.id,
             'user_id': self.user_id,
             'exam_id': self.exam_id,
@@ -133,14 +182,16 @@ class Certificate(db.Model):
             'issue_date': self.issue_date.isoformat() if self.issue_date else None,
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'user': self.user.to_dict() if self.user else None,
-            'exam': self.exam.to_dict() if self.exam else None
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+        if include_related:
+            data['user'] = self.user.to_dict() if self.user else None
+            data['exam'] = self.exam.to_dict() if self.exam else None
+        return data
 
 class FormConfig(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    exam_id = db.Column(db.Integer, db.ForeignKey('exam.id'), nullable=False)
+    exam_id = db.Column(db.Integer, db.ForeignKey('exam.id', ondelete='CASCADE'), nullable=False)
     config_json = db.Column(db.JSON)  # 存储表单字段配置
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,30 @@
+from datetime import datetime
+from src.models.user import db
+
+class OutboxMessage(db.Model):
+    """待发送的考生通知（事务性发件箱）
+
+    与触发通知的状态变更在同一事务中写入，提交成功才会发送，回滚时一并撤销。
+    后台发送线程按 (status, next_attempt_at) 认领到期的消息，收件地址在发送时按 user_id 读取。
+    status: pending 待发送，sending 已认领（next_attempt_at 为认领超时时间），
+    sent 已发送，failed 重试次数用尽，skipped 用户没有对应渠道的联系方式。
+    """
+    __tablename__ = 'outbox_message'
+    __table_args__ = (
+        db.Index('ix_outbox_message_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    channel = db.Column(db.String(20), nullable=False)  # email, sms
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<OutboxMessage {self.id} {self.kind} {self.status}>'
@@ -0,0 +1,28 @@
+from datetime import datetime
+from sqlalchemy import event, delete
+from sqlalchemy.orm import Session
+from src.models.user import db
+from src.models.exam import Exam
+
+class PassListEntry(db.Model):
+    """成绩发布查询表
+
+    发布成绩时按考试一次性生成，每位考生一行。lookup_key 为
+    HMAC(规范化姓名 + 证件号) 的十六进制摘要，表中不保存可识别个人身份的明文。
+    """
+    __tablename__ = 'pass_list_entry'
+
+    exam_id = db.Column(db.Integer, primary_key=True)
+    lookup_key = db.Column(db.String(64), primary_key=True)
+    score = db.Column(db.Float)
+    is_passed = db.Column(db.Boolean, nullable=False, default=False)
+    published_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<PassListEntry {self.exam_id} {self.lookup_key[:8]}>'
+
+@event.listens_for(Session, 'after_flush')
+def _delete_pass_list_of_deleted_exams(session, flush_context):
+    exam_ids = [obj.id for obj in session.deleted if isinstance(obj, Exam)]
+    if exam_ids:
+        session.connection().execute(delete(PassListEntry).where(PassListEntry.exam_id.in_(exam_ids)))
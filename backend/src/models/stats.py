@@ -0,0 +1,394 @@
+from datetime import datetime
+from sqlalchemy import event, inspect, select, delete, func, Integer
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from src.models.user import db
+from src.models.exam import Exam, Application, Score, CERTIFICATE_STATUS_ALIASES
+from src.utils.archive import application_model, score_model
+
+class ExamStatCounter(db.Model):
+    """考试统计计数器
+
+    每个考试的每项指标一行，在报名、成绩、证书写入时随同一事务增量更新，
+    读取统计时只需按 exam_id 取出该考试的所有计数器。
+    指标命名：
+    - application:<status>              各状态报名数
+    - score:rows / score:count          成绩行数 / 有分数的行数
+    - score:sum / score:sum_sq          分数和 / 平方和
+    - score:passed                      通过人数
+    - score:bin:<n>                     分数落在 [n, n+1) 的人数
+    - score:version                     成绩每次变更都会递增
+    - exam:version                      考试本身或其任一计数器每次变更都会递增
+    - certificate:status:<status>       各状态证书数，两套证书模型的状态统一为 models/certificate.py 的取值
+    - certificate:type:<type>           各类型证书数
+    """
+    __tablename__ = 'exam_stat_counter'
+
+    exam_id = db.Column(db.Integer, primary_key=True)
+    metric = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ExamStatCounter {self.exam_id} {self.metric}>'
+
+def _is_certificate(obj):
+    # 证书存在 models/exam.py 和 models/certificate.py 两套模型，统一按类名识别
+    return type(obj).__name__ == 'Certificate'
+
+def _tracked_kind(obj):
+    if isinstance(obj, Application):
+        return 'application'
+    if isinstance(obj, Score):
+        return 'score'
+    if _is_certificate(obj):
+        return 'certificate'
+    return None
+
+_TRACKED_ATTRS = {
+    'application': ('exam_id', 'status'),
+    'score': ('exam_id', 'score', 'is_passed'),
+    'certificate': ('exam_id', 'status', 'certificate_type')
+}
+
+def _certificate_status(status):
+    return CERTIFICATE_STATUS_ALIASES.get(status, status)
+
+def _contributions(kind, values):
+    """一行数据对各项指标的贡献"""
+    if kind == 'application':
+        return [(f"application:{values['status'] or 'pending'}", 1)]
+
+    if kind == 'score':
+        score = values['score']
+        metrics = [('score:rows', 1), ('score:passed', 1 if values['is_passed'] else 0)]
+        if score is not None:
+            metrics += [
+                ('score:count', 1),
+                ('score:sum', score),
+                ('score:sum_sq', score * score),
+                (f'score:bin:{int(score)}', 1)
+            ]
+        return metrics
+
+    metrics = [(f"certificate:status:{_certificate_status(values['status'])}", 1)]
+    if values.get('certificate_type'):
+        metrics.append((f"certificate:type:{values['certificate_type']}", 1))
+    return metrics
+
+def _with_default(obj, attr, value):
+    """尚未插入的对象字段为 None 时，按列默认值计算"""
+    if value is None:
+        column = type(obj).__table__.c.get(attr)
+        if column is not None and column.default is not None and column.default.is_scalar:
+            return column.default.arg
+    return value
+
+def _current_values(obj, kind):
+    values = {}
+    for attr in _TRACKED_ATTRS[kind]:
+        value = getattr(obj, attr, None)
+        values[attr] = _with_default(obj, attr, value)
+    return values
+
+def _previous_values(session, obj, kind):
+    """取出本次 flush 之前的值，若没有相关字段变化则返回 None"""
+    state = inspect(obj)
+    values = _current_values(obj, kind)
+    changed = False
+
+    for attr in _TRACKED_ATTRS[kind]:
+        if attr not in state.attrs:
+            continue
+        history = state.attrs[attr].history
+        if not history.has_changes():
+            continue
+        changed = True
+        if history.deleted:
+            values[attr] = history.deleted[0]
+        else:
+            # 修改前未加载的字段，从数据库读取旧值
+            column = getattr(type(obj), attr)
+            values[attr] = session.connection().execute(
+                select(column).where(type(obj).id == obj.id)
+            ).scalar()
+        values[attr] = _with_default(obj, attr, values[attr])
+
+    return values if changed else None
+
+def _add_deltas(deltas, exam_id, metrics, sign):
+    if exam_id is None:
+        return
+    for metric, amount in metrics:
+        if amount:
+            key = (exam_id, metric)
+            deltas[key] = deltas.get(key, 0) + sign * amount
+
+def _collect_object(session, obj, deltas, is_new=False, is_deleted=False):
+    kind = _tracked_kind(obj)
+    if kind is None:
+        return
+
+    if is_new:
+        values = _current_values(obj, kind)
+        _add_deltas(deltas, values['exam_id'], _contributions(kind, values), 1)
+        if kind == 'score':
+            _add_deltas(deltas, values['exam_id'], [('score:version', 1)], 1)
+        return
+
+    if is_deleted:
+        state = inspect(obj)
+        old = _current_values(obj, kind)
+        for attr in _TRACKED_ATTRS[kind]:
+            if attr in state.attrs and state.attrs[attr].history.deleted:
+                old[attr] = state.attrs[attr].history.deleted[0]
+        _add_deltas(deltas, old['exam_id'], _contributions(kind, old), -1)
+        if kind == 'score':
+            _add_deltas(deltas, old['exam_id'], [('score:version', 1)], 1)
+        return
+
+    old = _previous_values(session, obj, kind)
+    if old is None:
+        return
+    new = _current_values(obj, kind)
+    _add_deltas(deltas, old['exam_id'], _contributions(kind, old), -1)
+    _add_deltas(deltas, new['exam_id'], _contributions(kind, new), 1)
+    if kind == 'score':
+        _add_deltas(deltas, new['exam_id'], [('score:version', 1)], 1)
+
+def tracked_columns(model, kind):
+    """集合式写入时需要 RETURNING 的列，配合 deleted_row_deltas 计算计数器增量"""
+    return [getattr(model, attr) for attr in _TRACKED_ATTRS[kind] if hasattr(model, attr)]
+
+def deleted_row_deltas(kind, rows):
+    """集合式删除的行对计数器的增量，rows 中每行需包含 exam_id 及该类数据参与统计的字段"""
+    deltas = {}
+    for values in rows:
+        values = dict(values)
+        values.setdefault('certificate_type', None)
+        _add_deltas(deltas, values['exam_id'], _contributions(kind, values), -1)
+        if kind == 'score':
+            _add_deltas(deltas, values['exam_id'], [('score:version', 1)], 1)
+    return deltas
+
+@event.listens_for(Session, 'before_flush')
+def _collect_stat_deltas(session, flush_context, instances):
+    deltas = session.info['exam_stat_deltas'] = {}
+    deleted_exams = session.info['exam_stat_deleted_exams'] = set()
+
+    for obj in session.new:
+        _collect_object(session, obj, deltas, is_new=True)
+    for obj in session.dirty:
+        if isinstance(obj, Exam):
+            if session.is_modified(obj):
+                _add_deltas(deltas, obj.id, [('exam:version', 1)], 1)
+            continue
+        _collect_object(session, obj, deltas)
+    for obj in session.deleted:
+        if isinstance(obj, Exam):
+            deleted_exams.add(obj.id)
+        else:
+            _collect_object(session, obj, deltas, is_deleted=True)
+
+@event.listens_for(Session, 'after_flush')
+def _apply_stat_deltas(session, flush_context):
+    deltas = session.info.pop('exam_stat_deltas', None)
+    deleted_exams = session.info.pop('exam_stat_deleted_exams', None)
+    if not deltas and not deleted_exams:
+        return
+    connection = session.connection()
+
+    if deleted_exams:
+        connection.execute(delete(ExamStatCounter).where(ExamStatCounter.exam_id.in_(deleted_exams)))
+
+    if deltas:
+        apply_counter_deltas(connection, {
+            key: amount for key, amount in deltas.items()
+            if not deleted_exams or key[0] not in deleted_exams
+        })
+
+def apply_counter_deltas(connection, deltas):
+    """以 value = value + delta 的方式合并计数器增量，供批量 SQL 更新后手动调用"""
+    rows = [
+        {'exam_id': exam_id, 'metric': metric, 'value': amount}
+        for (exam_id, metric), amount in deltas.items() if amount and metric != 'exam:version'
+    ]
+    # 计数器有变化的考试版本号加一
+    exam_ids = {exam_id for (exam_id, _), amount in deltas.items() if amount}
+    rows += [{'exam_id': exam_id, 'metric': 'exam:version', 'value': 1} for exam_id in exam_ids]
+    if not rows:
+        return
+
+    table = ExamStatCounter.__table__
+    dialect = connection.dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.exam_id, table.c.metric],
+            set_={'value': table.c.value + stmt.excluded.value}
+        )
+        connection.execute(stmt)
+        return
+
+    for row in rows:
+        result = connection.execute(
+            table.update()
+            .where(table.c.exam_id == row['exam_id'], table.c.metric == row['metric'])
+            .values(value=table.c.value + row['value'])
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+def _certificate_models():
+    return [
+        mapper.class_ for mapper in db.Model.registry.mappers
+        if mapper.class_.__name__ == 'Certificate'
+    ]
+
+def rebuild_exam_stats(exam_id):
+    """按当前数据全量重算某个考试的计数器，已归档的考试从归档表读取"""
+    session = db.session
+    counters = {}
+    ApplicationModel = application_model(exam_id)
+    ScoreModel = score_model(exam_id)
+
+    def add(metric, value):
+        if value:
+            counters[metric] = counters.get(metric, 0) + value
+
+    for status, count in session.query(ApplicationModel.status, func.count()).filter(
+            ApplicationModel.exam_id == exam_id).group_by(ApplicationModel.status):
+        add(f"application:{status or 'pending'}", count)
+
+    rows, count, total, total_sq, passed = session.query(
+        func.count(),
+        func.count(ScoreModel.score),
+        func.sum(ScoreModel.score),
+        func.sum(ScoreModel.score * ScoreModel.score),
+        func.sum(func.cast(ScoreModel.is_passed, Integer))
+    ).filter(ScoreModel.exam_id == exam_id).one()
+    add('score:rows', rows)
+    add('score:count', count)
+    add('score:sum', total or 0)
+    add('score:sum_sq', total_sq or 0)
+    add('score:passed', passed or 0)
+
+    bucket = func.cast(ScoreModel.score, Integer)
+    for bin_value, bin_count in session.query(bucket, func.count()).filter(
+            ScoreModel.exam_id == exam_id, ScoreModel.score.isnot(None)).group_by(bucket):
+        add(f'score:bin:{bin_value}', bin_count)
+
+    for model in _certificate_models():
+        for status, cert_count in session.query(model.status, func.count()).filter(
+                model.exam_id == exam_id).group_by(model.status):
+            add(f'certificate:status:{_certificate_status(status)}', cert_count)
+        if hasattr(model, 'certificate_type'):
+            for cert_type, cert_count in session.query(model.certificate_type, func.count()).filter(
+                    model.exam_id == exam_id).group_by(model.certificate_type):
+                add(f'certificate:type:{cert_type}', cert_count)
+
+    for metric in ('score:version', 'exam:version'):
+        version = session.query(ExamStatCounter.value).filter_by(exam_id=exam_id, metric=metric).scalar()
+        counters[metric] = (version or 0) + 1
+
+    session.execute(delete(ExamStatCounter).where(ExamStatCounter.exam_id == exam_id))
+    session.add_all([
+        ExamStatCounter(exam_id=exam_id, metric=metric, value=value)
+        for metric, value in counters.items()
+    ])
+    session.commit()
+
+
+# 旧版本写入的、已不再使用的指标；存在这些指标的考试需要重算
+LEGACY_METRICS = ('certificate:status:issued',)
+
+def backfill_exam_stats():
+    """计数器表为空时（例如从没有该表的版本升级）按现有数据重算所有考试，
+    否则只重算还有旧指标的考试，返回重算的考试数"""
+    if db.session.query(ExamStatCounter.exam_id).first() is not None:
+        exam_ids = db.session.scalars(
+            select(ExamStatCounter.exam_id).distinct()
+            .where(ExamStatCounter.metric.in_(LEGACY_METRICS))
+            .order_by(ExamStatCounter.exam_id)
+        ).all()
+    else:
+        exam_ids = db.session.scalars(select(Exam.id).order_by(Exam.id)).all()
+    for exam_id in exam_ids:
+        rebuild_exam_stats(exam_id)
+    return len(exam_ids)
+
+def get_exam_stats(exam_id, bin_width=10):
+    """由计数器组装考试统计数据"""
+    counters = dict(
+        db.session.query(ExamStatCounter.metric, ExamStatCounter.value).filter(
+            ExamStatCounter.exam_id == exam_id
+        ).all()
+    )
+
+    applications = {}
+    bins = {}
+    certificate_status = {}
+    certificate_type = {}
+    for metric, value in counters.items():
+        parts = metric.split(':')
+        if parts[0] == 'application':
+            applications[parts[1]] = int(value)
+        elif metric.startswith('score:bin:'):
+            if value:
+                bins[int(parts[2])] = int(value)
+        elif metric.startswith('certificate:status:'):
+            certificate_status[parts[2]] = int(value)
+        elif metric.startswith('certificate:type:'):
+            certificate_type[parts[2]] = int(value)
+
+    count = int(counters.get('score:count', 0))
+    rows = int(counters.get('score:rows', 0))
+    passed = int(counters.get('score:passed', 0))
+    mean = counters.get('score:sum', 0) / count if count else None
+    variance = counters.get('score:sum_sq', 0) / count - mean * mean if count else None
+
+    histogram = {}
+    for bin_value, bin_count in bins.items():
+        lower = bin_value // bin_width * bin_width
+        histogram[lower] = histogram.get(lower, 0) + bin_count
+
+    return {
+        'exam_id': exam_id,
+        'applications': {
+            'total': sum(applications.values()),
+            'by_status': applications
+        },
+        'scores': {
+            'count': rows,
+            'passed': passed,
+            'pass_rate': round(passed / rows, 4) if rows else None,
+            'mean': round(mean, 2) if mean is not None else None,
+            'median': _median_from_bins(bins, count),
+            'std': round(max(variance, 0) ** 0.5, 2) if variance is not None else None,
+            'histogram': [
+                {'min': lower, 'max': lower + bin_width, 'count': histogram[lower]}
+                for lower in sorted(histogram)
+            ]
+        },
+        'certificates': {
+            'total': sum(certificate_status.values()),
+            'by_status': certificate_status,
+            'by_type': certificate_type
+        },
+        'generated_at': datetime.utcnow().isoformat()
+    }
+
+def _median_from_bins(bins, count):
+    """按单位宽度的分数桶估算中位数（桶内线性插值，误差小于1分）"""
+    if not count:
+        return None
+
+    target = count / 2
+    cumulative = 0
+    for bin_value in sorted(bins):
+        bin_count = bins[bin_value]
+        if cumulative + bin_count >= target:
+            return round(bin_value + (target - cumulative) / bin_count, 2)
+        cumulative += bin_count
+    return None
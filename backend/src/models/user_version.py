@@ -0,0 +1,144 @@
+from sqlalchemy import event, select, union
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from src.models.user import db, User
+from src.models.exam import Exam, Application, Score, Certificate as ExamCertificate
+from src.models.archive import ApplicationArchive, ScoreArchive
+from src.models.certificate import Certificate
+
+BUMP_CHUNK = 1000
+
+class UserDataVersion(db.Model):
+    """用户个人数据版本号
+
+    用户的报名、成绩、证书或个人信息有任何写入时递增，个人数据接口据此生成 ETag，
+    版本未变时只需一次主键查询即可返回 304。
+    通过 ORM 的写入由会话事件自动递增，集合式 UPDATE 需要手动调用 bump_user_versions。
+    """
+    __tablename__ = 'user_data_version'
+
+    user_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<UserDataVersion {self.user_id} {self.version}>'
+
+class UserExam(db.Model):
+    """用户涉及的考试
+
+    用户在某个考试下有报名、成绩或证书时记录一行，个人数据接口按用户取出这些考试的版本计数器计算 ETag，
+    不必每次合并六张表。新增记录时由会话事件写入，只增不减：记录删除后残留的考试只会让 ETag 多变化几次。
+    """
+    __tablename__ = 'user_exam'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    exam_id = db.Column(db.Integer, db.ForeignKey('exam.id', ondelete='CASCADE'), primary_key=True, index=True)
+
+    def __repr__(self):
+        return f'<UserExam {self.user_id} {self.exam_id}>'
+
+def _owner_id(obj):
+    if isinstance(obj, User):
+        return obj.id
+    # 证书存在两套模型，按类名识别
+    if isinstance(obj, (Application, Score)) or type(obj).__name__ == 'Certificate':
+        return obj.user_id
+    return None
+
+@event.listens_for(Session, 'before_flush')
+def _collect_user_versions(session, flush_context, instances):
+    changed = list(session.new) + list(session.deleted)
+    changed += [obj for obj in session.dirty if session.is_modified(obj)]
+    session.info['user_version_bumps'] = {
+        user_id for user_id in map(_owner_id, changed) if user_id is not None
+    }
+    session.info['user_exam_links'] = {
+        (obj.user_id, obj.exam_id) for obj in session.new
+        if not isinstance(obj, User) and _owner_id(obj) is not None
+    }
+
+@event.listens_for(Session, 'after_flush')
+def _apply_user_versions(session, flush_context):
+    user_ids = session.info.pop('user_version_bumps', None)
+    if user_ids:
+        bump_user_versions(session.connection(), user_ids)
+    links = session.info.pop('user_exam_links', None)
+    if links:
+        link_user_exams(session.connection(), links)
+
+def bump_user_versions(connection, user_ids):
+    """把一批用户的版本号加一"""
+    rows = [{'user_id': user_id, 'version': 1} for user_id in set(user_ids) if user_id is not None]
+    if not rows:
+        return
+
+    table = UserDataVersion.__table__
+    dialect = connection.dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        # 分批执行，避免超出单条语句的参数个数限制
+        for start in range(0, len(rows), BUMP_CHUNK):
+            stmt = insert(table).values(rows[start:start + BUMP_CHUNK])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.user_id],
+                set_={'version': table.c.version + 1}
+            )
+            connection.execute(stmt)
+        return
+
+    for row in rows:
+        result = connection.execute(
+            table.update().where(table.c.user_id == row['user_id']).values(version=table.c.version + 1)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+def link_user_exams(connection, pairs):
+    """记录 (user_id, exam_id)，已存在的跳过"""
+    rows = [
+        {'user_id': user_id, 'exam_id': exam_id}
+        for user_id, exam_id in set(pairs) if user_id is not None and exam_id is not None
+    ]
+    if not rows:
+        return
+
+    table = UserExam.__table__
+    dialect = connection.dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        for start in range(0, len(rows), BUMP_CHUNK):
+            connection.execute(insert(table).values(rows[start:start + BUMP_CHUNK]).on_conflict_do_nothing())
+        return
+
+    for row in rows:
+        exists = connection.execute(
+            select(table.c.user_id).where(table.c.user_id == row['user_id'], table.c.exam_id == row['exam_id'])
+        ).first()
+        if exists is None:
+            connection.execute(table.insert().values(**row))
+
+def backfill_user_exams():
+    """user_exam 表为空时（例如从没有该表的版本升级）按现有的报名、成绩和证书补齐，返回写入的行数"""
+    if db.session.query(UserExam.user_id).first() is not None:
+        return 0
+    pairs = union(*[
+        select(model.user_id, model.exam_id)
+        for model in (Application, ApplicationArchive, Score, ScoreArchive, ExamCertificate, Certificate)
+    ]).subquery()
+    # 归档表没有外键，跳过用户或考试已不存在的记录
+    rows = db.session.execute(
+        select(pairs.c.user_id, pairs.c.exam_id)
+        .join(User, User.id == pairs.c.user_id)
+        .join(Exam, Exam.id == pairs.c.exam_id)
+    ).all()
+    for start in range(0, len(rows), BUMP_CHUNK):
+        link_user_exams(db.session.connection(), [tuple(row) for row in rows[start:start + BUMP_CHUNK]])
+        db.session.commit()
+    return len(rows)
+
+def get_user_version(user_id):
+    return db.session.execute(
+        select(UserDataVersion.version).where(UserDataVersion.user_id == user_id)
+    ).scalar() or 0
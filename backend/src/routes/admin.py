@@ -0,0 +1,200 @@
+from flask import Blueprint, jsonify, request, current_app, send_from_directory
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from werkzeug.utils import secure_filename
+from src.models.user import User
+from src.utils.profiler import list_profiles
+from src.utils.slow_query import get_slow_queries, clear_slow_queries
+from src.utils.notifications import notification_stats
+from src.utils.audit import flush_audit_log
+from src.utils.single_flight import single_flight_stats
+from src.models.audit import AuditLog
+from src.models.deletion_job import DeletionJob
+from datetime import datetime
+import os
+
+admin_bp = Blueprint('admin', __name__)
+
+def admin_required():
+    """检查是否为管理员"""
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    return user and user.role == 'admin'
+
+@admin_bp.route('/profiles', methods=['GET'])
+@jwt_required()
+def get_profiles():
+    """获取最近的请求性能分析记录（仅管理员）"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        limit = request.args.get('limit', 50, type=int)
+        profiles = list_profiles(current_app.config['PROFILE_DIR'], limit=limit)
+        
+        return jsonify({'profiles': profiles}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/profiles/<name>', methods=['GET'])
+@jwt_required()
+def download_profile(name):
+    """下载 pstats 格式的性能分析文件（仅管理员）"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        filename = secure_filename(f'{name}.prof')
+        profile_dir = current_app.config['PROFILE_DIR']
+        
+        if not os.path.exists(os.path.join(profile_dir, filename)):
+            return jsonify({'error': '分析记录不存在'}), 404
+        
+        return send_from_directory(profile_dir, filename, as_attachment=True)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/slow-queries', methods=['GET'])
+@jwt_required()
+def get_slow_query_log():
+    """获取最近的慢查询记录（仅管理员）"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        limit = request.args.get('limit', 100, type=int)
+        
+        return jsonify({
+            'threshold_ms': current_app.config['SLOW_QUERY_THRESHOLD_MS'],
+            'queries': get_slow_queries(limit=limit)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/slow-queries', methods=['DELETE'])
+@jwt_required()
+def delete_slow_query_log():
+    """清空慢查询记录（仅管理员）"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        clear_slow_queries()
+        
+        return jsonify({'message': '慢查询记录已清空'}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/notifications', methods=['GET'])
+@jwt_required()
+def get_notification_stats():
+    """获取考生通知发件箱的积压和发送情况（仅管理员）"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        return jsonify(notification_stats()), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/audit-logs', methods=['GET'])
+@jwt_required()
+def get_audit_logs():
+    """查询管理员操作审计日志（仅管理员），按时间倒序"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 50, type=int), 500)
+        
+        # 先写入缓冲区中的记录，保证刚发生的操作可以查到
+        flush_audit_log()
+        
+        query = AuditLog.query
+        for field in ('actor_id', 'target_id'):
+            value = request.args.get(field, type=int)
+            if value is not None:
+                query = query.filter(getattr(AuditLog, field) == value)
+        for field in ('action', 'target_type'):
+            value = request.args.get(field)
+            if value:
+                query = query.filter(getattr(AuditLog, field) == value)
+        for field, op in (('since', '__ge__'), ('until', '__lt__')):
+            value = request.args.get(field)
+            if value:
+                try:
+                    moment = datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+                except ValueError:
+                    return jsonify({'error': f'{field} 日期格式不正确'}), 400
+                query = query.filter(getattr(AuditLog.created_at, op)(moment))
+        
+        logs = query.order_by(AuditLog.id.desc()).paginate(
+            page=page,
+            per_page=per_page,
+            error_out=False
+        )
+        
+        return jsonify({
+            'logs': [log.to_dict() for log in logs.items],
+            'total': logs.total,
+            'pages': logs.pages,
+            'current_page': page
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/deletion-jobs', methods=['GET'])
+@jwt_required()
+def get_deletion_jobs():
+    """获取最近的后台删除任务（仅管理员）"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        query = DeletionJob.query
+        status = request.args.get('status')
+        if status:
+            query = query.filter_by(status=status)
+        jobs = query.order_by(DeletionJob.id.desc()).limit(limit).all()
+        
+        return jsonify({'jobs': [job.to_dict() for job in jobs]}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/deletion-jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_deletion_job(job_id):
+    """获取后台删除任务的进度（仅管理员）"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        job = DeletionJob.query.get(job_id)
+        if not job:
+            return jsonify({'error': '删除任务不存在'}), 404
+        
+        return jsonify(job.to_dict()), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/single-flight', methods=['GET'])
+@jwt_required()
+def get_single_flight_stats():
+    """热点只读接口的请求合并统计（仅管理员）"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        return jsonify(single_flight_stats()), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -3,11 +3,32 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from src.models.user import User, db
 from src.models.exam import Exam, Application, FormConfig
+from src.utils.conditional import conditional_on_user_version
+from src.utils.archive import user_rows, find_application
+from src.utils.write_coordinator import run_write
+from src.utils.idempotency import idempotent
+from src.utils.single_flight import single_flight
+from src.utils.static_publisher import publish_exam
 
 application_bp = Blueprint('application', __name__)
 
+# 考试未单独配置表单时使用的默认报名表单
+DEFAULT_FORM_CONFIG = {
+    'fields': [
+        {'name': 'name', 'label': '姓名', 'type': 'text', 'required': True},
+        {'name': 'gender', 'label': '性别', 'type': 'select', 'required': True, 'options': ['男', '女']},
+        {'name': 'phone', 'label': '联系电话', 'type': 'text', 'required': True},
+        {'name': 'email', 'label': '电子邮箱', 'type': 'email', 'required': True},
+        {'name': 'id_type', 'label': '身份证件类型', 'type': 'select', 'required': True, 'options': ['身份证', '护照', '其他']},
+        {'name': 'id_number', 'label': '身份证件号码', 'type': 'text', 'required': True},
+        {'name': 'address', 'label': '联系地址', 'type': 'text', 'required': False},
+        {'name': 'remarks', 'label': '备注', 'type': 'textarea', 'required': False}
+    ]
+}
+
 @application_bp.route('/applications', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_application():
     """创建报名申请"""
     try:
@@ -17,16 +38,7 @@ def create_application():
         if not data.get('exam_id'):
             return jsonify({'error': '考试ID为必填项'}), 400
         
-        exam = Exam.query.get_or_404(data['exam_id'])
-        
-        # 检查是否已经报名
-        existing_application = Application.query.filter_by(
-            user_id=current_user_id,
-            exam_id=exam.id
-        ).first()
-        
-        if existing_application:
-            return jsonify({'error': '您已经报名过此考试'}), 400
+        exam = Exam.get_visible_or_404(data['exam_id'])
         
         # 检查报名时间
         now = datetime.utcnow()
@@ -35,25 +47,44 @@ def create_application():
         if now > exam.registration_end:
             return jsonify({'error': '报名已结束'}), 400
         
-        # 检查报名人数限制
-        if exam.max_applicants > 0:
-            current_count = Application.query.filter_by(exam_id=exam.id).count()
-            if current_count >= exam.max_applicants:
-                return jsonify({'error': '报名人数已满'}), 400
+        exam_id = exam.id
+        max_applicants = exam.max_applicants
+        application_data = data.get('application_data', {})
+        
+        def insert_application():
+            # 开启分组提交时在写入线程中执行，查重和名额检查与写入在同一事务中
+            existing_application = Application.query.filter_by(
+                user_id=current_user_id,
+                exam_id=exam_id
+            ).first()
+            if existing_application:
+                raise ValueError('您已经报名过此考试')
+            
+            if max_applicants > 0:
+                current_count = Application.query.filter_by(exam_id=exam_id).count()
+                if current_count >= max_applicants:
+                    raise ValueError('报名人数已满')
+            
+            application = Application(
+                user_id=current_user_id,
+                exam_id=exam_id,
+                application_data=application_data
+            )
+            db.session.add(application)
+            db.session.flush()
+            return application
         
-        # 创建报名申请
-        application = Application(
-            user_id=current_user_id,
-            exam_id=exam.id,
-            application_data=data.get('application_data', {})
-        )
+        try:
+            application_id = run_write(insert_application, lambda application: application.id)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        db.session.add(application)
-        db.session.commit()
+        # 在请求线程中序列化，Exam.to_dict 统计报名人数的查询不占用写入线程
+        application = db.session.get(Application, application_id).to_dict()
         
         return jsonify({
             'message': '报名申请提交成功',
-            'application': application.to_dict()
+            'application': application
         }), 201
         
     except Exception as e:
@@ -62,12 +93,13 @@ def create_application():
 
 @application_bp.route('/applications', methods=['GET'])
 @jwt_required()
+@conditional_on_user_version()
 def get_my_applications():
     """获取我的报名申请列表"""
     try:
         current_user_id = get_jwt_identity()
         
-        applications = Application.query.filter_by(user_id=current_user_id).all()
+        applications = user_rows(Application, current_user_id)
         
         return jsonify([app.to_dict() for app in applications]), 200
         
@@ -82,7 +114,9 @@ def get_application(application_id):
         current_user_id = get_jwt_identity()
         user = User.query.get(current_user_id)
         
-        application = Application.query.get_or_404(application_id)
+        application = find_application(application_id)
+        if not application:
+            return jsonify({'error': '报名申请不存在'}), 404
         
         # 检查权限：只有申请者本人或管理员可以查看
         if application.user_id != current_user_id and user.role != 'admin':
@@ -151,29 +185,18 @@ def delete_application(application_id):
         return jsonify({'error': str(e)}), 500
 
 @application_bp.route('/exams/<int:exam_id>/form-config', methods=['GET'])
+@single_flight
 def get_form_config(exam_id):
     """获取考试的表单配置"""
     try:
-        exam = Exam.query.get_or_404(exam_id)
+        exam = Exam.get_visible_or_404(exam_id)
         form_config = FormConfig.query.filter_by(exam_id=exam_id).first()
         
         if not form_config:
             # 返回默认表单配置
-            default_config = {
-                'fields': [
-                    {'name': 'name', 'label': '姓名', 'type': 'text', 'required': True},
-                    {'name': 'gender', 'label': '性别', 'type': 'select', 'required': True, 'options': ['男', '女']},
-                    {'name': 'phone', 'label': '联系电话', 'type': 'text', 'required': True},
-                    {'name': 'email', 'label': '电子邮箱', 'type': 'email', 'required': True},
-                    {'name': 'id_type', 'label': '身份证件类型', 'type': 'select', 'required': True, 'options': ['身份证', '护照', '其他']},
-                    {'name': 'id_number', 'label': '身份证件号码', 'type': 'text', 'required': True},
-                    {'name': 'address', 'label': '联系地址', 'type': 'text', 'required': False},
-                    {'name': 'remarks', 'label': '备注', 'type': 'textarea', 'required': False}
-                ]
-            }
             return jsonify({
                 'exam_id': exam_id,
-                'config_json': default_config
+                'config_json': DEFAULT_FORM_CONFIG
             }), 200
         
         return jsonify(form_config.to_dict()), 200
@@ -192,7 +215,7 @@ def create_form_config(exam_id):
         if user.role != 'admin':
             return jsonify({'error': '权限不足'}), 403
         
-        exam = Exam.query.get_or_404(exam_id)
+        exam = Exam.get_visible_or_404(exam_id)
         data = request.json
         
         form_config = FormConfig.query.filter_by(exam_id=exam_id).first()
@@ -209,6 +232,7 @@ def create_form_config(exam_id):
             db.session.add(form_config)
         
         db.session.commit()
+        publish_exam(exam)
         
         return jsonify({
             'message': '表单配置保存成功',
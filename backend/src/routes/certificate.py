@@ -4,16 +4,38 @@ from datetime import datetime, timedelta
 from src.models.user import db, User
 from src.models.exam import Exam
 from src.models.certificate import Certificate, CertificateTemplate, CertificateRenewalApplication
-from src.models.application import Application
+from src.models.exam import Application
+from src.utils.certificate_verify import verify_certificate, note_certificates_issued, invalidate_certificates
+from src.utils.expiry_sweeper import sweep_expired_certificates, expiring_certificates_query
+from src.utils.conditional import conditional_on_user_version
+from src.utils.events import publish
+from src.utils.notifications import queue_notification
+from src.utils import audit
 import os
 import uuid
 from werkzeug.utils import secure_filename
 
 certificate_bp = Blueprint('certificate', __name__)
 
+def filter_by_status(query, status):
+    """按状态筛选证书，已到期但尚未被过期扫描处理的证书按 expired 计"""
+    now = datetime.utcnow()
+    if status == 'active':
+        return query.filter(
+            Certificate.status == 'active',
+            db.or_(Certificate.expiry_date.is_(None), Certificate.expiry_date > now)
+        )
+    if status == 'expired':
+        return query.filter(db.or_(
+            Certificate.status == 'expired',
+            db.and_(Certificate.status == 'active', Certificate.expiry_date <= now)
+        ))
+    return query.filter_by(status=status)
+
 # 获取我的证书列表
 @certificate_bp.route('/my-certificates', methods=['GET'])
 @jwt_required()
+@conditional_on_user_version()
 def get_my_certificates():
     try:
         current_user_id = get_jwt_identity()
@@ -24,7 +46,7 @@ def get_my_certificates():
         query = Certificate.query.filter_by(user_id=current_user_id)
         
         if status:
-            query = query.filter_by(status=status)
+            query = filter_by_status(query, status)
         
         certificates = query.order_by(Certificate.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
@@ -58,7 +80,7 @@ def get_exam_certificates(exam_id):
         query = Certificate.query.filter_by(exam_id=exam_id)
         
         if status:
-            query = query.filter_by(status=status)
+            query = filter_by_status(query, status)
         
         if certificate_type:
             query = query.filter_by(certificate_type=certificate_type)
@@ -76,6 +98,83 @@ def get_exam_certificates(exam_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# 公开验证证书（无需登录）
+@certificate_bp.route('/verify/<certificate_number>', methods=['GET'])
+def verify_certificate_by_number(certificate_number):
+    try:
+        result = verify_certificate(certificate_number)
+        
+        if result is None:
+            return jsonify({
+                'certificate_number': certificate_number,
+                'valid': False,
+                'error': '证书不存在'
+            }), 404
+        
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# 即将到期的证书（管理员），用于发送换证提醒
+@certificate_bp.route('/expiring', methods=['GET'])
+@jwt_required()
+def get_expiring_certificates():
+    try:
+        current_user_id = get_jwt_identity()
+        user = User.query.get(current_user_id)
+        
+        if user.role != 'admin':
+            return jsonify({'error': '权限不足'}), 403
+        
+        days = request.args.get('days', 30, type=int)
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 100, type=int)
+        exam_id = request.args.get('exam_id', type=int)
+        
+        query = expiring_certificates_query(days)
+        if exam_id:
+            query = query.filter(Certificate.exam_id == exam_id)
+        
+        certificates = query.paginate(page=page, per_page=per_page, error_out=False)
+        
+        return jsonify({
+            'certificates': [{
+                'id': cert.id,
+                'certificate_number': cert.certificate_number,
+                'user_id': cert.user_id,
+                'exam_id': cert.exam_id,
+                'certificate_type': cert.certificate_type,
+                'expiry_date': cert.expiry_date.isoformat()
+            } for cert in certificates.items],
+            'days': days,
+            'total': certificates.total,
+            'pages': certificates.pages,
+            'current_page': page
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# 立即执行一次证书过期扫描（管理员）
+@certificate_bp.route('/expiry-sweep', methods=['POST'])
+@jwt_required()
+def run_expiry_sweep():
+    try:
+        current_user_id = get_jwt_identity()
+        user = User.query.get(current_user_id)
+        
+        if user.role != 'admin':
+            return jsonify({'error': '权限不足'}), 403
+        
+        expired_count = sweep_expired_certificates()
+        
+        return jsonify({
+            'message': f'已将 {expired_count} 张证书标记为过期',
+            'expired_count': expired_count
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 # 生成证书
 @certificate_bp.route('/generate', methods=['POST'])
 @jwt_required()
@@ -359,7 +458,25 @@ def review_renewal_application(application_id):
         elif action == 'reject':
             application.status = 'rejected'
         
+        if application.status == 'completed':
+            queue_notification(application.user_id, 'renewal_completed', {
+                'exam_id': new_certificate.exam_id, 'certificate_number': new_certificate.certificate_number
+            })
+        elif application.status == 'rejected':
+            queue_notification(application.user_id, 'renewal_rejected', {'comment': comment})
+        
         db.session.commit()
+        audit.record('renewal.review', 'renewal_application', application.id, {
+            'action': action,
+            'status': ['pending', application.status],
+            'comment': comment,
+            'new_certificate_id': application.new_certificate_id
+        })
+        
+        if application.status == 'completed':
+            note_certificates_issued([new_certificate.certificate_number])
+            invalidate_certificates([original_cert.certificate_number])
+        publish(application.user_id, 'renewal', {'id': application.id, 'status': application.status})
         
         return jsonify({
             'message': '审核完成',
@@ -1,8 +1,21 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
+from sqlalchemy import and_, func, select, update
 from src.models.user import User, db
 from src.models.exam import Exam, Application, Score, Certificate, FormConfig
+from src.models.stats import get_exam_stats, rebuild_exam_stats, apply_counter_deltas
+from src.models.user_version import bump_user_versions
+from src.routes.application import DEFAULT_FORM_CONFIG
+from src.utils.export import STREAMERS, CONTENT_TYPES
+from src.utils.search import search_applications
+from src.utils.events import publish, publish_many
+from src.utils.notifications import queue_notification, queue_notifications
+from src.utils import audit
+from src.utils.archive import application_model, score_model, archive_exam, restore_exam
+from src.utils.deletion import request_deletion, wake_deleter
+from src.utils.single_flight import single_flight
+from src.utils.static_publisher import publish_exam, unpublish_exam
 
 exam_bp = Blueprint('exam', __name__)
 
@@ -20,7 +33,8 @@ def get_exams():
         per_page = request.args.get('per_page', 10, type=int)
         status = request.args.get('status')
         
-        query = Exam.query
+        # 按 id 排序，与静态快照的分页一致
+        query = Exam.visible().order_by(Exam.id)
         
         if status:
             query = query.filter_by(status=status)
@@ -42,10 +56,11 @@ def get_exams():
         return jsonify({'error': str(e)}), 500
 
 @exam_bp.route('/exams/<int:exam_id>', methods=['GET'])
+@single_flight
 def get_exam(exam_id):
     """获取考试详情"""
     try:
-        exam = Exam.query.get_or_404(exam_id)
+        exam = Exam.get_visible_or_404(exam_id)
         return jsonify(exam.to_dict()), 200
         
     except Exception as e:
@@ -61,6 +76,9 @@ def create_exam():
         
         data = request.json
         
+        if data.get('status') == 'deleting':
+            return jsonify({'error': '不能把考试状态设置为 deleting'}), 400
+        
         # 验证必填字段
         required_fields = ['name', 'start_time', 'end_time', 'registration_start', 'registration_end']
         for field in required_fields:
@@ -91,6 +109,7 @@ def create_exam():
         
         db.session.add(exam)
         db.session.commit()
+        publish_exam(exam)
         
         return jsonify({
             'message': '考试创建成功',
@@ -109,9 +128,12 @@ def update_exam(exam_id):
         if not admin_required():
             return jsonify({'error': '权限不足'}), 403
         
-        exam = Exam.query.get_or_404(exam_id)
+        exam = Exam.get_visible_or_404(exam_id)
         data = request.json
         
+        if data.get('status') == 'deleting':
+            return jsonify({'error': '不能把考试状态设置为 deleting'}), 400
+        
         # 更新字段
         if 'name' in data:
             exam.name = data['name']
@@ -141,6 +163,7 @@ def update_exam(exam_id):
             exam.contact_email = data['contact_email']
         
         db.session.commit()
+        publish_exam(exam)
         
         return jsonify({
             'message': '考试信息更新成功',
@@ -154,16 +177,111 @@ def update_exam(exam_id):
 @exam_bp.route('/exams/<int:exam_id>', methods=['DELETE'])
 @jwt_required()
 def delete_exam(exam_id):
-    """删除考试（仅管理员）"""
+    """删除考试（仅管理员），报名、成绩等子记录由后台任务分批删除"""
     try:
         if not admin_required():
             return jsonify({'error': '权限不足'}), 403
         
         exam = Exam.query.get_or_404(exam_id)
-        db.session.delete(exam)
+        deleted = {'name': exam.name, 'exam_type': exam.exam_type, 'start_time': exam.start_time}
+        exam.status = 'deleting'
+        job = request_deletion('exam', exam.id, get_jwt_identity())
         db.session.commit()
+        wake_deleter()
+        unpublish_exam(exam_id)
+        audit.record('exam.delete', 'exam', exam_id, dict(deleted, job_id=job.id))
+        
+        return jsonify({
+            'message': '考试删除任务已创建',
+            'job': job.to_dict()
+        }), 202, {'Location': f'/api/admin/deletion-jobs/{job.id}'}
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@exam_bp.route('/exams/<int:exam_id>/archive', methods=['POST'])
+@jwt_required()
+def archive_exam_data(exam_id):
+    """把已关闭考试的报名和成绩迁入归档表（仅管理员）"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        exam = Exam.get_visible_or_404(exam_id)
+        try:
+            moved = archive_exam(exam)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        publish_exam(exam)
+        audit.record('exam.archive', 'exam', exam_id, moved)
+        
+        return jsonify({
+            'message': '考试已归档',
+            'archived_at': exam.archived_at.isoformat(),
+            'moved': moved
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@exam_bp.route('/exams/<int:exam_id>/restore', methods=['POST'])
+@jwt_required()
+def restore_exam_data(exam_id):
+    """把归档考试的报名和成绩迁回（仅管理员）"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        exam = Exam.get_visible_or_404(exam_id)
+        try:
+            moved = restore_exam(exam)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        publish_exam(exam)
+        audit.record('exam.restore', 'exam', exam_id, moved)
+        
+        return jsonify({
+            'message': '考试已恢复',
+            'moved': moved
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@exam_bp.route('/exams/<int:exam_id>/stats', methods=['GET'])
+@jwt_required()
+def get_exam_statistics(exam_id):
+    """获取考试统计数据（仅管理员）"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        Exam.get_visible_or_404(exam_id)
+        bin_width = max(1, request.args.get('bin_width', 10, type=int))
+        
+        return jsonify(get_exam_stats(exam_id, bin_width=bin_width)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@exam_bp.route('/exams/<int:exam_id>/stats/rebuild', methods=['POST'])
+@jwt_required()
+def rebuild_exam_statistics(exam_id):
+    """按现有数据重算考试统计（仅管理员）"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        Exam.get_visible_or_404(exam_id)
+        rebuild_exam_stats(exam_id)
         
-        return jsonify({'message': '考试删除成功'}), 200
+        return jsonify({
+            'message': '考试统计已重算',
+            'stats': get_exam_stats(exam_id)
+        }), 200
         
     except Exception as e:
         db.session.rollback()
@@ -181,7 +299,7 @@ def get_exam_applications(exam_id):
         per_page = request.args.get('per_page', 10, type=int)
         status = request.args.get('status')
         
-        query = Application.query.filter_by(exam_id=exam_id)
+        query = application_model(exam_id).query.filter_by(exam_id=exam_id)
         
         if status:
             query = query.filter_by(status=status)
@@ -202,6 +320,102 @@ def get_exam_applications(exam_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@exam_bp.route('/exams/<int:exam_id>/applications/search', methods=['GET'])
+@jwt_required()
+def search_exam_applications(exam_id):
+    """按姓名、电话或证件号检索考试报名（仅管理员）"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        q = (request.args.get('q') or '').strip()
+        if not q:
+            return jsonify({'error': '请输入检索内容'}), 400
+        
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        
+        return jsonify({
+            'applications': search_applications(exam_id, q, limit, model=application_model(exam_id)),
+            'query': q
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@exam_bp.route('/exams/<int:exam_id>/applications/export', methods=['GET'])
+@jwt_required()
+def export_exam_applications(exam_id):
+    """流式导出考试报名、成绩和证书（仅管理员），支持 csv / ndjson / xlsx"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        export_format = request.args.get('format', 'csv')
+        if export_format not in STREAMERS:
+            return jsonify({'error': f'不支持的导出格式: {export_format}'}), 400
+        
+        exam = Exam.get_visible_or_404(exam_id)
+        status = request.args.get('status')
+        
+        # 报名表单字段展开为独立的列，表单之外的字段统一放入 extra_data
+        form_config = FormConfig.query.filter_by(exam_id=exam_id).first()
+        fields = ((form_config.config_json if form_config else None) or DEFAULT_FORM_CONFIG).get('fields', [])
+        field_names = [field['name'] for field in fields if field.get('name')]
+        
+        columns = [
+            'application_id', 'user_id', 'username', 'user_email', 'status',
+            'submitted_at', 'approved_at', 'rejected_reason'
+        ]
+        columns += [f'form_{name}' if name in columns else name for name in field_names]
+        columns += ['extra_data', 'score', 'is_passed', 'certificate_number', 'certificate_status']
+        
+        # 已归档的考试从归档表导出
+        ApplicationModel = application_model(exam_id)
+        ScoreModel = score_model(exam_id)
+        # 同一考生可能有多张证书（例如编号重新导入前后），只取每人最新的一张，避免报名行重复
+        latest_certificate = select(
+            Certificate.user_id, func.max(Certificate.id).label('certificate_id')
+        ).where(Certificate.exam_id == exam_id).group_by(Certificate.user_id).subquery()
+        query = select(
+            ApplicationModel.id, ApplicationModel.user_id, User.username, User.email, ApplicationModel.status,
+            ApplicationModel.submitted_at, ApplicationModel.approved_at, ApplicationModel.rejected_reason,
+            ApplicationModel.application_data, ScoreModel.score, ScoreModel.is_passed,
+            Certificate.certificate_number, Certificate.status
+        ).join(
+            User, User.id == ApplicationModel.user_id
+        ).outerjoin(
+            ScoreModel, and_(ScoreModel.user_id == ApplicationModel.user_id, ScoreModel.exam_id == ApplicationModel.exam_id)
+        ).outerjoin(
+            latest_certificate, latest_certificate.c.user_id == ApplicationModel.user_id
+        ).outerjoin(
+            Certificate, Certificate.id == latest_certificate.c.certificate_id
+        ).where(ApplicationModel.exam_id == exam_id)
+        
+        if status:
+            query = query.where(ApplicationModel.status == status)
+        
+        # 服务端游标 + yield_per，导出期间内存只保留一个批次
+        query = query.order_by(ApplicationModel.id).execution_options(stream_results=True, yield_per=1000)
+        
+        def rows():
+            for row in db.session.execute(query):
+                data = dict(row.application_data or {})
+                flattened = [data.pop(name, None) for name in field_names]
+                yield list(row[:8]) + flattened + [data or None] + list(row[9:])
+        
+        filename = f'exam_{exam.id}_applications.{export_format}'
+        return Response(
+            stream_with_context(STREAMERS[export_format](columns, rows())),
+            content_type=CONTENT_TYPES[export_format],
+            headers={
+                'Content-Disposition': f'attachment; filename={filename}',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @exam_bp.route('/applications/<int:application_id>/approve', methods=['POST'])
 @jwt_required()
 def approve_application(application_id):
@@ -211,10 +425,18 @@ def approve_application(application_id):
             return jsonify({'error': '权限不足'}), 403
         
         application = Application.query.get_or_404(application_id)
+        before = audit.snapshot(application, ('status',))
         application.status = 'approved'
         application.approved_at = datetime.utcnow()
+        queue_notification(application.user_id, 'application_approved', {
+            'exam_id': application.exam_id, 'application_id': application.id
+        })
         
         db.session.commit()
+        audit.record('application.approve', 'application', application.id, audit.changes(before, application))
+        publish(application.user_id, 'application', {
+            'id': application.id, 'exam_id': application.exam_id, 'status': application.status
+        })
         
         return jsonify({
             'message': '报名申请审核通过',
@@ -235,10 +457,18 @@ def reject_application(application_id):
         
         data = request.json
         application = Application.query.get_or_404(application_id)
+        before = audit.snapshot(application, ('status', 'rejected_reason'))
         application.status = 'rejected'
         application.rejected_reason = data.get('reason', '')
+        queue_notification(application.user_id, 'application_rejected', {
+            'exam_id': application.exam_id, 'application_id': application.id, 'reason': application.rejected_reason
+        })
         
         db.session.commit()
+        audit.record('application.reject', 'application', application.id, audit.changes(before, application))
+        publish(application.user_id, 'application', {
+            'id': application.id, 'exam_id': application.exam_id, 'status': application.status
+        })
         
         return jsonify({
             'message': '报名申请已拒绝',
@@ -249,3 +479,106 @@ def reject_application(application_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+# 批量审核单次最多指定的报名 ID 数，更多时请使用筛选条件
+BULK_REVIEW_MAX_IDS = 10000
+
+@exam_bp.route('/applications/bulk-review', methods=['POST'])
+@jwt_required()
+def bulk_review_applications():
+    """批量审核报名申请（仅管理员），按 ID 列表或筛选条件用一条 UPDATE 完成"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        data = request.get_json() or {}
+        action = data.get('action')
+        if action not in ('approve', 'reject'):
+            return jsonify({'error': 'action 必须为 approve 或 reject'}), 400
+        
+        new_status = 'approved' if action == 'approve' else 'rejected'
+        ids = data.get('ids')
+        filters = data.get('filter') or {}
+        # 只处理仍处于来源状态的报名，已被他人处理的会被跳过
+        from_status = filters.get('status', 'pending')
+        if from_status == new_status:
+            return jsonify({'error': '来源状态与目标状态相同'}), 400
+        
+        conditions = [Application.status == from_status]
+        if ids is not None:
+            if not isinstance(ids, list) or not ids:
+                return jsonify({'error': 'ids 必须为非空列表'}), 400
+            if not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+                return jsonify({'error': 'ids 必须为整数列表'}), 400
+            if len(ids) > BULK_REVIEW_MAX_IDS:
+                return jsonify({'error': f'单次最多指定 {BULK_REVIEW_MAX_IDS} 个报名，更多请使用筛选条件'}), 400
+            requested_count = len(set(ids))
+            conditions.append(Application.id.in_(ids))
+        else:
+            if not filters.get('exam_id'):
+                return jsonify({'error': '请指定 ids 或包含 exam_id 的筛选条件'}), 400
+            conditions.append(Application.exam_id == filters['exam_id'])
+            if filters.get('submitted_before'):
+                try:
+                    submitted_before = datetime.fromisoformat(str(filters['submitted_before']).replace('Z', '+00:00'))
+                except ValueError:
+                    return jsonify({'error': 'submitted_before 日期格式不正确'}), 400
+                conditions.append(Application.submitted_at < submitted_before.replace(tzinfo=None))
+        
+        now = datetime.utcnow()
+        values = {'status': new_status}
+        if action == 'approve':
+            values['approved_at'] = now
+        else:
+            values['rejected_reason'] = data.get('reason', '')
+        
+        updated = db.session.execute(
+            update(Application)
+            .where(*conditions)
+            .values(**values)
+            .returning(Application.id, Application.exam_id, Application.user_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        
+        by_exam = {}
+        for _, exam_id, _ in updated:
+            by_exam[exam_id] = by_exam.get(exam_id, 0) + 1
+        
+        deltas = {}
+        for exam_id, count in by_exam.items():
+            deltas[(exam_id, f'application:{from_status}')] = -count
+            deltas[(exam_id, f'application:{new_status}')] = count
+        apply_counter_deltas(db.session.connection(), deltas)
+        bump_user_versions(db.session.connection(), [user_id for _, _, user_id in updated])
+        queue_notifications([
+            (user_id, {'exam_id': exam_id, 'application_id': application_id, 'reason': values.get('rejected_reason')})
+            for application_id, exam_id, user_id in updated
+        ], f'application_{new_status}')
+        
+        db.session.commit()
+        audit.record(f'application.bulk_{action}', 'application', None, {
+            'status': [from_status, new_status],
+            'ids': ids,
+            'filter': filters if ids is None else None,
+            'updated_count': len(updated),
+            'reason': values.get('rejected_reason')
+        })
+        publish_many([
+            (user_id, {'id': application_id, 'exam_id': exam_id, 'status': new_status})
+            for application_id, exam_id, user_id in updated
+        ], 'application')
+        
+        result = {
+            'message': f'已{"通过" if action == "approve" else "拒绝"} {len(updated)} 个报名申请',
+            'updated_count': len(updated),
+            'by_exam': {str(exam_id): count for exam_id, count in by_exam.items()}
+        }
+        if ids is not None:
+            result['skipped_count'] = requested_count - len(updated)
+        if data.get('return_ids'):
+            result['ids'] = sorted(application_id for application_id, _, _ in updated)
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
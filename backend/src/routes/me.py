@@ -0,0 +1,104 @@
+from flask import Blueprint, jsonify, request, current_app, Response
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import func
+from src.models.user import User, db
+from src.models.exam import Exam, Application, Score
+from src.models.certificate import Certificate
+from src.models.stats import ExamStatCounter
+from src.models.user_version import get_user_version
+from src.utils.score_analytics import annotate_ranks
+from src.utils.conditional import conditional_on_user_version
+from src.utils.events import subscribe, event_stream
+from src.utils.archive import user_rows
+
+me_bp = Blueprint('me', __name__)
+
+# 事件流令牌的有效期（秒），只用于建立连接
+EVENTS_TOKEN_TTL = 60
+
+
+def _events_token_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='me-events')
+
+@me_bp.route('/summary', methods=['GET'])
+@jwt_required()
+@conditional_on_user_version()
+def get_my_summary():
+    """获取我的个人信息、报名、成绩和证书汇总"""
+    try:
+        current_user_id = get_jwt_identity()
+        user = User.query.get(current_user_id)
+        
+        if not user:
+            return jsonify({'error': '用户不存在'}), 404
+        
+        applications = user_rows(Application, user.id, order_by='submitted_at')
+        scores = user_rows(Score, user.id, order_by='imported_at')
+        certificates = Certificate.query.filter_by(user_id=user.id).order_by(
+            Certificate.created_at.desc()
+        ).all()
+        
+        # 涉及的考试去重后统一放在 exams 中，各条记录只通过 exam_id 引用
+        exam_ids = {item.exam_id for item in applications + scores + certificates}
+        exams = {}
+        if exam_ids:
+            # 报名人数取自统计计数器，避免为每个考试加载全部报名
+            application_counts = dict(
+                db.session.query(ExamStatCounter.exam_id, func.sum(ExamStatCounter.value)).filter(
+                    ExamStatCounter.exam_id.in_(exam_ids),
+                    ExamStatCounter.metric.like('application:%')
+                ).group_by(ExamStatCounter.exam_id).all()
+            )
+            for exam in Exam.query.filter(Exam.id.in_(exam_ids)).all():
+                exam_dict = exam.to_dict(include_application_count=False)
+                exam_dict['application_count'] = int(application_counts.get(exam.id) or 0)
+                exams[str(exam.id)] = exam_dict
+        
+        return jsonify({
+            'user': user.to_dict(),
+            'exams': exams,
+            'applications': [app.to_dict(include_related=False) for app in applications],
+            'scores': annotate_ranks([score.to_dict(include_related=False) for score in scores]),
+            'certificates': [cert.to_dict(include_related=False) for cert in certificates]
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@me_bp.route('/events/token', methods=['POST'])
+@jwt_required()
+def create_events_token():
+    """获取建立事件流连接用的短期令牌"""
+    token = _events_token_serializer().dumps(int(get_jwt_identity()))
+    return jsonify({'token': token, 'expires_in': EVENTS_TOKEN_TTL}), 200
+
+@me_bp.route('/events', methods=['GET'])
+def get_my_events():
+    """订阅我的报名、成绩、证书状态变化（Server-Sent Events）
+
+    浏览器 EventSource 无法设置请求头，先用 POST /events/token 换取短期令牌，再通过 ?token= 传递；
+    访问令牌不出现在 URL 中，不会被写入访问日志。
+    """
+    token = request.args.get('token')
+    if token:
+        try:
+            user_id = int(_events_token_serializer().loads(token, max_age=EVENTS_TOKEN_TTL))
+        except BadSignature:
+            return jsonify({'error': '令牌无效或已过期'}), 401
+    else:
+        verify_jwt_in_request()
+        user_id = int(get_jwt_identity())
+    
+    subscriber = subscribe(user_id, get_user_version(user_id))
+    # 流式响应期间不占用数据库连接
+    db.session.remove()
+    if subscriber is None:
+        response = jsonify({'error': '实时推送连接数已满，请稍后重试'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    
+    response = Response(event_stream(subscriber), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
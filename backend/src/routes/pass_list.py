@@ -0,0 +1,94 @@
+import re
+from flask import Blueprint, jsonify, request, current_app, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.models.user import User, db
+from src.models.exam import Exam
+from src.utils.pass_list import lookup_key, publish_pass_list, find_pass_list_entry, UNPUBLISHED_TTL
+
+pass_list_bp = Blueprint('pass_list', __name__)
+
+def admin_required():
+    """检查是否为管理员"""
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    return user and user.role == 'admin'
+
+@pass_list_bp.route('/exams/<int:exam_id>/pass-list/publish', methods=['POST'])
+@jwt_required()
+def publish_exam_pass_list(exam_id):
+    """发布成绩查询表（仅管理员），重复发布会覆盖上一次的结果"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        Exam.get_visible_or_404(exam_id)
+        published_count, skipped_count, published_at = publish_pass_list(exam_id)
+        
+        return jsonify({
+            'message': f'成功发布 {published_count} 条成绩查询记录',
+            'published_count': published_count,
+            'skipped_count': skipped_count,
+            'published_at': published_at.isoformat()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@pass_list_bp.route('/exams/<int:exam_id>/pass-list/lookup', methods=['POST'])
+def lookup_exam_pass_list(exam_id):
+    """按姓名和证件号换取查询地址（无需登录），重定向到可缓存的 GET 接口"""
+    try:
+        data = request.get_json(silent=True) or {}
+        key = lookup_key(data.get('name'), data.get('id_number'))
+        if key is None:
+            return jsonify({'error': '姓名和证件号不能为空'}), 400
+        
+        url = url_for('pass_list.get_pass_list_entry', exam_id=exam_id, key=key)
+        response = jsonify({'lookup_key': key, 'url': url})
+        response.headers['Location'] = url
+        response.headers['Cache-Control'] = 'no-store'
+        return response, 303
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@pass_list_bp.route('/exams/<int:exam_id>/pass-list/<key>', methods=['GET'])
+def get_pass_list_entry(exam_id, key):
+    """按查询键获取成绩及是否合格（无需登录）
+
+    查询键是姓名和证件号的 HMAC，不能反推出个人信息，响应允许 CDN 等共享缓存按地址缓存
+    ``PASS_LIST_CACHE_TTL`` 秒。
+    """
+    try:
+        if not re.fullmatch(r'[0-9a-f]{64}', key):
+            return jsonify({'error': '查询键无效'}), 400
+        
+        result = find_pass_list_entry(exam_id, key)
+        if result is None:
+            return jsonify({'error': '考试不存在'}), 404
+        
+        published_at, entry = result
+        if published_at is None:
+            response = jsonify({'error': '成绩尚未发布'})
+            response.headers['Cache-Control'] = f'public, max-age={UNPUBLISHED_TTL}'
+            return response, 404
+        
+        max_age = current_app.config['PASS_LIST_CACHE_TTL']
+        if entry is None:
+            response = jsonify({'error': '未查询到成绩，请核对姓名和证件号'})
+            response.headers['Cache-Control'] = f'public, max-age={max_age}'
+            return response, 404
+        
+        score, is_passed = entry
+        response = jsonify({
+            'exam_id': exam_id,
+            'score': score,
+            'is_passed': is_passed,
+            'published_at': published_at.isoformat()
+        })
+        response.headers['Cache-Control'] = f'public, max-age={max_age}'
+        return response, 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -3,6 +3,15 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from src.models.user import User, db
 from src.models.exam import Exam, Score, Certificate
+from src.utils.score_analytics import get_score_snapshot, annotate_ranks
+from src.utils.conditional import conditional_on_user_version
+from src.utils.events import publish_many
+from src.utils.notifications import queue_notifications
+from src.utils import pass_rules, audit
+from src.utils.archive import score_model, user_rows
+from src.utils.idempotency import idempotent
+from src.utils.certificate_verify import note_certificates_issued, invalidate_certificates
+from src.utils.pass_list import publish_pass_list
 import csv
 import io
 
@@ -16,6 +25,7 @@ def admin_required():
 
 @score_bp.route('/scores/import', methods=['POST'])
 @jwt_required()
+@idempotent
 def import_scores():
     """批量导入成绩（仅管理员）"""
     try:
@@ -29,10 +39,13 @@ def import_scores():
         if not exam_id:
             return jsonify({'error': '考试ID为必填项'}), 400
         
-        exam = Exam.query.get_or_404(exam_id)
+        exam = Exam.get_visible_or_404(exam_id)
+        if exam.archived_at:
+            return jsonify({'error': '考试已归档，请先恢复'}), 409
         
         imported_count = 0
         errors = []
+        imported_scores = []
         
         for score_data in scores_data:
             try:
@@ -57,25 +70,47 @@ def import_scores():
                 
                 if existing_score:
                     # 更新现有成绩
-                    existing_score.score = score_data.get('score')
-                    existing_score.is_passed = score_data.get('is_passed', False)
-                    existing_score.imported_at = datetime.utcnow()
+                    score = existing_score
+                    score.score = score_data.get('score')
+                    score.is_passed = score_data.get('is_passed', False)
+                    score.imported_at = datetime.utcnow()
+                    if 'section_scores' in score_data:
+                        score.section_scores = score_data['section_scores']
                 else:
                     # 创建新成绩
                     score = Score(
                         user_id=user.id,
                         exam_id=exam_id,
                         score=score_data.get('score'),
+                        section_scores=score_data.get('section_scores'),
                         is_passed=score_data.get('is_passed', False)
                     )
                     db.session.add(score)
                 
+                imported_scores.append(score)
                 imported_count += 1
                 
             except Exception as e:
                 errors.append(f"处理数据时出错: {score_data}, 错误: {str(e)}")
         
+        # 考试设置了合格规则时，由规则判定是否通过，忽略导入数据中的 is_passed
+        if exam.pass_rule:
+            if pass_rules.is_relative(exam.pass_rule):
+                pass_rules.apply_rule_to_exam(db.session, exam)
+            elif imported_scores:
+                passed = pass_rules.evaluate(
+                    exam.pass_rule,
+                    [score.score for score in imported_scores],
+                    [score.section_scores for score in imported_scores]
+                )
+                for score, is_passed in zip(imported_scores, passed):
+                    score.is_passed = bool(is_passed)
+        
+        user_ids = [score.user_id for score in imported_scores]
+        queue_notifications([(user_id, {'exam_id': exam.id}) for user_id in user_ids], 'score_published')
         db.session.commit()
+        publish_pass_list(exam.id)
+        publish_many([(user_id, {'exam_id': exam.id}) for user_id in user_ids], 'score')
         
         return jsonify({
             'message': f'成绩导入完成，成功导入 {imported_count} 条记录',
@@ -98,7 +133,7 @@ def get_exam_scores(exam_id):
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
         
-        scores = Score.query.filter_by(exam_id=exam_id).paginate(
+        scores = score_model(exam_id).query.filter_by(exam_id=exam_id).paginate(
             page=page, 
             per_page=per_page, 
             error_out=False
@@ -114,16 +149,85 @@ def get_exam_scores(exam_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@score_bp.route('/exams/<int:exam_id>/pass-rule', methods=['PUT'])
+@jwt_required()
+def update_pass_rule(exam_id):
+    """设置考试合格规则并重新判定全部成绩（仅管理员）"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        exam = Exam.get_visible_or_404(exam_id)
+        if exam.archived_at:
+            return jsonify({'error': '考试已归档，请先恢复'}), 409
+        data = request.json
+        rule = data.get('pass_rule')
+        
+        error = pass_rules.validate_rule(rule)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        exam.pass_rule = rule
+        
+        passed_count, failed_count = pass_rules.apply_rule_to_exam(db.session, exam)
+        db.session.commit()
+        
+        return jsonify({
+            'message': '合格规则已更新',
+            'pass_rule': rule,
+            'passed_count': passed_count,
+            'failed_count': failed_count
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@score_bp.route('/exams/<int:exam_id>/scores/distribution', methods=['GET'])
+@jwt_required()
+def get_score_distribution(exam_id):
+    """获取考试成绩分布及曲线调整预览（仅管理员）"""
+    try:
+        if not admin_required():
+            return jsonify({'error': '权限不足'}), 403
+        
+        Exam.get_visible_or_404(exam_id)
+        
+        bins = min(max(request.args.get('bins', 10, type=int), 1), 200)
+        pass_score = request.args.get('pass_score', type=float)
+        target_mean = request.args.get('target_mean', type=float)
+        target_std = request.args.get('target_std', type=float)
+        
+        snapshot = get_score_snapshot(exam_id)
+        result = {
+            'exam_id': exam_id,
+            'distribution': snapshot.distribution(bins=bins, pass_score=pass_score)
+        }
+        
+        if target_mean is not None:
+            result['curve_preview'] = snapshot.curve_preview(
+                target_mean,
+                target_std if target_std is not None else snapshot.std or 0,
+                bins=bins,
+                pass_score=pass_score
+            )
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @score_bp.route('/my-scores', methods=['GET'])
 @jwt_required()
+@conditional_on_user_version()
 def get_my_scores():
     """获取我的成绩"""
     try:
         current_user_id = get_jwt_identity()
         
-        scores = Score.query.filter_by(user_id=current_user_id).all()
+        scores = user_rows(Score, current_user_id)
         
-        return jsonify([score.to_dict() for score in scores]), 200
+        return jsonify(annotate_ranks([score.to_dict() for score in scores])), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -138,13 +242,25 @@ def update_score(score_id):
         
         score = Score.query.get_or_404(score_id)
         data = request.json
+        before = audit.snapshot(score, ('score', 'section_scores', 'is_passed'))
         
         if 'score' in data:
             score.score = data['score']
+        if 'section_scores' in data:
+            score.section_scores = data['section_scores']
         if 'is_passed' in data:
             score.is_passed = data['is_passed']
         
+        rule = score.exam.pass_rule
+        if rule:
+            if pass_rules.is_relative(rule):
+                pass_rules.apply_rule_to_exam(db.session, score.exam)
+            else:
+                score.is_passed = bool(pass_rules.evaluate(rule, [score.score], [score.section_scores])[0])
+        
+        diff = audit.changes(before, score)
         db.session.commit()
+        audit.record('score.update', 'score', score.id, diff)
         
         return jsonify({
             'message': '成绩更新成功',
@@ -175,6 +291,7 @@ def delete_score(score_id):
 
 @score_bp.route('/certificates/generate', methods=['POST'])
 @jwt_required()
+@idempotent
 def generate_certificates():
     """生成证书编号（仅管理员）"""
     try:
@@ -188,12 +305,13 @@ def generate_certificates():
         if not exam_id:
             return jsonify({'error': '考试ID为必填项'}), 400
         
-        exam = Exam.query.get_or_404(exam_id)
+        exam = Exam.get_visible_or_404(exam_id)
         
         # 获取通过考试的成绩
-        passed_scores = Score.query.filter_by(exam_id=exam_id, is_passed=True).all()
+        passed_scores = score_model(exam_id).query.filter_by(exam_id=exam_id, is_passed=True).all()
         
         generated_count = 0
+        issued = []
         
         for score in passed_scores:
             # 检查是否已有证书
@@ -223,9 +341,15 @@ def generate_certificates():
             )
             
             db.session.add(certificate)
+            issued.append((score.user_id, certificate_number))
             generated_count += 1
         
+        queue_notifications([
+            (user_id, {'exam_id': exam.id, 'certificate_number': number}) for user_id, number in issued
+        ], 'certificate_issued')
         db.session.commit()
+        note_certificates_issued([number for _, number in issued])
+        publish_many([(user_id, {'exam_id': exam.id}) for user_id, _ in issued], 'certificate')
         
         return jsonify({
             'message': f'证书生成完成，共生成 {generated_count} 个证书',
@@ -248,6 +372,7 @@ def import_certificates():
         certificates_data = data.get('certificates', [])
         
         updated_count = 0
+        updated = {}
         errors = []
         
         for cert_data in certificates_data:
@@ -264,6 +389,7 @@ def import_certificates():
                     errors.append(f"证书未找到: {certificate_id}")
                     continue
                 
+                updated[certificate.id] = [certificate.certificate_number, certificate_number]
                 certificate.certificate_number = certificate_number
                 certificate.status = 'issued'
                 updated_count += 1
@@ -272,6 +398,11 @@ def import_certificates():
                 errors.append(f"处理数据时出错: {cert_data}, 错误: {str(e)}")
         
         db.session.commit()
+        audit.record('certificate.import_numbers', 'certificate', None, {
+            'updated_count': updated_count, 'certificate_number': updated
+        })
+        invalidate_certificates([old for old, _ in updated.values() if old])
+        note_certificates_issued([new for _, new in updated.values()])
         
         return jsonify({
             'message': f'证书编号导入完成，成功更新 {updated_count} 个证书',
@@ -285,6 +416,7 @@ def import_certificates():
 
 @score_bp.route('/my-certificates', methods=['GET'])
 @jwt_required()
+@conditional_on_user_version()
 def get_my_certificates():
     """获取我的证书"""
     try:
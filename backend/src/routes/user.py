@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
 from src.models.user import User, db
+from src.utils.deletion import request_deletion, wake_deleter
 
 user_bp = Blueprint('user', __name__)
 
@@ -34,6 +35,8 @@ def update_user(user_id):
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
 def delete_user(user_id):
     user = User.query.get_or_404(user_id)
-    db.session.delete(user)
+    # 报名、成绩、证书等子记录由后台任务分批删除
+    job = request_deletion('user', user.id)
     db.session.commit()
-    return '', 204
+    wake_deleter()
+    return jsonify(job.to_dict()), 202, {'Location': f'/api/admin/deletion-jobs/{job.id}'}
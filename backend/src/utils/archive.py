@@ -0,0 +1,188 @@
+"""考试归档
+
+已关闭且证书已签发的考试，其报名和成绩不再变化，却仍留在每个热点查询都要扫描的
+application / score 表中。``archive_exam`` 在一个事务内用 INSERT ... SELECT 把整场考试的
+报名（含 application_data）和成绩迁入 application_archive / score_archive，再删除热表中的行，
+并设置 ``Exam.archived_at``；``restore_exam`` 原样迁回。两者都不经过 ORM，
+考试统计计数器保持不变。
+
+读取接口通过 ``application_model`` / ``score_model`` 按考试选择热表或归档表，
+按用户读取时用 ``user_rows`` 合并两张表，归档对接口调用方透明。
+
+``ARCHIVE_AFTER_DAYS`` 大于 0 时，后台线程每隔 ``ARCHIVE_INTERVAL`` 秒归档考试结束超过该天数的已关闭考试。
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, literal, select, union
+
+from src.models.user import db
+from src.models.exam import Exam, Application, Score, Certificate
+from src.models.archive import ApplicationArchive, ScoreArchive
+from src.models.user_version import bump_user_versions
+from src.utils.background import runs_background_jobs
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_MODELS = {
+    Application: ApplicationArchive,
+    Score: ScoreArchive
+}
+
+_thread = None
+
+
+def init_archiver(app):
+    """根据配置启动自动归档线程，需在 db.init_app(app) 之后调用"""
+    global _thread
+
+    app.config.setdefault('ARCHIVE_AFTER_DAYS', 0)
+    app.config.setdefault('ARCHIVE_INTERVAL', 86400)
+
+    after_days = app.config['ARCHIVE_AFTER_DAYS']
+    interval = app.config['ARCHIVE_INTERVAL']
+    if not after_days or not interval or _thread is not None or not runs_background_jobs():
+        return
+
+    def run():
+        while True:
+            try:
+                with app.app_context():
+                    archived = archive_closed_exams(after_days)
+                if archived:
+                    logger.info('已归档考试 %s', archived)
+            except Exception:
+                logger.exception('考试归档失败')
+            time.sleep(interval)
+
+    _thread = threading.Thread(target=run, name='exam-archiver', daemon=True)
+    _thread.start()
+
+
+def _is_archived(exam_id):
+    exam = db.session.get(Exam, exam_id)
+    return exam is not None and exam.archived_at is not None
+
+
+def application_model(exam_id):
+    """考试的报名所在的模型"""
+    return ApplicationArchive if _is_archived(exam_id) else Application
+
+
+def score_model(exam_id):
+    """考试的成绩所在的模型"""
+    return ScoreArchive if _is_archived(exam_id) else Score
+
+
+def find_application(application_id):
+    """按 id 查找报名，热表中没有时查归档表"""
+    return db.session.get(Application, application_id) or db.session.get(ApplicationArchive, application_id)
+
+
+def user_rows(model, user_id, order_by=None):
+    """读取用户在热表和归档表中的全部记录，order_by 为按时间倒序排列的列名"""
+    rows = []
+    for current in (model, ARCHIVE_MODELS[model]):
+        query = current.query.filter_by(user_id=user_id)
+        if order_by:
+            query = query.order_by(getattr(current, order_by).desc())
+        rows += query.all()
+    if order_by:
+        rows.sort(key=lambda row: getattr(row, order_by) or datetime.min, reverse=True)
+    return rows
+
+
+def _move(source, target, exam_id, extra=None):
+    """把考试的行从 source 表整体复制到 target 表并删除，返回行数
+
+    保留原 id。未使用 AUTOINCREMENT 建表的旧 SQLite 数据库可能已把归档行的 id 分配给新行，
+    与目标表冲突的行改用新的 id，避免恢复时违反主键约束。
+    """
+    source_table, target_table = source.__table__, target.__table__
+    columns = [column.name for column in source_table.columns if column.name in target_table.columns]
+    extra_columns = [
+        (name, literal(value, target_table.c[name].type)) for name, value in (extra or {}).items()
+    ]
+    in_exam = source_table.c.exam_id == exam_id
+    taken = source_table.c.id.in_(select(target_table.c.id))
+
+    connection = db.session.connection()
+    moved = connection.execute(select(func.count()).select_from(source_table).where(in_exam)).scalar()
+    conflicts = connection.execute(select(func.count()).select_from(source_table).where(in_exam, taken)).scalar()
+    batches = [(columns, ~taken)]
+    if conflicts:
+        batches.append(([name for name in columns if name != 'id'], taken))
+    for names, condition in batches:
+        selected = [source_table.c[name] for name in names] + [value for _, value in extra_columns]
+        connection.execute(
+            insert(target_table).from_select(
+                names + [name for name, _ in extra_columns], select(*selected).where(in_exam, condition)
+            )
+        )
+    connection.execute(delete(source_table).where(in_exam))
+    return moved
+
+
+def _user_ids(models, exam_id):
+    return db.session.execute(
+        union(*[select(model.user_id).where(model.exam_id == exam_id) for model in models])
+    ).scalars().all()
+
+
+def archive_exam(exam, now=None):
+    """归档考试的报名和成绩，返回迁移的行数"""
+    if exam.archived_at is not None:
+        raise ValueError('考试已归档')
+    if exam.status != 'closed':
+        raise ValueError('只能归档已关闭的考试')
+    if Certificate.query.filter_by(exam_id=exam.id, status='pending').first():
+        raise ValueError('考试仍有待签发的证书')
+
+    now = now or datetime.utcnow()
+    user_ids = _user_ids((Application, Score), exam.id)
+    moved = {
+        'applications': _move(Application, ApplicationArchive, exam.id, {'archived_at': now}),
+        'scores': _move(Score, ScoreArchive, exam.id, {'archived_at': now})
+    }
+    exam.archived_at = now
+    bump_user_versions(db.session.connection(), user_ids)
+    db.session.commit()
+    return moved
+
+
+def restore_exam(exam):
+    """把归档考试的报名和成绩迁回热表，返回迁移的行数"""
+    if exam.archived_at is None:
+        raise ValueError('考试未归档')
+
+    user_ids = _user_ids((ApplicationArchive, ScoreArchive), exam.id)
+    moved = {
+        'applications': _move(ApplicationArchive, Application, exam.id),
+        'scores': _move(ScoreArchive, Score, exam.id)
+    }
+    exam.archived_at = None
+    bump_user_versions(db.session.connection(), user_ids)
+    db.session.commit()
+    return moved
+
+
+def archive_closed_exams(after_days, now=None):
+    """归档考试结束超过 after_days 天的已关闭考试，返回归档的考试 id"""
+    now = now or datetime.utcnow()
+    exams = Exam.query.filter(
+        Exam.status == 'closed',
+        Exam.archived_at.is_(None),
+        Exam.end_time <= now - timedelta(days=after_days)
+    ).order_by(Exam.end_time).all()
+
+    archived = []
+    for exam in exams:
+        try:
+            archive_exam(exam)
+            archived.append(exam.id)
+        except ValueError as e:
+            db.session.rollback()
+            logger.info('考试 %s 暂不归档：%s', exam.id, e)
+    return archived
@@ -0,0 +1,155 @@
+"""管理员操作审计
+
+修改数据的接口在提交成功后调用 ``record``，记录只追加到内存缓冲区，由后台线程每隔
+``AUDIT_FLUSH_INTERVAL`` 秒（或缓冲达到 ``AUDIT_BATCH_SIZE`` 条时）用一条批量 INSERT 写入
+audit_log 表，使用独立连接，不参与请求的事务。缓冲区超过 ``AUDIT_BUFFER_SIZE`` 条时由请求线程
+同步写入，写入失败的记录放回缓冲区等待下次重试，进程退出前会写入剩余记录。
+
+配置 ``AUDIT_LOG_FILE`` 时，同一批记录还会以 JSON Lines 格式追加到该文件。
+"""
+import atexit
+import json
+import logging
+import threading
+from datetime import date, datetime
+
+from flask import current_app, has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import insert
+
+from src.models.user import db
+from src.models.audit import AuditLog
+
+logger = logging.getLogger(__name__)
+
+_settings = {
+    'batch_size': 500,
+    'buffer_size': 10000,
+    'log_file': None
+}
+_buffer = []
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_wakeup = threading.Event()
+_app = None
+_thread = None
+
+
+def init_audit_log(app):
+    """根据配置启动后台写入线程，需在 db.init_app(app) 之后调用"""
+    global _app, _thread
+
+    app.config.setdefault('AUDIT_FLUSH_INTERVAL', 1)
+    app.config.setdefault('AUDIT_BATCH_SIZE', 500)
+    app.config.setdefault('AUDIT_BUFFER_SIZE', 10000)
+    app.config.setdefault('AUDIT_LOG_FILE', None)
+
+    _settings['batch_size'] = app.config['AUDIT_BATCH_SIZE']
+    _settings['buffer_size'] = app.config['AUDIT_BUFFER_SIZE']
+    _settings['log_file'] = app.config['AUDIT_LOG_FILE']
+    _app = app
+
+    interval = app.config['AUDIT_FLUSH_INTERVAL']
+    if not interval or _thread is not None:
+        return
+
+    def run():
+        while True:
+            _wakeup.wait(interval)
+            _wakeup.clear()
+            try:
+                flush_audit_log()
+            except Exception:
+                logger.exception('审计日志写入失败')
+
+    _thread = threading.Thread(target=run, name='audit-log-flusher', daemon=True)
+    _thread.start()
+    atexit.register(flush_audit_log)
+
+
+def record(action, target_type, target_id=None, diff=None):
+    """记录一次管理员操作，应在事务提交成功后调用"""
+    actor_id = None
+    ip_address = None
+    if has_request_context():
+        ip_address = request.remote_addr
+        try:
+            identity = get_jwt_identity()
+            actor_id = int(identity) if identity is not None else None
+        except RuntimeError:
+            pass
+
+    entry = {
+        'actor_id': actor_id,
+        'action': action,
+        'target_type': target_type,
+        'target_id': target_id,
+        'diff': _jsonable(diff),
+        'ip_address': ip_address,
+        'created_at': datetime.utcnow()
+    }
+    with _lock:
+        _buffer.append(entry)
+        size = len(_buffer)
+
+    if _thread is None or size >= _settings['buffer_size']:
+        try:
+            flush_audit_log()
+        except Exception:
+            logger.exception('审计日志写入失败')
+    elif size >= _settings['batch_size']:
+        _wakeup.set()
+
+
+def flush_audit_log():
+    """立即写入缓冲区中的记录，返回写入的条数"""
+    with _flush_lock:
+        with _lock:
+            entries = _buffer[:]
+            _buffer.clear()
+        if not entries:
+            return 0
+
+        try:
+            # 未调用 init_audit_log 时（例如在脚本中）使用当前应用
+            with (_app or current_app._get_current_object()).app_context():
+                with db.engine.begin() as connection:
+                    connection.execute(insert(AuditLog), entries)
+        except Exception:
+            with _lock:
+                _buffer[:0] = entries
+            raise
+
+        if _settings['log_file']:
+            try:
+                with open(_settings['log_file'], 'a', encoding='utf-8') as f:
+                    for entry in entries:
+                        f.write(json.dumps(dict(entry, created_at=entry['created_at'].isoformat()),
+                                           ensure_ascii=False) + '\n')
+            except OSError:
+                logger.exception('审计日志文件写入失败')
+        return len(entries)
+
+
+def snapshot(obj, fields):
+    """修改前记录对象的字段值，配合 changes 生成 diff"""
+    return {field: getattr(obj, field) for field in fields}
+
+
+def changes(before, obj):
+    """返回 {字段: [修改前, 修改后]}，只包含发生变化的字段"""
+    return {
+        field: [old, getattr(obj, field)]
+        for field, old in before.items()
+        if getattr(obj, field) != old
+    }
+
+
+def _jsonable(value):
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
@@ -0,0 +1,57 @@
+"""只在一个进程中运行的后台任务
+
+gunicorn 的每个 worker 都会导入应用并启动后台线程。证书过期扫描、通知发送、自动归档、
+分批删除和静态快照发布处理的都是数据库中的共享数据，每个 worker 各运行一份只会重复扫描、
+争抢写锁（SQLite 上所有写入共用一把库级写锁）。配置 ``BACKGROUND_JOBS_LOCK`` 后，各进程启动时
+对该文件加非阻塞排他锁，只有拿到锁的进程运行这些任务；该进程退出时锁随之释放，
+gunicorn 重新拉起的 worker 会接手。未配置时（开发服务器等单进程部署）每个进程都运行。
+
+事件推送、审计日志和报名分组写入处理的是本进程内的数据，每个进程都需要运行，不受此限制。
+依赖 fcntl，Windows 上每个进程都运行。
+"""
+import logging
+import os
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_settings = {
+    'leader': True
+}
+# 持有锁的文件对象，进程存活期间保持打开
+_lock_file = None
+
+
+def init_background_jobs(app):
+    """确定本进程是否运行后台任务，需在启动各后台线程之前调用"""
+    global _lock_file
+
+    app.config.setdefault('BACKGROUND_JOBS_LOCK', None)
+
+    path = app.config['BACKGROUND_JOBS_LOCK']
+    if not path or _lock_file is not None:
+        return
+    if fcntl is None:
+        logger.warning('当前平台不支持 fcntl，每个进程都会运行后台任务')
+        return
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    lock_file = open(path, 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        _settings['leader'] = False
+        return
+    _lock_file = lock_file
+    _settings['leader'] = True
+    logger.info('进程 %s 负责运行后台任务', os.getpid())
+
+
+def runs_background_jobs():
+    """本进程是否负责运行共享数据的后台任务"""
+    return _settings['leader']
@@ -0,0 +1,37 @@
+"""布隆过滤器
+
+判断“一定不存在”或“可能存在”。用于在访问数据库之前过滤掉绝大多数不存在的键，
+误判率由容量和目标误判率决定，只会把不存在误判为可能存在，不会漏判。
+"""
+import hashlib
+import math
+
+
+class BloomFilter:
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(int(capacity), 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # 双重哈希：一次 blake2b 得到两个 64 位哈希，组合出 k 个位置
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def is_saturated(self):
+        return self.count > self.capacity
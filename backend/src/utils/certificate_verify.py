@@ -0,0 +1,197 @@
+"""证书公开验证
+
+验证请求按以下顺序处理：
+
+1. 命中 LRU/TTL 缓存直接返回
+2. 布隆过滤器判定编号一定不存在时直接返回，不访问数据库（挡住枚举和输错的编号）
+3. 查询数据库并写入缓存
+
+证书编号分布在两张表中：成绩管理签发的 ``certificate``（models/exam.py，``POST /api/certificates/generate``
+实际使用的表）和证书管理的 ``certificates``（models/certificate.py，换证、导入、过期扫描）。
+两张表的编号都参与过滤和查询，``certificate`` 表的 ``issued`` 状态按 ``active`` 返回。
+
+布隆过滤器在第一次验证时从已签发证书编号构建，之后每隔 ``CERT_VERIFY_FILTER_REFRESH_SECONDS``
+按每张表 ``id > 上次最大 id`` 增量补充其他进程签发的编号；本进程签发、导入、换证时由接口直接加入。
+证书状态变化时需调用 ``invalidate_certificates`` 使缓存失效，其他进程的缓存在 TTL 到期后更新。
+"""
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from src.models.user import db, User
+from src.models.exam import Exam, Certificate as ExamCertificate, CERTIFICATE_STATUS_ALIASES
+from src.models.certificate import Certificate
+from src.utils.bloom import BloomFilter
+from src.utils.cache import TTLCache, MISSING
+
+MAX_NUMBER_LENGTH = 100
+CERTIFICATE_MODELS = (Certificate, ExamCertificate)
+
+_settings = {
+    'capacity': 1000000,
+    'error_rate': 0.01,
+    'refresh_seconds': 10
+}
+_cache = TTLCache(maxsize=50000, ttl=60)
+_filter = {'bloom': None, 'last_ids': {}, 'refreshed_at': 0.0}
+_lock = threading.Lock()
+
+
+def init_certificate_verify(app):
+    """根据应用配置设置验证缓存和布隆过滤器"""
+    global _cache
+
+    app.config.setdefault('CERT_VERIFY_CACHE_SIZE', 50000)
+    app.config.setdefault('CERT_VERIFY_CACHE_TTL', 60)
+    app.config.setdefault('CERT_VERIFY_FILTER_CAPACITY', 1000000)
+    app.config.setdefault('CERT_VERIFY_FILTER_ERROR_RATE', 0.01)
+    app.config.setdefault('CERT_VERIFY_FILTER_REFRESH_SECONDS', 10)
+
+    _settings['capacity'] = app.config['CERT_VERIFY_FILTER_CAPACITY']
+    _settings['error_rate'] = app.config['CERT_VERIFY_FILTER_ERROR_RATE']
+    _settings['refresh_seconds'] = app.config['CERT_VERIFY_FILTER_REFRESH_SECONDS']
+    _cache = TTLCache(maxsize=app.config['CERT_VERIFY_CACHE_SIZE'], ttl=app.config['CERT_VERIFY_CACHE_TTL'])
+
+
+def _load_filter():
+    """返回最新的布隆过滤器，必要时全量构建或增量补充"""
+    bloom = _filter['bloom']
+    if bloom is not None and time.monotonic() - _filter['refreshed_at'] < _settings['refresh_seconds']:
+        return bloom
+
+    with _lock:
+        bloom = _filter['bloom']
+        if bloom is not None and time.monotonic() - _filter['refreshed_at'] < _settings['refresh_seconds']:
+            return bloom
+
+        if bloom is None or bloom.is_saturated():
+            # 超出容量后误判率会上升，按当前数量的两倍重建
+            total = sum(db.session.query(func.count(model.id)).scalar() or 0 for model in CERTIFICATE_MODELS)
+            bloom = BloomFilter(max(_settings['capacity'], total * 2), _settings['error_rate'])
+            last_ids = {}
+        else:
+            last_ids = dict(_filter['last_ids'])
+
+        for model in CERTIFICATE_MODELS:
+            rows = db.session.execute(
+                select(model.id, model.certificate_number)
+                .where(model.id > last_ids.get(model, 0), model.certificate_number.isnot(None))
+                .order_by(model.id)
+                .execution_options(yield_per=10000)
+            )
+            for certificate_id, number in rows:
+                bloom.add(number)
+                last_ids[model] = certificate_id
+
+        _filter.update(bloom=bloom, last_ids=last_ids, refreshed_at=time.monotonic())
+        return bloom
+
+
+def _mask_name(name):
+    if not name:
+        return None
+    name = str(name)
+    return name if len(name) == 1 else name[0] + '*' * (len(name) - 1)
+
+
+def _payload(record):
+    status = record['status']
+    expiry_date = record['expiry_date']
+    if status == 'active' and expiry_date and expiry_date <= datetime.utcnow():
+        status = 'expired'
+
+    return {
+        'certificate_number': record['certificate_number'],
+        'valid': status == 'active',
+        'status': status,
+        'certificate_type': record['certificate_type'],
+        'exam_name': record['exam_name'],
+        'holder_name': record['holder_name'],
+        'issue_date': record['issue_date'].strftime('%Y-%m-%d') if record['issue_date'] else None,
+        'expiry_date': expiry_date.strftime('%Y-%m-%d') if expiry_date else None
+    }
+
+
+def verify_certificate(certificate_number):
+    """按证书编号验证，不存在时返回 None"""
+    number = (certificate_number or '').strip()
+    if not number or len(number) > MAX_NUMBER_LENGTH:
+        return None
+
+    record = _cache.get(number)
+    if record is not MISSING:
+        return _payload(record) if record else None
+
+    if number not in _load_filter():
+        return None
+
+    record = _find(number)
+    if record is None:
+        # 布隆过滤器误判，短暂缓存“不存在”的结果
+        _cache.set(number, None, ttl=min(_cache.ttl, _settings['refresh_seconds']))
+        return None
+
+    _cache.set(number, record)
+    return _payload(record)
+
+
+def _find(number):
+    row = db.session.execute(
+        select(
+            Certificate.certificate_number, Certificate.status, Certificate.certificate_type,
+            Certificate.issue_date, Certificate.expiry_date, Certificate.certificate_data,
+            Exam.name.label('exam_name')
+        )
+        .outerjoin(Exam, Exam.id == Certificate.exam_id)
+        .where(Certificate.certificate_number == number)
+    ).first()
+    if row is not None:
+        return {
+            'certificate_number': row.certificate_number,
+            'status': row.status,
+            'certificate_type': row.certificate_type,
+            'issue_date': row.issue_date,
+            'expiry_date': row.expiry_date,
+            'exam_name': row.exam_name,
+            'holder_name': _mask_name((row.certificate_data or {}).get('user_name'))
+        }
+
+    row = db.session.execute(
+        select(
+            ExamCertificate.certificate_number, ExamCertificate.status, ExamCertificate.issue_date,
+            Exam.name.label('exam_name'), User.username
+        )
+        .outerjoin(Exam, Exam.id == ExamCertificate.exam_id)
+        .outerjoin(User, User.id == ExamCertificate.user_id)
+        .where(ExamCertificate.certificate_number == number)
+    ).first()
+    if row is not None:
+        return {
+            'certificate_number': row.certificate_number,
+            'status': CERTIFICATE_STATUS_ALIASES.get(row.status, row.status),
+            'certificate_type': 'initial',
+            'issue_date': row.issue_date,
+            'expiry_date': None,
+            'exam_name': row.exam_name,
+            'holder_name': _mask_name(row.username)
+        }
+    return None
+
+
+def note_certificates_issued(numbers):
+    """新签发或导入的证书编号，提交事务后调用"""
+    bloom = _filter['bloom']
+    with _lock:
+        for number in numbers:
+            if bloom is not None:
+                bloom.add(number)
+            _cache.delete(number)
+
+
+def invalidate_certificates(numbers):
+    """证书状态发生变化，提交事务后调用"""
+    for number in numbers:
+        _cache.delete(number)
+
@@ -0,0 +1,57 @@
+"""个人数据接口的条件请求
+
+``@conditional_on_user_version()`` 放在 ``@jwt_required()`` 之下使用：先读取当前用户的数据版本号，
+与接口名、查询参数一起生成 ETag；请求头 ``If-None-Match`` 与之相同时直接返回 304，
+不再执行查询和序列化。版本号在视图执行之前读取，执行期间发生的写入只会让下一次请求多返回一次 200。
+
+这些接口的响应都内嵌了考试信息（``exam.to_dict()``，含报名人数）和名次，管理员修改考试、其他用户报名
+或成绩变动都不会改变当前用户的版本号。考试本身和它的任一统计计数器变化时 ``exam:version`` 计数器递增，
+ETag 还包含用户涉及的考试（``user_exam`` 表）的该计数器之和，与用户版本号在同一条查询中读出。
+"""
+import hashlib
+from functools import wraps
+
+from flask import request, make_response
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import func, select
+
+from src.models.user import db
+from src.models.stats import ExamStatCounter
+from src.models.user_version import UserDataVersion, UserExam
+
+
+def conditional_on_user_version():
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            user_id = get_jwt_identity()
+            parts = [request.endpoint, request.query_string.decode('latin-1'), str(user_id),
+                     data_version_for_user(user_id)]
+            etag = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:20]
+
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+                response.set_etag(etag, weak=True)
+                response.headers['Cache-Control'] = 'private, no-cache'
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag, weak=True)
+                response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+def data_version_for_user(user_id):
+    """用户数据版本号及其涉及考试的 exam:version 之和"""
+    user_version = select(UserDataVersion.version).where(
+        UserDataVersion.user_id == user_id
+    ).scalar_subquery()
+    exam_version = select(func.coalesce(func.sum(ExamStatCounter.value), 0)).select_from(UserExam).join(
+        ExamStatCounter,
+        (ExamStatCounter.exam_id == UserExam.exam_id) & (ExamStatCounter.metric == 'exam:version')
+    ).where(UserExam.user_id == user_id).scalar_subquery()
+    version, exams = db.session.execute(select(user_version, exam_version)).one()
+    return f'{version or 0}:{exams}'
@@ -0,0 +1,233 @@
+"""考试和用户的后台分批删除
+
+删除一个有数万报名的考试时，ORM 级联会把所有子记录加载到会话中逐条删除，
+并在整个事务期间占用写锁。接口改为只创建 DeletionJob，由后台线程按依赖顺序
+逐张子表删除：每批按主键取出最多 ``DELETE_BATCH_SIZE`` 行，用一条带 RETURNING 的 DELETE
+删除后立即提交并更新任务进度，批与批之间短暂停顿。最后删除考试或用户本身，
+期间新写入的子记录由外键 ON DELETE CASCADE 一并删除。
+
+删除用户时按返回的行扣减相关考试的统计计数器；删除考试时直接删除该考试的计数器。
+执行任务的进程退出后，超过 ``DELETE_STALE_SECONDS`` 秒未更新的任务会被重新认领并继续执行。
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, or_, select, tuple_, update
+
+from src.models.user import db, User
+from src.models.exam import Exam, Application, Score, FormConfig
+from src.models.exam import Certificate as ExamCertificate
+from src.models.certificate import Certificate, CertificateRenewalApplication
+from src.models.archive import ApplicationArchive, ScoreArchive
+from src.models.pass_list import PassListEntry
+from src.models.outbox import OutboxMessage
+from src.models.deletion_job import DeletionJob
+from src.models.stats import ExamStatCounter, apply_counter_deltas, deleted_row_deltas, tracked_columns
+from src.models.user_version import UserDataVersion, UserExam, bump_user_versions
+from src.utils.certificate_verify import invalidate_certificates
+from src.utils.background import runs_background_jobs
+from src.utils.pass_list import invalidate_pass_list
+
+logger = logging.getLogger(__name__)
+
+_settings = {
+    'batch_size': 1000,
+    'pause': 0.05,
+    'stale_seconds': 120
+}
+_wakeup = threading.Event()
+_thread = None
+
+
+def init_deleter(app):
+    """启动后台删除线程，需在 db.init_app(app) 之后调用"""
+    global _thread
+
+    app.config.setdefault('DELETE_BATCH_SIZE', 1000)
+    app.config.setdefault('DELETE_BATCH_PAUSE', 0.05)
+    app.config.setdefault('DELETE_POLL_INTERVAL', 5)
+    app.config.setdefault('DELETE_STALE_SECONDS', 120)
+
+    _settings['batch_size'] = app.config['DELETE_BATCH_SIZE']
+    _settings['pause'] = app.config['DELETE_BATCH_PAUSE']
+    _settings['stale_seconds'] = app.config['DELETE_STALE_SECONDS']
+
+    interval = app.config['DELETE_POLL_INTERVAL']
+    if not interval or _thread is not None or not runs_background_jobs():
+        return
+
+    def run():
+        while True:
+            _wakeup.wait(interval)
+            _wakeup.clear()
+            try:
+                with app.app_context():
+                    while run_next_job():
+                        pass
+            except Exception:
+                logger.exception('后台删除任务执行失败')
+
+    _thread = threading.Thread(target=run, name='chunked-deleter', daemon=True)
+    _thread.start()
+
+
+def request_deletion(target_type, target_id, requested_by=None):
+    """创建删除任务，同一对象已有未完成的任务时返回该任务；由调用方提交后调用 wake_deleter"""
+    job = DeletionJob.query.filter(
+        DeletionJob.target_type == target_type,
+        DeletionJob.target_id == target_id,
+        DeletionJob.status.in_(('pending', 'running'))
+    ).first()
+    if job is None:
+        job = DeletionJob(target_type=target_type, target_id=target_id, requested_by=requested_by)
+        db.session.add(job)
+        db.session.flush()
+    return job
+
+
+def wake_deleter():
+    _wakeup.set()
+
+
+def _steps(target_type, target_id):
+    """按外键依赖顺序列出要删除的子表：(模型, 条件, 计数器类别)"""
+    if target_type == 'exam':
+        return [
+            (CertificateRenewalApplication, CertificateRenewalApplication.original_certificate_id.in_(
+                select(Certificate.id).where(Certificate.exam_id == target_id)), None),
+            (Certificate, Certificate.exam_id == target_id, None),
+            (ExamCertificate, ExamCertificate.exam_id == target_id, None),
+            (Score, Score.exam_id == target_id, None),
+            (Application, Application.exam_id == target_id, None),
+            (ScoreArchive, ScoreArchive.exam_id == target_id, None),
+            (ApplicationArchive, ApplicationArchive.exam_id == target_id, None),
+            (PassListEntry, PassListEntry.exam_id == target_id, None),
+            (FormConfig, FormConfig.exam_id == target_id, None),
+            (UserExam, UserExam.exam_id == target_id, None)
+        ]
+    return [
+        (CertificateRenewalApplication, CertificateRenewalApplication.user_id == target_id, None),
+        (Certificate, Certificate.user_id == target_id, 'certificate'),
+        (ExamCertificate, ExamCertificate.user_id == target_id, 'certificate'),
+        (Score, Score.user_id == target_id, 'score'),
+        (Application, Application.user_id == target_id, 'application'),
+        (ScoreArchive, ScoreArchive.user_id == target_id, 'score'),
+        (ApplicationArchive, ApplicationArchive.user_id == target_id, 'application'),
+        (OutboxMessage, OutboxMessage.user_id == target_id, None),
+        (UserExam, UserExam.user_id == target_id, None)
+    ]
+
+
+def _delete_chunk(model, condition, kind):
+    """删除一批子记录，返回 (删除行数, 证书编号)"""
+    primary_key = list(model.__table__.primary_key.columns)
+    keys = db.session.execute(
+        select(*primary_key).where(condition).limit(_settings['batch_size'])
+    ).all()
+    if not keys:
+        return 0, []
+
+    if len(primary_key) == 1:
+        key_condition = primary_key[0].in_([key[0] for key in keys])
+    else:
+        key_condition = tuple_(*primary_key).in_([tuple(key) for key in keys])
+
+    returning = [model.user_id] if hasattr(model, 'user_id') else []
+    if kind:
+        returning += tracked_columns(model, kind)
+    if hasattr(model, 'certificate_number'):
+        returning.append(model.certificate_number)
+
+    statement = delete(model).where(key_condition).execution_options(synchronize_session=False)
+    if not returning:
+        db.session.execute(statement)
+        return len(keys), []
+
+    rows = db.session.execute(statement.returning(*returning)).mappings().all()
+    connection = db.session.connection()
+    if kind:
+        apply_counter_deltas(connection, deleted_row_deltas(kind, rows))
+    if hasattr(model, 'user_id'):
+        bump_user_versions(connection, {row['user_id'] for row in rows})
+    return len(rows), [row['certificate_number'] for row in rows if row.get('certificate_number')]
+
+
+def _count(steps):
+    return sum(
+        db.session.execute(select(func.count()).select_from(model).where(condition)).scalar()
+        for model, condition, _ in steps
+    )
+
+
+def _claim_job(now):
+    stale = now - timedelta(seconds=_settings['stale_seconds'])
+    claimable = or_(
+        DeletionJob.status == 'pending',
+        (DeletionJob.status == 'running') & (DeletionJob.updated_at < stale)
+    )
+    job_id = db.session.execute(
+        select(DeletionJob.id).where(claimable).order_by(DeletionJob.id).limit(1)
+    ).scalar()
+    if job_id is None:
+        return None
+
+    claimed = db.session.execute(
+        update(DeletionJob)
+        .where(DeletionJob.id == job_id, claimable)
+        .values(status='running', updated_at=now,
+                started_at=func.coalesce(DeletionJob.started_at, now))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return db.session.get(DeletionJob, job_id) if claimed else None
+
+
+def run_next_job():
+    """认领并执行一个删除任务，没有待执行的任务时返回 False"""
+    job = _claim_job(datetime.utcnow())
+    if job is None:
+        return False
+
+    try:
+        steps = _steps(job.target_type, job.target_id)
+        if job.total is None:
+            job.total = _count(steps)
+            db.session.commit()
+
+        for model, condition, kind in steps:
+            while True:
+                deleted, certificate_numbers = _delete_chunk(model, condition, kind)
+                if not deleted:
+                    break
+                job.deleted += deleted
+                job.updated_at = datetime.utcnow()
+                db.session.commit()
+                invalidate_certificates(certificate_numbers)
+                time.sleep(_settings['pause'])
+
+        if job.target_type == 'exam':
+            db.session.execute(delete(ExamStatCounter).where(ExamStatCounter.exam_id == job.target_id))
+            db.session.execute(
+                delete(Exam).where(Exam.id == job.target_id).execution_options(synchronize_session=False)
+            )
+        else:
+            db.session.execute(delete(UserDataVersion).where(UserDataVersion.user_id == job.target_id))
+            db.session.execute(
+                delete(User).where(User.id == job.target_id).execution_options(synchronize_session=False)
+            )
+        job.status = 'completed'
+        job.finished_at = job.updated_at = datetime.utcnow()
+        db.session.commit()
+
+        if job.target_type == 'exam':
+            invalidate_pass_list(job.target_id)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception('删除任务 %s 执行失败', job.id)
+        job.status = 'failed'
+        job.error = str(e)
+        job.finished_at = job.updated_at = datetime.utcnow()
+        db.session.commit()
+    return True
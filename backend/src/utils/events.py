@@ -0,0 +1,173 @@
+"""进程内事件总线（Server-Sent Events）
+
+``GET /api/me/events`` 的每个连接在总线上登记一个订阅者队列。接口在事务提交后调用
+``publish`` / ``publish_many`` 把事件投递给对应用户在本进程内的所有连接。
+
+多进程部署时，其他进程中的写入无法直接投递到本进程。每个进程另有一个后台线程，
+每隔 ``EVENTS_POLL_INTERVAL`` 秒用一次查询读取本进程所有在线用户的数据版本号（见 user_data_version），
+版本号变化时推送 ``changed`` 事件，客户端收到后用带 ETag 的请求刷新数据即可。
+
+订阅者只占用一个队列，不占用数据库连接。大量空闲连接需要使用协作式的 worker
+（``gunicorn -k gevent``，见 gunicorn.conf.py），此时 queue 和 threading 会被 gevent 替换为协程实现。
+gthread worker 中每个连接占用一个线程，``EVENTS_MAX_CONNECTIONS`` 限制每个进程的连接数
+（gunicorn.conf.py 默认设为线程数的一半），超过时接口返回 503，其余线程留给普通接口。
+"""
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+
+from sqlalchemy import select
+
+from src.models.user import db
+from src.models.user_version import UserDataVersion
+
+logger = logging.getLogger(__name__)
+
+_settings = {
+    'queue_size': 100,
+    'heartbeat': 15,
+    'poll_interval': 2,
+    'max_connections': 0
+}
+_subscribers = {}
+_connections = 0
+_lock = threading.Lock()
+_event_ids = itertools.count(1)
+_poller = None
+
+
+class Subscriber:
+
+    def __init__(self, user_id, version):
+        self.user_id = user_id
+        self.version = version
+        self.queue = queue.Queue(maxsize=_settings['queue_size'])
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # 客户端消费过慢时丢弃事件，之后的 changed 事件会提示客户端重新拉取
+            logger.warning('用户 %s 的事件队列已满，丢弃事件 %s', self.user_id, event['event'])
+
+
+def init_event_bus(app):
+    """根据应用配置初始化事件总线并启动跨进程版本号轮询线程"""
+    global _poller
+
+    app.config.setdefault('EVENTS_QUEUE_SIZE', 100)
+    app.config.setdefault('EVENTS_HEARTBEAT_SECONDS', 15)
+    app.config.setdefault('EVENTS_POLL_INTERVAL', 2)
+    app.config.setdefault('EVENTS_MAX_CONNECTIONS', 0)
+
+    _settings['queue_size'] = app.config['EVENTS_QUEUE_SIZE']
+    _settings['heartbeat'] = app.config['EVENTS_HEARTBEAT_SECONDS']
+    _settings['poll_interval'] = app.config['EVENTS_POLL_INTERVAL']
+    _settings['max_connections'] = app.config['EVENTS_MAX_CONNECTIONS']
+
+    if not _settings['poll_interval'] or _poller is not None:
+        return
+
+    def run():
+        while True:
+            time.sleep(_settings['poll_interval'])
+            try:
+                with app.app_context():
+                    _poll_versions()
+            except Exception:
+                logger.exception('事件版本号轮询失败')
+
+    _poller = threading.Thread(target=run, name='event-bus-poller', daemon=True)
+    _poller.start()
+
+
+def subscribe(user_id, version=0):
+    """登记订阅者，version 为订阅时用户的数据版本号；本进程连接数已满时返回 None"""
+    global _connections
+
+    subscriber = Subscriber(user_id, version)
+    with _lock:
+        if _settings['max_connections'] and _connections >= _settings['max_connections']:
+            return None
+        _subscribers.setdefault(user_id, set()).add(subscriber)
+        _connections += 1
+    return subscriber
+
+
+def unsubscribe(subscriber):
+    global _connections
+
+    with _lock:
+        subscribers = _subscribers.get(subscriber.user_id)
+        if subscribers is not None and subscriber in subscribers:
+            subscribers.discard(subscriber)
+            _connections -= 1
+            if not subscribers:
+                del _subscribers[subscriber.user_id]
+
+
+def publish(user_id, event_type, data):
+    """向用户在本进程内的所有连接投递事件，应在事务提交后调用"""
+    publish_many([(user_id, data)], event_type)
+
+
+def publish_many(items, event_type):
+    """items 为 (user_id, data) 列表"""
+    if not _subscribers:
+        return
+    for user_id, data in items:
+        with _lock:
+            subscribers = list(_subscribers.get(user_id, ()))
+        if not subscribers:
+            continue
+        event = {'id': next(_event_ids), 'event': event_type, 'data': data}
+        for subscriber in subscribers:
+            subscriber.put(event)
+
+
+def _poll_versions():
+    with _lock:
+        user_ids = list(_subscribers)
+    if not user_ids:
+        return
+
+    versions = dict(db.session.execute(
+        select(UserDataVersion.user_id, UserDataVersion.version)
+        .where(UserDataVersion.user_id.in_(user_ids))
+    ).all())
+
+    for user_id in user_ids:
+        version = versions.get(user_id, 0)
+        with _lock:
+            subscribers = list(_subscribers.get(user_id, ()))
+        for subscriber in subscribers:
+            if version > subscriber.version:
+                subscriber.version = version
+                subscriber.put({'id': next(_event_ids), 'event': 'changed', 'data': {'version': version}})
+
+
+def _format(event):
+    return (
+        f"id: {event['id']}\n"
+        f"event: {event['event']}\n"
+        f"data: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+    )
+
+
+def event_stream(subscriber):
+    """生成 SSE 文本流，空闲时按心跳间隔发送注释行以保持连接"""
+    try:
+        yield 'retry: 5000\n\n'
+        yield _format({'id': next(_event_ids), 'event': 'ready', 'data': {}})
+        while True:
+            try:
+                event = subscriber.queue.get(timeout=_settings['heartbeat'])
+            except queue.Empty:
+                yield ': ping\n\n'
+                continue
+            yield _format(event)
+    finally:
+        unsubscribe(subscriber)
@@ -0,0 +1,115 @@
+"""证书过期扫描
+
+定期把 ``expiry_date`` 已过的有效证书改为 ``expired``。每批最多处理
+``CERT_EXPIRY_SWEEP_BATCH_SIZE`` 张证书，按 ``(status, expiry_date)`` 索引取出一批 id，
+用带 ``status = 'active'`` 条件的 UPDATE 更新后立即提交，批与批之间短暂停顿，
+避免长事务长时间占用写锁。
+
+多个进程同时扫描是安全的：已被其他进程更新的证书不满足条件，不会重复计数。
+``CERT_EXPIRY_SWEEP_INTERVAL`` 为 0 时不启动后台线程，可通过管理接口手动触发。
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from src.models.user import db
+from src.models.certificate import Certificate
+from src.models.stats import apply_counter_deltas
+from src.models.user_version import bump_user_versions
+from src.utils.background import runs_background_jobs
+from src.utils.certificate_verify import invalidate_certificates
+
+logger = logging.getLogger(__name__)
+
+_settings = {
+    'batch_size': 500,
+    'pause': 0.05
+}
+_thread = None
+
+
+def init_expiry_sweeper(app):
+    """根据配置启动后台过期扫描线程，需在 db.init_app(app) 之后调用"""
+    global _thread
+
+    app.config.setdefault('CERT_EXPIRY_SWEEP_INTERVAL', 3600)
+    app.config.setdefault('CERT_EXPIRY_SWEEP_BATCH_SIZE', 500)
+    app.config.setdefault('CERT_EXPIRY_SWEEP_PAUSE', 0.05)
+
+    _settings['batch_size'] = app.config['CERT_EXPIRY_SWEEP_BATCH_SIZE']
+    _settings['pause'] = app.config['CERT_EXPIRY_SWEEP_PAUSE']
+
+    interval = app.config['CERT_EXPIRY_SWEEP_INTERVAL']
+    if not interval or _thread is not None or not runs_background_jobs():
+        return
+
+    def run():
+        while True:
+            try:
+                with app.app_context():
+                    expired = sweep_expired_certificates()
+                if expired:
+                    logger.info('已将 %d 张证书标记为过期', expired)
+            except Exception:
+                logger.exception('证书过期扫描失败')
+            time.sleep(interval)
+
+    _thread = threading.Thread(target=run, name='certificate-expiry-sweeper', daemon=True)
+    _thread.start()
+
+
+def sweep_expired_certificates(now=None, batch_size=None, max_batches=None):
+    """分批把已过期的有效证书标记为 expired，返回处理的证书数"""
+    now = now or datetime.utcnow()
+    batch_size = batch_size or _settings['batch_size']
+    total = 0
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        rows = db.session.execute(
+            select(Certificate.id, Certificate.exam_id, Certificate.certificate_number)
+            .where(Certificate.status == 'active', Certificate.expiry_date <= now)
+            .order_by(Certificate.expiry_date)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        updated = db.session.execute(
+            update(Certificate)
+            .where(Certificate.id.in_([row.id for row in rows]), Certificate.status == 'active')
+            .values(status='expired', updated_at=now)
+            .returning(Certificate.exam_id, Certificate.certificate_number, Certificate.user_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+
+        deltas = {}
+        for exam_id, _, _ in updated:
+            deltas[(exam_id, 'certificate:status:active')] = deltas.get((exam_id, 'certificate:status:active'), 0) - 1
+            deltas[(exam_id, 'certificate:status:expired')] = deltas.get((exam_id, 'certificate:status:expired'), 0) + 1
+        apply_counter_deltas(db.session.connection(), deltas)
+        bump_user_versions(db.session.connection(), [user_id for _, _, user_id in updated])
+        db.session.commit()
+
+        invalidate_certificates([number for _, number, _ in updated])
+        total += len(updated)
+        batches += 1
+
+        if len(rows) < batch_size:
+            break
+        time.sleep(_settings['pause'])
+
+    return total
+
+
+def expiring_certificates_query(days, now=None):
+    """有效期在 days 天内到期的有效证书，按到期时间排序"""
+    now = now or datetime.utcnow()
+    return Certificate.query.filter(
+        Certificate.status == 'active',
+        Certificate.expiry_date > now,
+        Certificate.expiry_date <= now + timedelta(days=days)
+    ).order_by(Certificate.expiry_date)
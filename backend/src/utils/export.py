@@ -0,0 +1,171 @@
+"""流式导出
+
+把逐行产生的数据编码成 CSV / NDJSON / XLSX 并分块输出，内存占用只与单个分块大小有关。
+XLSX 使用标准库 zipfile 以流模式写出（内联字符串、无共享字符串表），不依赖第三方库。
+"""
+import csv
+import io
+import json
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+CHUNK_ROWS = 500
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _cell(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return _json_value(value)
+
+
+def stream_csv(columns, rows):
+    """输出 CSV，带 BOM 以便 Excel 正确识别中文"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    buffer.write('\ufeff')
+    writer.writerow(columns)
+
+    for i, row in enumerate(rows, 1):
+        writer.writerow(['' if v is None else _cell(v) for v in row])
+        if i % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def stream_ndjson(columns, rows):
+    """每行一个 JSON 对象"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(columns, (_json_value(v) for v in row))), ensure_ascii=False))
+        if len(lines) >= CHUNK_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+class _StreamBuffer:
+    """只支持 write 的缓冲区，zipfile 会据此切换到不可回退的流模式"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+_XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    )
+}
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        value = _cell(value)
+        if value is None:
+            cells.append('<c/>')
+        elif isinstance(value, bool):
+            cells.append(f'<c t="b"><v>{int(value)}</v></c>')
+        elif isinstance(value, (int, float)):
+            cells.append(f'<c><v>{value}</v></c>')
+        else:
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(value))}</t></is></c>')
+    return '<row>' + ''.join(cells) + '</row>'
+
+
+def stream_xlsx(columns, rows):
+    """以流模式写出单工作表的 XLSX"""
+    buffer = _StreamBuffer()
+
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content)
+        yield buffer.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                .encode('utf-8')
+            )
+            sheet.write(_xlsx_row(columns).encode('utf-8'))
+
+            pending = []
+            for row in rows:
+                pending.append(_xlsx_row(row))
+                if len(pending) >= CHUNK_ROWS:
+                    sheet.write(''.join(pending).encode('utf-8'))
+                    pending = []
+                    yield buffer.drain()
+
+            sheet.write((''.join(pending) + '</sheetData></worksheet>').encode('utf-8'))
+
+    yield buffer.drain()
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+    'xlsx': stream_xlsx
+}
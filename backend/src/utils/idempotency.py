@@ -0,0 +1,112 @@
+"""POST 接口的幂等键
+
+客户端在请求头 ``Idempotency-Key`` 中为一次操作生成唯一的键，超时重试时带上同一个键。
+``@idempotent`` 放在 ``@jwt_required()`` 之下使用，以 (接口, 用户, 键) 为单位：
+
+- 第一次请求正常执行，响应（5xx 除外）缓存 ``IDEMPOTENCY_TTL`` 秒，之后的重试直接返回缓存的响应，
+  并带有 ``Idempotent-Replayed: true`` 响应头；
+- 第一次请求仍在执行时到达的重试不会再次执行，而是等待其结果，最多等待 ``IDEMPOTENCY_WAIT_SECONDS`` 秒，
+  超时返回 409；
+- 同一个键用于请求体不同的请求时返回 422。
+
+未带该请求头的请求不受影响。缓存保存在进程内，多进程部署时落到其他进程的重试仍会执行，
+需要由接口自身的唯一性检查兜底。
+"""
+import hashlib
+import threading
+from functools import wraps
+
+from flask import jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+
+from src.utils.cache import TTLCache
+
+MAX_KEY_LENGTH = 255
+REPLAYED_HEADERS = ('Content-Type', 'Location')
+
+_settings = {
+    'wait_seconds': 30
+}
+_responses = TTLCache(maxsize=10000, ttl=86400)
+_in_flight = {}
+_lock = threading.Lock()
+
+
+def init_idempotency(app):
+    """根据应用配置设置响应缓存"""
+    global _responses
+
+    app.config.setdefault('IDEMPOTENCY_TTL', 86400)
+    app.config.setdefault('IDEMPOTENCY_CACHE_SIZE', 10000)
+    app.config.setdefault('IDEMPOTENCY_WAIT_SECONDS', 30)
+
+    _settings['wait_seconds'] = app.config['IDEMPOTENCY_WAIT_SECONDS']
+    _responses = TTLCache(maxsize=app.config['IDEMPOTENCY_CACHE_SIZE'], ttl=app.config['IDEMPOTENCY_TTL'])
+
+
+class _InFlight:
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.done = threading.Event()
+        self.response = None
+
+
+def idempotent(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': 'Idempotency-Key 过长'}), 400
+
+        cache_key = (request.endpoint, str(get_jwt_identity()), key)
+        fingerprint = hashlib.sha256(request.full_path.encode('utf-8') + b'\0' + request.get_data()).hexdigest()
+
+        with _lock:
+            stored = _responses.get(cache_key, None)
+            entry = None
+            if stored is None:
+                entry = _in_flight.get(cache_key)
+                owner = entry is None
+                if owner:
+                    entry = _in_flight[cache_key] = _InFlight(fingerprint)
+
+        if stored is None and not owner:
+            if entry.fingerprint != fingerprint:
+                return _key_reused()
+            if not entry.done.wait(_settings['wait_seconds']):
+                return jsonify({'error': '相同 Idempotency-Key 的请求仍在处理中，请稍后重试'}), 409
+            stored = entry.response
+            if stored is None:
+                return jsonify({'error': '相同 Idempotency-Key 的请求处理失败，请重试'}), 500
+
+        if stored is not None:
+            if stored['fingerprint'] != fingerprint:
+                return _key_reused()
+            response = make_response(stored['body'], stored['status'], stored['headers'])
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = make_response(view(*args, **kwargs))
+            entry.response = {
+                'fingerprint': fingerprint,
+                'status': response.status_code,
+                'body': response.get_data(),
+                'headers': [(name, value) for name, value in response.headers if name in REPLAYED_HEADERS]
+            }
+            # 5xx 不缓存，之后的重试重新执行
+            if response.status_code < 500:
+                _responses.set(cache_key, entry.response)
+        finally:
+            with _lock:
+                _in_flight.pop(cache_key, None)
+            entry.done.set()
+        return response
+    return wrapper
+
+
+def _key_reused():
+    return jsonify({'error': 'Idempotency-Key 已用于内容不同的请求'}), 422
@@ -0,0 +1,43 @@
+"""检索字段规范化
+
+报名表中的姓名、电话、证件号在写入检索列、构建查询键时都经过同样的规范化，
+保证“张 三”“１３８００００００００”“110101199001011234x”之类的输入能与存储值匹配。
+"""
+import re
+import unicodedata
+
+_WHITESPACE = re.compile(r'\s+')
+_NON_DIGIT = re.compile(r'\D')
+_ID_SEPARATORS = re.compile(r'[\s\-]')
+
+
+def normalize_name(value):
+    if value is None:
+        return None
+    value = unicodedata.normalize('NFKC', str(value))
+    value = _WHITESPACE.sub('', value).lower()
+    return value or None
+
+
+def normalize_phone(value):
+    if value is None:
+        return None
+    value = _NON_DIGIT.sub('', unicodedata.normalize('NFKC', str(value)))
+    return value or None
+
+
+def normalize_id_number(value):
+    if value is None:
+        return None
+    value = _ID_SEPARATORS.sub('', unicodedata.normalize('NFKC', str(value))).upper()
+    return value or None
+
+
+def extract_search_fields(application_data):
+    """从报名表数据中提取检索列"""
+    data = application_data if isinstance(application_data, dict) else {}
+    return {
+        'search_name': normalize_name(data.get('name')),
+        'search_phone': normalize_phone(data.get('phone')),
+        'search_id_number': normalize_id_number(data.get('id_number'))
+    }
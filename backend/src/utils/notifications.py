@@ -0,0 +1,343 @@
+"""考生通知（事务性发件箱 + 后台批量发送）
+
+接口在提交状态变更之前调用 ``queue_notification`` / ``queue_notifications``，通知与状态变更
+写在同一个事务里；批量审核数千名考生时也只多一条批量 INSERT，接口不等待发送。
+
+后台线程每次认领 ``NOTIFY_BATCH_SIZE`` 条到期消息（带状态条件的 UPDATE，多进程同时认领不会重复），
+同一批邮件复用一个 SMTP 连接，并按 ``NOTIFY_RATE_LIMIT``（每秒条数，按进程计）限速。
+发送失败的消息按指数退避重试，超过 ``NOTIFY_MAX_ATTEMPTS`` 次后标记为 failed；
+进程在发送途中退出时，已认领的消息在 ``NOTIFY_CLAIM_TIMEOUT`` 秒后重新被认领。
+
+配置了 ``MAIL_SERVER`` 才写入邮件通知，配置了 ``SMS_GATEWAY_URL`` 才写入短信通知。
+本地调试可启动一个 SMTP 接收端（例如 ``python -m aiosmtpd -n -l localhost:1025``），
+并设置 ``MAIL_SERVER=localhost``、``MAIL_PORT=1025``。
+"""
+import json
+import logging
+import random
+import smtplib
+import threading
+import time
+import urllib.request
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from sqlalchemy import func, insert, select, update
+
+from src.models.user import db, User
+from src.models.exam import Exam
+from src.models.outbox import OutboxMessage
+from src.utils.background import runs_background_jobs
+
+logger = logging.getLogger(__name__)
+
+# 通知模板：kind -> (标题, 正文)，正文中可使用 username、exam_name 及写入时的 data 字段
+TEMPLATES = {
+    'application_approved': ('报名审核通过', '{username}，您报名的“{exam_name}”已审核通过。'),
+    'application_rejected': ('报名审核未通过', '{username}，您报名的“{exam_name}”未通过审核。{reason}'),
+    'score_published': ('成绩已发布', '{username}，“{exam_name}”的成绩已发布，请登录系统查询。'),
+    'certificate_issued': ('证书已签发', '{username}，您的“{exam_name}”证书已签发，证书编号 {certificate_number}。'),
+    'renewal_completed': ('证书更替已完成', '{username}，您的证书更替申请已通过，新证书编号 {certificate_number}。'),
+    'renewal_rejected': ('证书更替申请未通过', '{username}，您的证书更替申请未通过审核。{comment}')
+}
+
+_settings = {
+    'channels': [],
+    'batch_size': 100,
+    'max_attempts': 6,
+    'retry_base': 30,
+    'retry_max': 3600,
+    'claim_timeout': 300
+}
+_mail = {}
+_bucket = None
+_thread = None
+
+
+class TokenBucket:
+    """令牌桶限速，rate 为每秒令牌数，为 0 时不限速"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class _Template(dict):
+
+    def __missing__(self, key):
+        return ''
+
+
+def init_notifications(app):
+    """根据配置确定通知渠道并启动后台发送线程，需在 db.init_app(app) 之后调用"""
+    global _bucket, _thread
+
+    app.config.setdefault('MAIL_SERVER', None)
+    app.config.setdefault('MAIL_PORT', 25)
+    app.config.setdefault('MAIL_USE_TLS', False)
+    app.config.setdefault('MAIL_USERNAME', None)
+    app.config.setdefault('MAIL_PASSWORD', None)
+    app.config.setdefault('MAIL_DEFAULT_SENDER', 'noreply@localhost')
+    app.config.setdefault('MAIL_TIMEOUT', 10)
+    app.config.setdefault('SMS_GATEWAY_URL', None)
+    app.config.setdefault('NOTIFY_DISPATCH_INTERVAL', 1)
+    app.config.setdefault('NOTIFY_BATCH_SIZE', 100)
+    app.config.setdefault('NOTIFY_RATE_LIMIT', 20)
+    app.config.setdefault('NOTIFY_MAX_ATTEMPTS', 6)
+    app.config.setdefault('NOTIFY_RETRY_BASE_SECONDS', 30)
+    app.config.setdefault('NOTIFY_CLAIM_TIMEOUT', 300)
+
+    _settings['channels'] = [
+        channel for channel, enabled in (('email', app.config['MAIL_SERVER']), ('sms', app.config['SMS_GATEWAY_URL']))
+        if enabled
+    ]
+    _settings['batch_size'] = app.config['NOTIFY_BATCH_SIZE']
+    _settings['max_attempts'] = app.config['NOTIFY_MAX_ATTEMPTS']
+    _settings['retry_base'] = app.config['NOTIFY_RETRY_BASE_SECONDS']
+    _settings['claim_timeout'] = app.config['NOTIFY_CLAIM_TIMEOUT']
+    _mail.update({
+        key: app.config[key] for key in (
+            'MAIL_SERVER', 'MAIL_PORT', 'MAIL_USE_TLS', 'MAIL_USERNAME', 'MAIL_PASSWORD',
+            'MAIL_DEFAULT_SENDER', 'MAIL_TIMEOUT', 'SMS_GATEWAY_URL'
+        )
+    })
+    _bucket = TokenBucket(app.config['NOTIFY_RATE_LIMIT'])
+
+    interval = app.config['NOTIFY_DISPATCH_INTERVAL']
+    if not _settings['channels'] or not interval or _thread is not None or not runs_background_jobs():
+        return
+
+    def run():
+        while True:
+            claimed = 0
+            try:
+                with app.app_context():
+                    claimed = dispatch_pending()
+            except Exception:
+                logger.exception('通知发送失败')
+            # 认领满一批说明仍有积压，立即处理下一批
+            if claimed < _settings['batch_size']:
+                time.sleep(interval)
+
+    _thread = threading.Thread(target=run, name='notification-dispatcher', daemon=True)
+    _thread.start()
+
+
+def queue_notification(user_id, kind, data):
+    """写入一条通知，应在状态变更提交之前调用"""
+    queue_notifications([(user_id, data)], kind)
+
+
+def queue_notifications(items, kind):
+    """items 为 (user_id, data) 列表，每个已启用的渠道各写入一行"""
+    rows = [
+        {'user_id': user_id, 'channel': channel, 'kind': kind, 'payload': data}
+        for user_id, data in items
+        for channel in _settings['channels']
+    ]
+    if rows:
+        db.session.execute(insert(OutboxMessage), rows)
+
+
+def dispatch_pending(batch_size=None, now=None):
+    """认领一批到期的通知并发送，返回认领的消息数"""
+    now = now or datetime.utcnow()
+    batch_size = batch_size or _settings['batch_size']
+
+    due = (
+        OutboxMessage.status.in_(('pending', 'sending')),
+        OutboxMessage.next_attempt_at <= now
+    )
+    ids = db.session.execute(
+        select(OutboxMessage.id).where(*due).order_by(OutboxMessage.next_attempt_at).limit(batch_size)
+    ).scalars().all()
+    if not ids:
+        return 0
+
+    claimed = db.session.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.id.in_(ids), *due)
+        .values(status='sending', next_attempt_at=now + timedelta(seconds=_settings['claim_timeout']))
+        .returning(OutboxMessage.id, OutboxMessage.user_id, OutboxMessage.channel,
+                   OutboxMessage.kind, OutboxMessage.payload, OutboxMessage.attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.session.commit()
+    if not claimed:
+        return 0
+
+    results = _deliver(claimed)
+    _record_results(claimed, results)
+    return len(claimed)
+
+
+def _deliver(claimed):
+    users = {
+        row.id: row for row in db.session.execute(
+            select(User.id, User.username, User.email, User.phone)
+            .where(User.id.in_({message.user_id for message in claimed}))
+        )
+    }
+    exam_ids = {(message.payload or {}).get('exam_id') for message in claimed} - {None}
+    exam_names = dict(db.session.execute(
+        select(Exam.id, Exam.name).where(Exam.id.in_(exam_ids))
+    ).all()) if exam_ids else {}
+    # 读取完毕后结束只读事务，发送期间不占用数据库连接
+    db.session.commit()
+
+    # 结果：id -> None（成功）、'skipped' 或 (错误信息, 是否不再重试)
+    results = {}
+    emails = []
+    for message in claimed:
+        user = users.get(message.user_id)
+        recipient = user and (user.email if message.channel == 'email' else user.phone)
+        if not recipient or message.kind not in TEMPLATES:
+            results[message.id] = 'skipped'
+            continue
+
+        subject, body = TEMPLATES[message.kind]
+        context = _Template(message.payload or {})
+        context.update(username=user.username, exam_name=exam_names.get(context.get('exam_id'), ''))
+        if context.get('reason'):
+            context['reason'] = f"原因：{context['reason']}"
+        if context.get('comment'):
+            context['comment'] = f"审核意见：{context['comment']}"
+        content = body.format_map(context)
+
+        if message.channel == 'email':
+            email = EmailMessage()
+            email['Subject'] = subject
+            email['From'] = _mail['MAIL_DEFAULT_SENDER']
+            email['To'] = recipient
+            email.set_content(content)
+            emails.append((message.id, email))
+        else:
+            _bucket.acquire()
+            try:
+                _send_sms(recipient, content)
+                results[message.id] = None
+            except Exception as e:
+                results[message.id] = (str(e), False)
+
+    if emails:
+        _send_emails(emails, results)
+    return results
+
+
+def _open_smtp():
+    smtp = smtplib.SMTP(_mail['MAIL_SERVER'], _mail['MAIL_PORT'], timeout=_mail['MAIL_TIMEOUT'])
+    if _mail['MAIL_USE_TLS']:
+        smtp.starttls()
+    if _mail['MAIL_USERNAME']:
+        smtp.login(_mail['MAIL_USERNAME'], _mail['MAIL_PASSWORD'])
+    return smtp
+
+
+def _send_emails(emails, results):
+    """同一批邮件复用一个 SMTP 连接，连接断开时为后续邮件重新连接"""
+    smtp = None
+    try:
+        for message_id, email in emails:
+            _bucket.acquire()
+            try:
+                if smtp is None:
+                    smtp = _open_smtp()
+                smtp.send_message(email)
+                results[message_id] = None
+            except smtplib.SMTPRecipientsRefused as e:
+                results[message_id] = (str(e), True)
+            except (smtplib.SMTPServerDisconnected, OSError) as e:
+                results[message_id] = (str(e), False)
+                smtp = None
+            except smtplib.SMTPException as e:
+                results[message_id] = (str(e), False)
+    finally:
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except smtplib.SMTPException:
+                pass
+
+
+def _send_sms(phone, content):
+    sms_request = urllib.request.Request(
+        _mail['SMS_GATEWAY_URL'],
+        data=json.dumps({'phone': phone, 'content': content}, ensure_ascii=False).encode('utf-8'),
+        headers={'Content-Type': 'application/json'}
+    )
+    with urllib.request.urlopen(sms_request, timeout=_mail['MAIL_TIMEOUT']) as response:
+        response.read()
+
+
+def _record_results(claimed, results):
+    now = datetime.utcnow()
+    sent_ids = [message.id for message in claimed if results.get(message.id, '') is None]
+    skipped_ids = [message.id for message in claimed if results.get(message.id) == 'skipped']
+
+    retries = []
+    for message in claimed:
+        result = results.get(message.id, ('未发送', False))
+        if result is None or result == 'skipped':
+            continue
+        error, permanent = result
+        attempts = message.attempts + 1
+        if permanent or attempts >= _settings['max_attempts']:
+            retries.append({'id': message.id, 'status': 'failed', 'attempts': attempts, 'last_error': error})
+        else:
+            delay = min(_settings['retry_max'], _settings['retry_base'] * 2 ** (attempts - 1))
+            retries.append({
+                'id': message.id,
+                'status': 'pending',
+                'attempts': attempts,
+                'last_error': error,
+                'next_attempt_at': now + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+            })
+        logger.warning('通知 %s 发送失败（第 %d 次）：%s', message.id, attempts, error)
+
+    if sent_ids:
+        db.session.execute(
+            update(OutboxMessage).where(OutboxMessage.id.in_(sent_ids))
+            .values(status='sent', sent_at=now, attempts=OutboxMessage.attempts + 1, last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+    if skipped_ids:
+        db.session.execute(
+            update(OutboxMessage).where(OutboxMessage.id.in_(skipped_ids))
+            .values(status='skipped')
+            .execution_options(synchronize_session=False)
+        )
+    if retries:
+        db.session.execute(update(OutboxMessage), retries)
+    db.session.commit()
+
+
+def notification_stats():
+    """各状态的通知数量及最早一条待发送通知的创建时间"""
+    counts = dict(db.session.execute(
+        select(OutboxMessage.status, func.count()).group_by(OutboxMessage.status)
+    ).all())
+    oldest_pending = db.session.execute(
+        select(func.min(OutboxMessage.created_at)).where(OutboxMessage.status.in_(('pending', 'sending')))
+    ).scalar()
+    return {
+        'channels': list(_settings['channels']),
+        'counts': counts,
+        'oldest_pending_at': oldest_pending.isoformat() if oldest_pending else None
+    }
@@ -0,0 +1,135 @@
+"""成绩发布查询
+
+管理员发布成绩时，把考试的全部成绩连同报名表中的姓名、证件号一次性写入 ``pass_list_entry``，
+查询键为 HMAC-SHA256(SECRET_KEY, 规范化姓名 + 证件号)。
+
+查询接口不需要登录，也不经过 ORM 对象：每个进程按考试把整张查询表读入内存字典，
+在 ``PASS_LIST_CACHE_TTL`` 秒内直接用字典回答，发布时本进程立即失效，其他进程在 TTL 到期后更新。
+最多缓存 ``PASS_LIST_CACHE_SIZE`` 场考试，不存在的考试不缓存。
+
+导入成绩时自动重新发布，单独修改成绩或合格规则后需要手动重新发布。查询按 ``GET
+/api/exams/<id>/pass-list/<查询键>`` 返回，响应允许共享缓存保留 ``PASS_LIST_CACHE_TTL`` 秒。
+"""
+import hashlib
+import hmac
+import threading
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import and_, delete, select
+
+from src.models.user import db
+from src.models.exam import Exam
+from src.models.pass_list import PassListEntry
+from src.utils.cache import TTLCache
+from src.utils.normalize import normalize_name, normalize_id_number
+from src.utils.archive import application_model, score_model
+
+INSERT_CHUNK = 5000
+UNPUBLISHED_TTL = 15
+
+_cache = TTLCache(maxsize=64, ttl=300)
+_lock = threading.Lock()
+
+
+def init_pass_list(app):
+    """根据应用配置设置查询表缓存"""
+    global _cache
+
+    app.config.setdefault('PASS_LIST_CACHE_TTL', 300)
+    app.config.setdefault('PASS_LIST_CACHE_SIZE', 64)
+    _cache = TTLCache(maxsize=app.config['PASS_LIST_CACHE_SIZE'], ttl=app.config['PASS_LIST_CACHE_TTL'])
+
+
+def lookup_key(name, id_number, secret=None):
+    """由姓名和证件号计算查询键，任一为空时返回 None"""
+    name = normalize_name(name)
+    id_number = normalize_id_number(id_number)
+    if not name or not id_number:
+        return None
+
+    secret = secret or current_app.config['SECRET_KEY']
+    message = f'{name}\x1f{id_number}'.encode('utf-8')
+    return hmac.new(secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+def publish_pass_list(exam_id):
+    """重新生成考试的查询表，返回发布条数、跳过条数（报名表缺少姓名或证件号）和发布时间"""
+    ApplicationModel = application_model(exam_id)
+    ScoreModel = score_model(exam_id)
+    rows = db.session.execute(
+        select(ApplicationModel.application_data, ScoreModel.score, ScoreModel.is_passed)
+        .join(ScoreModel, and_(ScoreModel.user_id == ApplicationModel.user_id,
+                               ScoreModel.exam_id == ApplicationModel.exam_id))
+        .where(ApplicationModel.exam_id == exam_id)
+        .order_by(ApplicationModel.id)
+    ).all()
+
+    secret = current_app.config['SECRET_KEY']
+    published_at = datetime.utcnow()
+    entries = {}
+    skipped = 0
+    for application_data, score, is_passed in rows:
+        data = application_data or {}
+        key = lookup_key(data.get('name'), data.get('id_number'), secret)
+        if key is None:
+            skipped += 1
+            continue
+        entries[key] = {
+            'exam_id': exam_id,
+            'lookup_key': key,
+            'score': score,
+            'is_passed': bool(is_passed),
+            'published_at': published_at
+        }
+
+    values = list(entries.values())
+    db.session.execute(delete(PassListEntry).where(PassListEntry.exam_id == exam_id))
+    for start in range(0, len(values), INSERT_CHUNK):
+        db.session.execute(PassListEntry.__table__.insert(), values[start:start + INSERT_CHUNK])
+    db.session.commit()
+
+    invalidate_pass_list(exam_id)
+    return len(values), skipped, published_at
+
+
+def invalidate_pass_list(exam_id):
+    _cache.delete(exam_id)
+
+
+def _load(exam_id):
+    """返回 (发布时间, {查询键: (分数, 是否通过)})，未发布时发布时间为 None，考试不存在时返回 None"""
+    cached = _cache.get(exam_id, None)
+    if cached is not None:
+        return cached
+
+    with _lock:
+        cached = _cache.get(exam_id, None)
+        if cached is not None:
+            return cached
+
+        rows = db.session.execute(
+            select(PassListEntry.lookup_key, PassListEntry.score, PassListEntry.is_passed,
+                   PassListEntry.published_at)
+            .where(PassListEntry.exam_id == exam_id)
+        ).all()
+
+        # 查询不到成绩时确认考试存在，不存在的考试 id 不占用缓存
+        if not rows and db.session.get(Exam, exam_id) is None:
+            return None
+
+        published_at = max((row.published_at for row in rows), default=None)
+        entries = {row.lookup_key: (row.score, row.is_passed) for row in rows}
+        # 未发布的考试也缓存一小段时间，避免发布前的查询反复访问数据库
+        ttl = None if published_at else min(_cache.ttl, UNPUBLISHED_TTL)
+        _cache.set(exam_id, (published_at, entries), ttl=ttl)
+        return published_at, entries
+
+
+def find_pass_list_entry(exam_id, key):
+    """返回 (发布时间, (分数, 是否通过) 或 None)，考试不存在时返回 None"""
+    loaded = _load(exam_id)
+    if loaded is None:
+        return None
+    published_at, entries = loaded
+    return published_at, entries.get(key)
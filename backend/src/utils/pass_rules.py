@@ -0,0 +1,152 @@
+"""考试合格规则
+
+规则以 JSON 保存在 ``Exam.pass_rule`` 中：
+
+- ``{"type": "threshold", "threshold": 60}``             总分达到分数线
+- ``{"type": "top_n", "n": 100}``                         按总分取前 N 名（同分并列）
+- ``{"type": "top_percent", "percent": 15}``              按总分取前百分之若干（同分并列）
+
+任何类型都可以附加 ``"section_minimums": {"理论": 40, "实操": 50}``，要求各科成绩不低于对应分数，
+不满足分科要求的考生不参与排名。
+
+规则在整批分数上用 NumPy 向量化求值；排名类规则依赖全场成绩，需要对整场考试重新计算。
+"""
+import math
+
+import numpy as np
+from sqlalchemy import select, update
+
+from src.models.exam import Score
+from src.models.stats import apply_counter_deltas
+from src.models.user_version import bump_user_versions
+
+RULE_TYPES = ('threshold', 'top_n', 'top_percent')
+
+# SQLite 单条语句的参数个数有限，按批更新
+UPDATE_CHUNK = 5000
+
+
+def validate_rule(rule):
+    """校验规则格式，返回错误信息；合法时返回 None"""
+    if rule is None:
+        return None
+    if not isinstance(rule, dict) or rule.get('type') not in RULE_TYPES:
+        return f"规则类型必须为 {', '.join(RULE_TYPES)} 之一"
+
+    rule_type = rule['type']
+    try:
+        if rule_type == 'threshold':
+            float(rule['threshold'])
+        elif rule_type == 'top_n':
+            if int(rule['n']) < 0:
+                return 'n 不能为负数'
+        elif not 0 <= float(rule['percent']) <= 100:
+            return 'percent 必须在 0 到 100 之间'
+    except (KeyError, TypeError, ValueError):
+        return f'{rule_type} 规则缺少有效的参数'
+
+    minimums = rule.get('section_minimums') or {}
+    if not isinstance(minimums, dict):
+        return 'section_minimums 必须为对象'
+    try:
+        [float(v) for v in minimums.values()]
+    except (TypeError, ValueError):
+        return 'section_minimums 的值必须为数字'
+
+    return None
+
+
+def is_relative(rule):
+    """排名类规则需要全场成绩才能求值"""
+    return bool(rule) and rule['type'] in ('top_n', 'top_percent')
+
+
+def evaluate(rule, scores, sections=None):
+    """对一批成绩求值，返回布尔数组
+
+    scores 中的 None 视为缺考，始终不合格；sections 为与 scores 等长的分科成绩列表。
+    """
+    totals = np.array([np.nan if s is None else s for s in scores], dtype=np.float64)
+    eligible = ~np.isnan(totals)
+
+    minimums = rule.get('section_minimums') or {}
+    if minimums:
+        sections = sections if sections is not None else [None] * len(totals)
+        for name, minimum in minimums.items():
+            values = np.array([
+                np.nan if not section or section.get(name) is None else float(section[name])
+                for section in sections
+            ], dtype=np.float64)
+            eligible &= ~np.isnan(values) & (values >= float(minimum))
+
+    if rule['type'] == 'threshold':
+        return eligible & (np.nan_to_num(totals, nan=-np.inf) >= float(rule['threshold']))
+
+    candidates = np.sort(totals[eligible])[::-1]
+    if rule['type'] == 'top_n':
+        quota = int(rule['n'])
+    else:
+        quota = math.ceil(candidates.size * float(rule['percent']) / 100)
+
+    if quota <= 0 or candidates.size == 0:
+        return np.zeros(totals.shape, dtype=bool)
+
+    cutoff = candidates[min(quota, candidates.size) - 1]
+    return eligible & (np.nan_to_num(totals, nan=-np.inf) >= cutoff)
+
+
+def apply_rule_to_exam(session, exam):
+    """按考试当前规则重新判定整场成绩，返回 (合格人数, 不合格人数)
+
+    分数只读取一次，求值后用集合式 UPDATE 写回，不逐行加载 ORM 对象；
+    统计计数器中的通过人数随同一事务修正。
+    """
+    session.flush()
+    rule = exam.pass_rule
+    rows = session.execute(
+        select(Score.id, Score.user_id, Score.score, Score.section_scores, Score.is_passed)
+        .where(Score.exam_id == exam.id)
+    ).all()
+    if not rule or not rows:
+        return sum(1 for r in rows if r.is_passed), sum(1 for r in rows if not r.is_passed)
+
+    passed = evaluate(rule, [r.score for r in rows], [r.section_scores for r in rows])
+    previous_passed = sum(1 for r in rows if r.is_passed)
+    passed_ids = [r.id for r, ok in zip(rows, passed) if ok]
+
+    if not rule.get('section_minimums') and rule['type'] == 'threshold':
+        cutoff = float(rule['threshold'])
+    elif not rule.get('section_minimums') and passed_ids:
+        cutoff = float(min(r.score for r, ok in zip(rows, passed) if ok))
+    else:
+        cutoff = None
+
+    if cutoff is not None:
+        # 只与总分有关的规则可以用一条 UPDATE 完成
+        session.execute(
+            update(Score).where(Score.exam_id == exam.id)
+            .values(is_passed=Score.score.isnot(None) & (Score.score >= cutoff))
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        session.execute(
+            update(Score).where(Score.exam_id == exam.id).values(is_passed=False)
+            .execution_options(synchronize_session=False)
+        )
+        for start in range(0, len(passed_ids), UPDATE_CHUNK):
+            session.execute(
+                update(Score).where(Score.id.in_(passed_ids[start:start + UPDATE_CHUNK])).values(is_passed=True)
+                .execution_options(synchronize_session=False)
+            )
+
+    passed_count = int(passed.sum())
+    apply_counter_deltas(session.connection(), {
+        (exam.id, 'score:passed'): passed_count - previous_passed,
+        (exam.id, 'score:version'): 1
+    })
+    bump_user_versions(session.connection(), [
+        r.user_id for r, ok in zip(rows, passed) if bool(r.is_passed) != bool(ok)
+    ])
+    session.expire_all()
+
+    return passed_count, len(rows) - passed_count
@@ -0,0 +1,173 @@
+"""按需请求性能分析
+
+满足以下任一条件的请求会在 cProfile 下运行：
+- 携带 ``X-Profile`` 请求头且 JWT 身份为管理员
+- 按 ``PROFILE_SAMPLE_RATE`` 随机采样命中
+
+分析结果以 pstats 格式写入 ``PROFILE_DIR``（可直接用 snakeviz、flameprof 等工具生成火焰图），
+同名 ``.json`` 文件记录接口名称、耗时以及本次请求的 SQL 汇总。
+"""
+import cProfile
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime
+
+from flask import g, has_request_context, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROFILE_HEADER = 'X-Profile'
+
+
+def init_profiler(app):
+    """注册请求分析钩子"""
+    app.config.setdefault('PROFILE_DIR', os.path.join(app.root_path, 'profiles'))
+    app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+    app.config.setdefault('PROFILE_MAX_FILES', 200)
+
+    os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+
+    @app.before_request
+    def _start_profile():
+        trigger = _profile_trigger(app)
+        if not trigger:
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # 同一时刻已有其他分析器在运行
+            return
+
+        g.profiler = profiler
+        g.profile_trigger = trigger
+        g.profile_started = time.perf_counter()
+        g.profile_sql = {}
+
+    @app.after_request
+    def _finish_profile(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+
+        profiler.disable()
+        duration_ms = (time.perf_counter() - g.profile_started) * 1000
+
+        try:
+            _dump_profile(app, profiler, response, duration_ms)
+        except OSError as e:
+            app.logger.warning('写入性能分析文件失败: %s', e)
+
+        return response
+
+
+def _profile_trigger(app):
+    """判断当前请求是否需要分析，返回触发方式"""
+    if request.headers.get(PROFILE_HEADER) and _is_admin_request():
+        return 'header'
+
+    sample_rate = app.config['PROFILE_SAMPLE_RATE']
+    if sample_rate > 0 and random.random() < sample_rate:
+        return 'sample'
+
+    return None
+
+
+def _is_admin_request():
+    """检查请求携带的JWT是否属于管理员"""
+    from src.models.user import User
+
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        return False
+
+    current_user_id = get_jwt_identity()
+    if not current_user_id:
+        return False
+
+    user = User.query.get(current_user_id)
+    return bool(user and user.role == 'admin')
+
+
+def _dump_profile(app, profiler, response, duration_ms):
+    """写入 pstats 文件及其元数据"""
+    profile_dir = app.config['PROFILE_DIR']
+    endpoint = (request.endpoint or 'unknown').replace('.', '-')
+    name = f"{datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{endpoint}_{uuid.uuid4().hex[:8]}"
+
+    profiler.dump_stats(os.path.join(profile_dir, f'{name}.prof'))
+
+    statements = sorted(g.profile_sql.values(), key=lambda s: s['total_ms'], reverse=True)
+    meta = {
+        'name': name,
+        'endpoint': request.endpoint,
+        'method': request.method,
+        'path': request.path,
+        'status_code': response.status_code,
+        'trigger': g.profile_trigger,
+        'duration_ms': round(duration_ms, 3),
+        'profiled_at': datetime.utcnow().isoformat(),
+        'sql': {
+            'count': sum(s['count'] for s in statements),
+            'total_ms': round(sum(s['total_ms'] for s in statements), 3),
+            'statements': statements[:20]
+        }
+    }
+
+    with open(os.path.join(profile_dir, f'{name}.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    _prune_profiles(profile_dir, app.config['PROFILE_MAX_FILES'])
+
+
+def _prune_profiles(profile_dir, max_files):
+    """只保留最近的分析结果"""
+    metas = sorted(f for f in os.listdir(profile_dir) if f.endswith('.json'))
+    for filename in metas[:-max_files] if max_files > 0 else []:
+        base = filename[:-len('.json')]
+        for ext in ('.json', '.prof'):
+            try:
+                os.remove(os.path.join(profile_dir, base + ext))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles(profile_dir, limit=50):
+    """按时间倒序列出最近的分析结果"""
+    if not os.path.isdir(profile_dir):
+        return []
+
+    metas = sorted((f for f in os.listdir(profile_dir) if f.endswith('.json')), reverse=True)
+    profiles = []
+    for filename in metas[:limit]:
+        try:
+            with open(os.path.join(profile_dir, filename), encoding='utf-8') as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'profile_sql' in g:
+        context._profile_query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_profile_query_start', None)
+    if started is None or not has_request_context() or 'profile_sql' not in g:
+        return
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    key = ' '.join(statement.split())[:300]
+    entry = g.profile_sql.setdefault(key, {'statement': key, 'count': 0, 'total_ms': 0.0})
+    entry['count'] += 1
+    entry['total_ms'] = round(entry['total_ms'] + elapsed_ms, 3)
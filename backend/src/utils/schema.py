@@ -0,0 +1,113 @@
+"""已有数据库的表结构升级
+
+``db.create_all()`` 只创建缺少的表，不会给已有的表加列或索引。从旧版本升级的数据库在启动时由
+``upgrade_schema`` 补齐后续版本在已有表上新增的列和索引：先用 inspector 检查，缺少时执行
+``ALTER TABLE ... ADD COLUMN`` / ``CREATE INDEX``，已是最新结构时不做任何修改。多个 worker
+同时启动时，其他进程已经加上的列和索引会被跳过。
+
+新增的列需要按已有数据补算时（例如报名检索列），由加上该列的进程在后台线程中分批补算。
+"""
+import logging
+import threading
+
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+
+from src.models.user import db
+from src.utils.search import backfill_search_columns
+
+logger = logging.getLogger(__name__)
+
+# 表名 -> 在已有表上新增的列
+ADDED_COLUMNS = {
+    'exam': ['pass_rule', 'archived_at'],
+    'score': ['section_scores'],
+    'application': ['search_name', 'search_phone', 'search_id_number'],
+}
+
+# 表名 -> 在已有表上新增的索引
+ADDED_INDEXES = {
+    'application': [
+        'ix_application_exam_search_name',
+        'ix_application_exam_search_phone',
+        'ix_application_exam_search_id_number',
+    ],
+}
+
+# 加上这些列之后需要按已有数据补算
+BACKFILLS = {
+    ('application', 'search_name'): backfill_search_columns,
+}
+
+
+def upgrade_schema(app):
+    """补齐已有表上缺少的列和索引，需在 db.create_all() 之后、任何查询之前调用，返回新增的 (表名, 列名)"""
+    with app.app_context():
+        added = _add_columns(db.engine)
+        _add_indexes(db.engine)
+
+    for key, backfill in BACKFILLS.items():
+        if key in added:
+            threading.Thread(
+                target=_run_backfill, args=(app, backfill), name=f'backfill-{key[0]}-{key[1]}', daemon=True
+            ).start()
+    return added
+
+
+def _run_backfill(app, backfill):
+    try:
+        with app.app_context():
+            updated = backfill()
+        logger.info('%s 已补算 %d 行', backfill.__name__, updated)
+    except Exception:
+        logger.exception('%s 执行失败', backfill.__name__)
+
+
+def _add_columns(engine):
+    tables = db.metadata.tables
+    preparer = engine.dialect.identifier_preparer
+    added = []
+    for table_name, column_names in ADDED_COLUMNS.items():
+        for column_name in column_names:
+            if column_name in _column_names(engine, table_name):
+                continue
+            column = tables[table_name].c[column_name]
+            ddl = 'ALTER TABLE {} ADD COLUMN {}'.format(
+                preparer.format_table(tables[table_name]),
+                CreateColumn(column).compile(dialect=engine.dialect)
+            )
+            try:
+                with engine.begin() as conn:
+                    conn.exec_driver_sql(ddl)
+            except Exception:
+                # 其他 worker 同时加上了该列
+                if column_name in _column_names(engine, table_name):
+                    continue
+                raise
+            logger.info('已为表 %s 添加列 %s', table_name, column_name)
+            added.append((table_name, column_name))
+    return added
+
+
+def _add_indexes(engine):
+    tables = db.metadata.tables
+    for table_name, index_names in ADDED_INDEXES.items():
+        indexes = {index.name: index for index in tables[table_name].indexes}
+        for index_name in index_names:
+            if index_name in _index_names(engine, table_name):
+                continue
+            try:
+                indexes[index_name].create(engine)
+            except Exception:
+                if index_name in _index_names(engine, table_name):
+                    continue
+                raise
+            logger.info('已为表 %s 创建索引 %s', table_name, index_name)
+
+
+def _index_names(engine, table_name):
+    return {index['name'] for index in inspect(engine).get_indexes(table_name)}
+
+
+def _column_names(engine, table_name):
+    return {column['name'] for column in inspect(engine).get_columns(table_name)}
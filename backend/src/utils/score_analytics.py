@@ -0,0 +1,148 @@
+"""考试成绩分析
+
+每个考试的分数列一次性读入 NumPy 数组并排序，名次、百分位、分布和曲线调整预览
+都在该数组上向量化计算。结果按考试缓存，以统计计数器中的 ``score:version`` 作为版本号，
+成绩有任何写入时版本号递增，下一次读取会重新加载。
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.models.user import db
+from src.models.exam import Score
+from src.models.stats import ExamStatCounter
+from src.utils.archive import score_model
+
+MAX_CACHED_EXAMS = 64
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+class ExamScoreSnapshot:
+    """某一版本下考试全部分数的有序快照"""
+
+    def __init__(self, exam_id, version, scores):
+        self.exam_id = exam_id
+        self.version = version
+        self.sorted_scores = np.sort(np.asarray(scores, dtype=np.float64))
+        self.count = int(self.sorted_scores.size)
+        self.mean = float(self.sorted_scores.mean()) if self.count else None
+        self.std = float(self.sorted_scores.std()) if self.count else None
+
+    def rank(self, scores):
+        """名次（分数严格更高的人数 + 1）和百分位（分数不高于该分数的人数占比）"""
+        scores = np.asarray(scores, dtype=np.float64)
+        if not self.count:
+            return np.ones(scores.shape, dtype=np.int64), np.full(scores.shape, 100.0)
+        at_or_below = np.searchsorted(self.sorted_scores, scores, side='right')
+        return self.count - at_or_below + 1, at_or_below / self.count * 100
+
+    def distribution(self, bins=10, pass_score=None):
+        if not self.count:
+            return {'count': 0}
+
+        upper = max(100.0, float(self.sorted_scores[-1]))
+        counts, edges = np.histogram(self.sorted_scores, bins=bins, range=(0.0, upper))
+        percentiles = np.percentile(self.sorted_scores, [10, 25, 50, 75, 90])
+
+        result = {
+            'count': self.count,
+            'mean': round(self.mean, 2),
+            'std': round(self.std, 2),
+            'min': float(self.sorted_scores[0]),
+            'max': float(self.sorted_scores[-1]),
+            'percentiles': {
+                f'p{p}': round(float(v), 2) for p, v in zip([10, 25, 50, 75, 90], percentiles)
+            },
+            'histogram': _histogram(counts, edges)
+        }
+        if pass_score is not None:
+            result['pass_count'] = int(self.count - np.searchsorted(self.sorted_scores, pass_score, side='left'))
+        return result
+
+    def curve_preview(self, target_mean, target_std, bins=10, pass_score=None, max_score=100.0):
+        """按标准分把分数线性映射到目标均值和标准差，只返回预览不写库"""
+        if not self.count:
+            return {'count': 0}
+
+        if self.std:
+            curved = target_mean + (self.sorted_scores - self.mean) / self.std * target_std
+        else:
+            curved = np.full(self.sorted_scores.shape, float(target_mean))
+        curved = np.clip(curved, 0.0, max_score)
+
+        counts, edges = np.histogram(curved, bins=bins, range=(0.0, max_score))
+        result = {
+            'target_mean': target_mean,
+            'target_std': target_std,
+            'mean': round(float(curved.mean()), 2),
+            'std': round(float(curved.std()), 2),
+            'min': round(float(curved[0]), 2),
+            'max': round(float(curved[-1]), 2),
+            'histogram': _histogram(counts, edges)
+        }
+        if pass_score is not None:
+            result['pass_count'] = int(np.count_nonzero(curved >= pass_score))
+        return result
+
+
+def _histogram(counts, edges):
+    return [
+        {'min': round(float(edges[i]), 2), 'max': round(float(edges[i + 1]), 2), 'count': int(counts[i])}
+        for i in range(len(counts))
+    ]
+
+
+def _current_version(exam_id):
+    return db.session.query(ExamStatCounter.value).filter_by(
+        exam_id=exam_id, metric='score:version'
+    ).scalar() or 0
+
+
+def get_score_snapshot(exam_id):
+    """返回考试当前版本的分数快照，版本未变时直接使用缓存"""
+    version = _current_version(exam_id)
+
+    snapshot = _cache.get(exam_id)
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _lock:
+        snapshot = _cache.get(exam_id)
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        model = score_model(exam_id)
+        scores = [
+            row[0] for row in db.session.query(model.score).filter(
+                model.exam_id == exam_id, model.score.isnot(None)
+            )
+        ]
+        snapshot = ExamScoreSnapshot(exam_id, version, scores)
+
+        _cache[exam_id] = snapshot
+        _cache.move_to_end(exam_id)
+        while len(_cache) > MAX_CACHED_EXAMS:
+            _cache.popitem(last=False)
+
+    return snapshot
+
+
+def annotate_ranks(score_dicts):
+    """为成绩字典补充 rank、percentile 和 total（同场考试的有效分数人数）"""
+    by_exam = {}
+    for item in score_dicts:
+        if item.get('score') is not None:
+            by_exam.setdefault(item['exam_id'], []).append(item)
+
+    for exam_id, items in by_exam.items():
+        snapshot = get_score_snapshot(exam_id)
+        ranks, percentiles = snapshot.rank([item['score'] for item in items])
+        for item, rank, percentile in zip(items, ranks, percentiles):
+            item['rank'] = int(rank)
+            item['percentile'] = round(float(percentile), 2)
+            item['total'] = snapshot.count
+
+    return score_dicts
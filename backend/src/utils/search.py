@@ -0,0 +1,174 @@
+"""报名检索
+
+姓名、电话、证件号在写入时从 ``application_data`` 提取到 ``Application.search_*`` 列，
+并按数据库建立辅助索引：
+
+- SQLite：FTS5 外部内容表 ``application_fts``（trigram 分词，支持任意子串），由触发器与 application 表同步
+- PostgreSQL：``pg_trgm`` 的 GIN 三元组索引
+
+检索词不足 3 个字符（trigram 无法命中）或索引不可用时，退化为 ``(exam_id, search_*)`` 复合索引上的前缀范围查询。
+"""
+import logging
+
+from sqlalchemy import and_, or_, select, text, update
+
+from src.models.user import db
+from src.models.exam import Application
+from src.models.archive import ApplicationArchive
+from src.utils.normalize import normalize_name, normalize_phone, normalize_id_number, extract_search_fields
+
+logger = logging.getLogger(__name__)
+
+SEARCH_COLUMNS = ('search_name', 'search_phone', 'search_id_number')
+
+_SQLITE_FTS_DDL = [
+    """CREATE VIRTUAL TABLE application_fts USING fts5(
+        search_name, search_phone, search_id_number,
+        content='application', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS application_fts_ai AFTER INSERT ON application BEGIN
+        INSERT INTO application_fts(rowid, search_name, search_phone, search_id_number)
+        VALUES (new.id, new.search_name, new.search_phone, new.search_id_number);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS application_fts_ad AFTER DELETE ON application BEGIN
+        INSERT INTO application_fts(application_fts, rowid, search_name, search_phone, search_id_number)
+        VALUES ('delete', old.id, old.search_name, old.search_phone, old.search_id_number);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS application_fts_au AFTER UPDATE OF search_name, search_phone, search_id_number
+    ON application BEGIN
+        INSERT INTO application_fts(application_fts, rowid, search_name, search_phone, search_id_number)
+        VALUES ('delete', old.id, old.search_name, old.search_phone, old.search_id_number);
+        INSERT INTO application_fts(rowid, search_name, search_phone, search_id_number)
+        VALUES (new.id, new.search_name, new.search_phone, new.search_id_number);
+    END""",
+    # 为已有数据建立索引
+    "INSERT INTO application_fts(application_fts) VALUES ('rebuild')"
+]
+
+_POSTGRES_TRGM_DDL = ['CREATE EXTENSION IF NOT EXISTS pg_trgm'] + [
+    f'CREATE INDEX IF NOT EXISTS ix_application_{column}_trgm ON application USING gin ({column} gin_trgm_ops)'
+    for column in SEARCH_COLUMNS
+]
+
+_state = {'backend': None}
+
+
+def init_application_search(app):
+    """创建检索所需的全文/三元组索引，需在 db.create_all() 之后调用"""
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        try:
+            with db.engine.begin() as conn:
+                if dialect == 'sqlite':
+                    exists = conn.execute(text(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'application_fts'"
+                    )).first()
+                    if not exists:
+                        for ddl in _SQLITE_FTS_DDL:
+                            conn.execute(text(ddl))
+                    _state['backend'] = 'fts5'
+                elif dialect == 'postgresql':
+                    for ddl in _POSTGRES_TRGM_DDL:
+                        conn.execute(text(ddl))
+                    _state['backend'] = 'trgm'
+        except Exception as e:
+            # 例如 SQLite 版本低于 3.34 不支持 trigram 分词，或没有创建扩展的权限
+            logger.warning('报名检索索引创建失败，将只使用前缀检索: %s', e)
+            _state['backend'] = None
+
+
+def backfill_search_columns(batch_size=1000):
+    """为检索列均为空的已有报名（升级前写入的行）按 application_data 补算检索列，分批提交，返回更新的行数
+
+    SQLite 上 application_fts 由更新触发器同步，不需要再 rebuild。
+    """
+    updated = 0
+    for model in (Application, ApplicationArchive):
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(model.id, model.application_data)
+                .where(model.id > last_id, *[getattr(model, column).is_(None) for column in SEARCH_COLUMNS])
+                .order_by(model.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            values = [dict(extract_search_fields(row.application_data), id=row.id) for row in rows]
+            values = [value for value in values if any(value[column] for column in SEARCH_COLUMNS)]
+            if values:
+                db.session.execute(update(model), values)
+            db.session.commit()
+            updated += len(values)
+            last_id = rows[-1].id
+    return updated
+
+
+def _column_terms(q):
+    """按各检索列的规则规范化检索词，返回 [(列名, 检索词)]，规范化后为空的列不参与检索"""
+    terms = (
+        ('search_name', normalize_name(q)),
+        ('search_phone', normalize_phone(q)),
+        ('search_id_number', normalize_id_number(q))
+    )
+    return [(column, term) for column, term in terms if term]
+
+
+def _prefix_condition(column, term):
+    """可以走 (exam_id, search_*) 复合索引的前缀范围条件"""
+    return and_(column >= term, column < term + '\U0010ffff')
+
+
+def search_applications(exam_id, q, limit=20, model=Application):
+    """在考试的报名中按姓名、电话或证件号检索
+
+    检索词按各列的规则分别规范化（电话只保留数字、证件号去掉分隔符并转大写），每列用自己的检索词匹配。
+    model 为 ApplicationArchive 时在归档表中检索，归档表没有子串索引，
+    按 exam_id 索引取出该考试的行后做 LIKE 匹配。
+    """
+    columns = (
+        model.id, model.user_id, model.status, model.submitted_at,
+        model.search_name, model.search_phone, model.search_id_number,
+        model.application_data
+    )
+    backend = _state['backend'] if model is Application else 'like'
+
+    # 不足 3 个字符的检索词 trigram 无法命中，该列退化为前缀检索
+    terms = _column_terms(q)
+    substring_terms = [(column, term) for column, term in terms if backend and len(term) >= 3]
+    conditions = [
+        _prefix_condition(getattr(model, column), term) for column, term in terms if len(term) < 3 or not backend
+    ]
+
+    if backend == 'fts5' and substring_terms:
+        # 按列过滤的 trigram 短语匹配即该列的子串匹配，证件号中的 X 在 trigram 中大小写不敏感
+        match = ' OR '.join(
+            '{}:"{}"'.format(column, term.replace('"', '""')) for column, term in substring_terms
+        )
+        fts_ids = text(
+            'SELECT rowid FROM application_fts WHERE application_fts MATCH :match'
+        ).bindparams(match=match).columns(rowid=db.Integer)
+        conditions.append(Application.id.in_(fts_ids.subquery().select()))
+    elif backend in ('trgm', 'like'):
+        for column, term in substring_terms:
+            pattern = '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            conditions.append(getattr(model, column).ilike(pattern, escape='\\'))
+
+    if not conditions:
+        return []
+    query = select(*columns).where(model.exam_id == exam_id, or_(*conditions))
+
+    rows = db.session.execute(query.order_by(model.id).limit(limit)).all()
+
+    return [
+        {
+            'id': row.id,
+            'user_id': row.user_id,
+            'status': row.status,
+            'submitted_at': row.submitted_at.isoformat() if row.submitted_at else None,
+            'name': (row.application_data or {}).get('name'),
+            'phone': (row.application_data or {}).get('phone'),
+            'id_number': (row.application_data or {}).get('id_number')
+        }
+        for row in rows
+    ]
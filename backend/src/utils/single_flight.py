@@ -0,0 +1,191 @@
+"""热点只读接口的请求合并（single-flight）
+
+考试公布时大量客户端在同一秒请求 ``GET /api/exams/<id>`` 和表单配置，缓存未命中时每个请求
+都会执行同样的查询。``@single_flight`` 以 (接口, 路径, 查询参数) 为键：同一进程中同时到达的
+相同请求只有第一个执行视图，其余请求等待其结果并复制一份响应返回，最多等待
+``SINGLE_FLIGHT_WAIT_SECONDS`` 秒，超时后自行执行。
+
+配置 ``SINGLE_FLIGHT_DIR`` 时合并扩展到同一台机器上的所有 worker：执行视图前先在该目录下
+对键对应的文件加锁，拿到锁后如果其他 worker 在 ``SINGLE_FLIGHT_SHARED_TTL`` 秒内已经写入了
+结果就直接使用，否则执行视图并把 200 响应写入文件。依赖 fcntl，Windows 上只在进程内合并。
+
+只用于不区分用户的公开 GET 接口；``GET /api/admin/single-flight`` 可查看合并的请求数。
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import make_response, request
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SHARED_HEADERS = ('Content-Type',)
+
+_settings = {
+    'wait_seconds': 10,
+    'directory': None,
+    'shared_ttl': 1.0
+}
+_calls = {}
+_lock = threading.Lock()
+_metrics = {
+    'executed': 0,
+    'coalesced': 0,
+    'shared_hits': 0,
+    'wait_timeouts': 0,
+    'lock_timeouts': 0
+}
+
+
+def init_single_flight(app):
+    """根据应用配置设置等待时间和跨进程共享目录"""
+    app.config.setdefault('SINGLE_FLIGHT_WAIT_SECONDS', 10)
+    app.config.setdefault('SINGLE_FLIGHT_DIR', None)
+    app.config.setdefault('SINGLE_FLIGHT_SHARED_TTL', 1.0)
+
+    directory = app.config['SINGLE_FLIGHT_DIR']
+    if directory and fcntl is None:
+        logger.warning('当前平台不支持 fcntl，请求合并仅在进程内生效')
+        directory = None
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    _settings['wait_seconds'] = app.config['SINGLE_FLIGHT_WAIT_SECONDS']
+    _settings['directory'] = directory
+    _settings['shared_ttl'] = app.config['SINGLE_FLIGHT_SHARED_TTL']
+
+
+class _Call:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.followers = 0
+
+
+def single_flight(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = '|'.join([request.endpoint, request.path, request.query_string.decode('latin-1')])
+
+        with _lock:
+            call = _calls.get(key)
+            leader = call is None
+            if leader:
+                call = _calls[key] = _Call()
+            else:
+                call.followers += 1
+
+        if not leader:
+            if call.done.wait(_settings['wait_seconds']) and call.result is not None:
+                _count('coalesced')
+                return _to_response(call.result)
+            _count('wait_timeouts')
+            return view(*args, **kwargs)
+
+        try:
+            call.result = _execute(key, view, args, kwargs)
+        finally:
+            with _lock:
+                _calls.pop(key, None)
+            call.done.set()
+        return _to_response(call.result)
+    return wrapper
+
+
+def single_flight_stats():
+    with _lock:
+        stats = dict(_metrics)
+        stats['in_flight'] = len(_calls)
+        stats['waiting'] = sum(call.followers for call in _calls.values())
+    stats['shared'] = _settings['directory'] is not None
+    return stats
+
+
+def _count(name):
+    with _lock:
+        _metrics[name] += 1
+
+
+def _run(view, args, kwargs):
+    response = make_response(view(*args, **kwargs))
+    _count('executed')
+    return {
+        'status': response.status_code,
+        'body': response.get_data(),
+        'headers': [(name, value) for name, value in response.headers if name in SHARED_HEADERS]
+    }
+
+
+def _to_response(result):
+    return make_response(result['body'], result['status'], result['headers'])
+
+
+def _execute(key, view, args, kwargs):
+    if not _settings['directory']:
+        return _run(view, args, kwargs)
+
+    path = os.path.join(_settings['directory'], hashlib.sha1(key.encode('utf-8')).hexdigest())
+    with open(path + '.lock', 'a') as lock_file:
+        if not _acquire(lock_file):
+            _count('lock_timeouts')
+            return _run(view, args, kwargs)
+        try:
+            result = _read_shared(path)
+            if result is not None:
+                _count('shared_hits')
+                return result
+            result = _run(view, args, kwargs)
+            if result['status'] == 200:
+                _write_shared(path, result)
+            return result
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _acquire(lock_file):
+    # 非阻塞加锁并轮询，gevent worker 中 time.sleep 会让出给其他协程
+    deadline = time.monotonic() + _settings['wait_seconds']
+    while True:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+
+
+def _read_shared(path):
+    try:
+        if time.time() - os.path.getmtime(path) > _settings['shared_ttl']:
+            return None
+        with open(path, encoding='utf-8') as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return None
+    result['body'] = result['body'].encode('utf-8')
+    return result
+
+
+def _write_shared(path, result):
+    try:
+        body = result['body'].decode('utf-8')
+    except UnicodeDecodeError:
+        return
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(result, body=body), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError:
+        logger.exception('请求合并结果写入失败')
@@ -0,0 +1,166 @@
+"""慢查询日志
+
+通过 SQLAlchemy 的 ``before/after_cursor_execute`` 事件统计每条 SQL 的执行耗时，
+超过 ``SLOW_QUERY_THRESHOLD_MS`` 的语句连同参数、来源接口/函数以及自动采集的
+``EXPLAIN``（SQLite 为 ``EXPLAIN QUERY PLAN``）一起写入内存环形缓冲区，
+配置了 ``SLOW_QUERY_LOG_FILE`` 时同时写入滚动日志文件。
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('slow_query')
+
+_settings = {}
+_buffer = deque(maxlen=500)
+_lock = threading.Lock()
+
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_UTILS_DIR = os.path.join(_SRC_DIR, 'utils')
+
+
+def init_slow_query_log(app):
+    """根据应用配置启用慢查询日志"""
+    global _buffer
+
+    app.config.setdefault('SLOW_QUERY_THRESHOLD_MS', 200)
+    app.config.setdefault('SLOW_QUERY_BUFFER_SIZE', 500)
+    app.config.setdefault('SLOW_QUERY_LOG_FILE', None)
+    app.config.setdefault('SLOW_QUERY_EXPLAIN', True)
+
+    _settings['threshold_ms'] = app.config['SLOW_QUERY_THRESHOLD_MS']
+    _settings['explain'] = app.config['SLOW_QUERY_EXPLAIN']
+
+    with _lock:
+        _buffer = deque(_buffer, maxlen=app.config['SLOW_QUERY_BUFFER_SIZE'])
+
+    log_file = app.config['SLOW_QUERY_LOG_FILE']
+    if log_file and not logger.handlers:
+        os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+        handler = RotatingFileHandler(log_file, maxBytes=10 * 1024 * 1024, backupCount=5, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+def get_slow_queries(limit=100):
+    """按时间倒序返回最近的慢查询"""
+    with _lock:
+        entries = list(_buffer)
+    return entries[::-1][:limit]
+
+
+def clear_slow_queries():
+    with _lock:
+        _buffer.clear()
+
+
+def _caller():
+    """找到发起查询的业务函数（跳过 SQLAlchemy、Flask 及本模块的栈帧）"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(_SRC_DIR) and not filename.startswith(_UTILS_DIR):
+            module = os.path.relpath(filename, _SRC_DIR)
+            return f'{module}:{frame.f_code.co_name}:{frame.f_lineno}'
+        frame = frame.f_back
+    return None
+
+
+def _explain(conn, cursor, statement, parameters):
+    """在独立游标上采集执行计划，只对查询语句生效
+
+    游标与原语句共用连接和事务。PostgreSQL 上事务内任何语句失败都会使整个事务进入中止状态，
+    因此 EXPLAIN 放在 SAVEPOINT 中执行，失败时回滚到该 SAVEPOINT，不影响请求自身的事务；
+    SQLite 的 EXPLAIN QUERY PLAN 失败不会影响事务，直接执行。
+    """
+    if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+
+    sqlite = conn.dialect.name == 'sqlite'
+    prefix = 'EXPLAIN QUERY PLAN ' if sqlite else 'EXPLAIN '
+    # 直接使用 DBAPI 游标，不会再次触发本模块的事件
+    explain_cursor = cursor.connection.cursor()
+    try:
+        if not sqlite:
+            explain_cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            explain_cursor.execute(prefix + statement, parameters)
+            plan = [str(row[-1]) for row in explain_cursor.fetchall()]
+        except Exception:
+            if not sqlite:
+                explain_cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+                explain_cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+            raise
+        if not sqlite:
+            explain_cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        return plan
+    except Exception as e:
+        return [f'EXPLAIN 失败: {e}']
+    finally:
+        explain_cursor.close()
+
+
+def _jsonable_parameters(parameters):
+    if isinstance(parameters, dict):
+        return {k: _jsonable_value(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_jsonable_parameters(p) if isinstance(p, (list, tuple, dict)) else _jsonable_value(p)
+                for p in parameters[:50]]
+    return _jsonable_value(parameters)
+
+
+def _jsonable_value(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    text = str(value)
+    return text if len(text) <= 200 else text[:200] + '...'
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _settings:
+        context._slow_query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_slow_query_start', None)
+    if started is None:
+        return
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms < _settings['threshold_ms']:
+        return
+
+    entry = {
+        'statement': statement,
+        'parameters': _jsonable_parameters(parameters),
+        'duration_ms': round(elapsed_ms, 3),
+        'executemany': executemany,
+        'route': f'{request.method} {request.path}' if has_request_context() else None,
+        'endpoint': request.endpoint if has_request_context() else None,
+        'function': _caller(),
+        'explain': None,
+        'logged_at': datetime.utcnow().isoformat()
+    }
+
+    if _settings['explain'] and not executemany:
+        entry['explain'] = _explain(conn, cursor, statement, parameters)
+
+    with _lock:
+        _buffer.append(entry)
+
+    if logger.handlers:
+        logger.info(json.dumps(entry, ensure_ascii=False))
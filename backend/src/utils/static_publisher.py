@@ -0,0 +1,209 @@
+"""公开考试目录的静态快照
+
+考试列表、考试详情和表单配置是访问量最大的公开接口，即使命中缓存每个请求也要经过一次 WSGI。
+配置 ``STATIC_SNAPSHOT_DIR`` 后，这些响应预先渲染成 JSON 文件写入该目录，由 nginx 直接返回
+（见 frontend/nginx.conf），文件不存在时才转发给后端：
+
+- ``exams/list/<status|all>/<page>.json``  ``GET /api/exams?page=&per_page=10&status=``
+- ``exams/<id>.json``                      ``GET /api/exams/<id>``
+- ``exams/<id>/form-config.json``          ``GET /api/exams/<id>/form-config``（仅已配置表单的考试）
+
+每个文件先写入同目录下的临时文件再用 ``os.replace`` 替换，nginx 读到的总是完整的旧文件或新文件。
+修改考试和表单配置的接口在提交后调用 ``publish_exam`` / ``unpublish_exam``，立即更新该考试的文件，
+考试列表由后台线程重新发布；后台线程另外每隔 ``STATIC_SNAPSHOT_INTERVAL`` 秒全量发布一次，
+使报名人数等随报名变化的字段保持更新。全量发布时报名人数按考试分组统计，不加载报名记录。
+
+发布线程只在运行后台任务的进程中启动（见 src/utils/background.py），其他 worker 修改考试后
+在请求中直接重新发布考试列表。
+"""
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from src.models.user import db
+from src.models.exam import Exam, Application, FormConfig
+from src.models.archive import ApplicationArchive
+from src.utils.background import runs_background_jobs
+
+logger = logging.getLogger(__name__)
+
+# 与前端考试列表的分页大小一致，其他分页大小的请求由后端处理
+SNAPSHOT_PER_PAGE = 10
+
+_settings = {
+    'directory': None
+}
+_wakeup = threading.Event()
+_thread = None
+
+
+def init_static_publisher(app):
+    """根据配置启动快照发布线程，需在 db.init_app(app) 之后调用"""
+    global _thread
+
+    app.config.setdefault('STATIC_SNAPSHOT_DIR', None)
+    app.config.setdefault('STATIC_SNAPSHOT_INTERVAL', 60)
+
+    directory = app.config['STATIC_SNAPSHOT_DIR']
+    _settings['directory'] = directory
+    if directory:
+        os.makedirs(os.path.join(directory, 'exams', 'list'), exist_ok=True)
+    if not directory or _thread is not None or not runs_background_jobs():
+        return
+
+    interval = app.config['STATIC_SNAPSHOT_INTERVAL'] or None
+
+    def run():
+        while True:
+            try:
+                with app.app_context():
+                    publish_catalog()
+            except Exception:
+                logger.exception('静态快照发布失败')
+            _wakeup.wait(interval)
+            _wakeup.clear()
+
+    _thread = threading.Thread(target=run, name='static-publisher', daemon=True)
+    _thread.start()
+
+
+def publish_exam(exam):
+    """写入考试详情和表单配置的快照并安排重新发布考试列表，应在事务提交后调用"""
+    if not _settings['directory']:
+        return
+    try:
+        _write(f'exams/{exam.id}.json', _payload(exam, _application_counts(exam.id)))
+        form_config = FormConfig.query.filter_by(exam_id=exam.id).first()
+        if form_config:
+            _write(f'exams/{exam.id}/form-config.json', form_config.to_dict())
+    except Exception:
+        logger.exception('考试 %s 的快照写入失败', exam.id)
+    _republish_lists()
+
+
+def unpublish_exam(exam_id):
+    """删除考试的快照，之后的请求由后端处理"""
+    if not _settings['directory']:
+        return
+    _remove_exam_files(exam_id)
+    _republish_lists()
+
+
+def publish_catalog():
+    """全量发布考试列表、考试详情和表单配置，并删除已不存在的考试的快照"""
+    exams, payloads = _load_exams()
+    form_configs = {
+        form_config.exam_id: form_config
+        for form_config in FormConfig.query.order_by(FormConfig.id.desc()).all()
+    }
+
+    for exam in exams:
+        _write(f'exams/{exam.id}.json', payloads[exam.id])
+        if exam.id in form_configs:
+            _write(f'exams/{exam.id}/form-config.json', form_configs[exam.id].to_dict())
+
+    groups = _publish_lists(exams, payloads)
+    _remove_stale(set(payloads), set(groups))
+
+
+def _republish_lists():
+    if _thread is not None:
+        _wakeup.set()
+        return
+    try:
+        _publish_lists(*_load_exams())
+    except Exception:
+        logger.exception('考试列表快照发布失败')
+
+
+def _load_exams():
+    # 删除中的考试不再发布，其快照由 _remove_stale 删除
+    exams = Exam.visible().order_by(Exam.id).all()
+    counts = _application_counts()
+    return exams, {exam.id: _payload(exam, counts) for exam in exams}
+
+
+def _payload(exam, counts):
+    data = exam.to_dict(include_application_count=False)
+    data['application_count'] = counts.get(exam.id, 0)
+    return data
+
+
+def _application_counts(exam_id=None):
+    """各考试的报名人数，已归档考试的报名在归档表中"""
+    counts = {}
+    for model in (Application, ApplicationArchive):
+        query = select(model.exam_id, func.count()).group_by(model.exam_id)
+        if exam_id is not None:
+            query = query.where(model.exam_id == exam_id)
+        for current_id, count in db.session.execute(query):
+            counts[current_id] = counts.get(current_id, 0) + count
+    return counts
+
+
+def _publish_lists(exams, payloads):
+    """按状态分页写入考试列表，返回发布的状态分组"""
+    groups = {'all': exams}
+    for exam in exams:
+        groups.setdefault(exam.status, []).append(exam)
+    for status, members in groups.items():
+        if not re.fullmatch(r'[a-z_]+', status or ''):
+            continue
+        pages = math.ceil(len(members) / SNAPSHOT_PER_PAGE)
+        for page in range(1, max(pages, 1) + 1):
+            start = (page - 1) * SNAPSHOT_PER_PAGE
+            _write(f'exams/list/{status}/{page}.json', {
+                'exams': [payloads[exam.id] for exam in members[start:start + SNAPSHOT_PER_PAGE]],
+                'total': len(members),
+                'pages': pages,
+                'current_page': page
+            })
+        _remove_pages_after(status, max(pages, 1))
+    return groups
+
+
+def _path(relative):
+    return os.path.join(_settings['directory'], *relative.split('/'))
+
+
+def _write(relative, data):
+    path = _path(relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(current_app.json.dumps(data))
+    os.replace(tmp_path, path)
+
+
+def _remove_exam_files(exam_id):
+    for path in (_path(f'exams/{exam_id}.json'), _path(f'exams/{exam_id}')):
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def _remove_pages_after(status, last_page):
+    directory = _path(f'exams/list/{status}')
+    for name in os.listdir(directory):
+        match = re.fullmatch(r'(\d+)\.json', name)
+        if match and int(match.group(1)) > last_page:
+            os.remove(os.path.join(directory, name))
+
+
+def _remove_stale(exam_ids, statuses):
+    for name in os.listdir(_path('exams')):
+        match = re.fullmatch(r'(\d+)(\.json)?', name)
+        if match and int(match.group(1)) not in exam_ids:
+            _remove_exam_files(int(match.group(1)))
+
+    list_directory = _path('exams/list')
+    for name in os.listdir(list_directory):
+        if name not in statuses:
+            shutil.rmtree(os.path.join(list_directory, name), ignore_errors=True)
@@ -0,0 +1,42 @@
+"""升级后补算考试统计计数器和用户涉及的考试
+
+``exam_stat_counter`` 只在写入时增量更新，从没有该表的版本升级后，已有考试的统计和
+``/api/me/summary`` 中的报名人数都会显示为 0。启动时如果计数器表为空，就在运行后台任务的
+进程中按现有数据逐个重算所有考试（见 ``rebuild_exam_stats``）。单个考试的统计也可以通过
+``POST /api/exams/<id>/stats/rebuild`` 手动重算。计数器中还有旧版本指标（``LEGACY_METRICS``）的考试
+同样在启动时重算。
+
+个人数据接口的 ETag 依赖的 ``user_exam`` 表同样只在写入时维护，为空时按现有的报名、成绩和证书补齐。
+"""
+import logging
+import threading
+
+from src.models.stats import backfill_exam_stats
+from src.models.user_version import backfill_user_exams
+from src.utils.background import runs_background_jobs
+
+logger = logging.getLogger(__name__)
+
+
+def init_stats_backfill(app):
+    """计数器表为空时在后台补算，需在 db.init_app(app) 和 init_background_jobs(app) 之后调用"""
+    if not runs_background_jobs():
+        return
+
+    def run():
+        try:
+            with app.app_context():
+                rebuilt = backfill_exam_stats()
+            if rebuilt:
+                logger.info('已补算 %d 个考试的统计计数器', rebuilt)
+        except Exception:
+            logger.exception('考试统计补算失败')
+        try:
+            with app.app_context():
+                linked = backfill_user_exams()
+            if linked:
+                logger.info('已补齐 %d 条用户考试记录', linked)
+        except Exception:
+            logger.exception('用户考试记录补齐失败')
+
+    threading.Thread(target=run, name='exam-stats-backfill', daemon=True).start()
@@ -0,0 +1,146 @@
+"""报名写入的分组提交
+
+SQLite 上每次报名单独提交并执行一次 fsync，并发请求在数据库写锁上排队，开放报名时的
+写入吞吐受限于每秒能完成的提交次数。开启 ``WRITE_COORDINATOR_ENABLED`` 后，请求线程通过
+``run_write`` 把写入交给进程内唯一的写入线程：写入线程取到第一项后最多再等待
+``WRITE_GROUP_WINDOW_MS`` 毫秒（或凑满 ``WRITE_GROUP_SIZE`` 项），在同一事务中为每一项开一个
+SAVEPOINT 执行，最后只提交一次。某一项失败只回滚它自己的 SAVEPOINT；提交成功后才把结果
+交还请求线程，提交失败时同组的请求都收到该异常，不会返回尚未落盘的结果。
+
+写入函数在写入线程中执行并使用写入线程的会话，不能引用请求会话中的对象；交给写入线程前
+请求会话会被关闭以归还连接。查重、名额等检查放在写入函数内，可以看到同组中先执行的写入。
+未开启时 ``run_write`` 在请求线程中执行并直接提交。
+
+pysqlite 默认在第一条 INSERT/UPDATE/DELETE 之前才隐式开启事务，不会在 SAVEPOINT 之前开启，
+此时 SAVEPOINT 就是最外层事务，RELEASE 即提交。写入线程因此在每组开始时显式执行
+``BEGIN IMMEDIATE``，整组在最后一次 COMMIT 中落盘。serialize 在写入线程中执行，应只返回 id 等
+简单数据，完整的序列化放在请求线程中进行。
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+from src.models.user import db
+
+logger = logging.getLogger(__name__)
+
+_settings = {
+    'window': 0.005,
+    'group_size': 200,
+    'timeout': 30
+}
+_queue = None
+_thread = None
+
+
+def init_write_coordinator(app):
+    """根据配置启动写入线程，需在 db.init_app(app) 之后调用"""
+    global _queue, _thread
+
+    app.config.setdefault('WRITE_COORDINATOR_ENABLED', False)
+    app.config.setdefault('WRITE_GROUP_WINDOW_MS', 5)
+    app.config.setdefault('WRITE_GROUP_SIZE', 200)
+    app.config.setdefault('WRITE_QUEUE_SIZE', 10000)
+    app.config.setdefault('WRITE_TIMEOUT', 30)
+
+    _settings['window'] = app.config['WRITE_GROUP_WINDOW_MS'] / 1000
+    _settings['group_size'] = app.config['WRITE_GROUP_SIZE']
+    _settings['timeout'] = app.config['WRITE_TIMEOUT']
+
+    if not app.config['WRITE_COORDINATOR_ENABLED'] or _thread is not None:
+        return
+
+    _queue = queue.Queue(maxsize=app.config['WRITE_QUEUE_SIZE'])
+
+    def run():
+        while True:
+            group = _next_group()
+            try:
+                with app.app_context():
+                    _commit_group(group)
+            except Exception as e:
+                logger.exception('分组提交失败')
+                for _, _, future in group:
+                    if not future.done():
+                        future.set_exception(e)
+
+    _thread = threading.Thread(target=run, name='write-coordinator', daemon=True)
+    _thread.start()
+
+
+def run_write(work, serialize=None):
+    """执行写入函数 work 并提交，返回 serialize(work()) 的结果
+
+    work 抛出的异常原样抛给调用方。serialize 在提交之后执行，用于把 ORM 对象转换成
+    可以交给请求线程的数据。
+    """
+    if _thread is None:
+        result = work()
+        db.session.commit()
+        return serialize(result) if serialize else result
+
+    # 等待期间不占用连接，否则请求线程占满连接池后写入线程拿不到连接
+    db.session.close()
+    future = Future()
+    try:
+        _queue.put((work, serialize, future), timeout=_settings['timeout'])
+    except queue.Full:
+        raise RuntimeError('写入繁忙，请稍后重试')
+    try:
+        return future.result(timeout=_settings['timeout'])
+    except TimeoutError:
+        # 尚未开始执行的写入不再执行；已经开始的写入仍会提交
+        future.cancel()
+        raise RuntimeError('写入超时，请稍后查询结果')
+
+
+def _next_group():
+    group = [_queue.get()]
+    deadline = time.monotonic() + _settings['window']
+    while len(group) < _settings['group_size']:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            group.append(_queue.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return group
+
+
+def _begin_group():
+    connection = db.session.connection()
+    if connection.dialect.name == 'sqlite':
+        # 只在写入线程的连接上显式开启事务，并立即取得写锁，避免延迟事务升级写锁时的 SQLITE_BUSY
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+
+
+def _commit_group(group):
+    _begin_group()
+    done = []
+    for work, serialize, future in group:
+        if not future.set_running_or_notify_cancel():
+            continue
+        try:
+            with db.session.begin_nested():
+                result = work()
+        except Exception as e:
+            future.set_exception(e)
+            continue
+        done.append((result, serialize, future))
+
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        for _, _, future in done:
+            future.set_exception(e)
+        return
+
+    for result, serialize, future in done:
+        try:
+            future.set_result(serialize(result) if serialize else result)
+        except Exception as e:
+            future.set_exception(e)
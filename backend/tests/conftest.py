@@ -0,0 +1,51 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.user import db, User
+from src.models.exam import Exam
+
+
+@pytest.fixture
+def app(tmp_path):
+    """只初始化数据库的应用，使用临时 SQLite 文件"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'test.db'}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def make_exam(app):
+    def make(**kwargs):
+        now = datetime.utcnow()
+        values = dict(
+            name='测试考试', status='published', start_time=now, end_time=now,
+            registration_start=now - timedelta(days=1), registration_end=now + timedelta(days=1)
+        )
+        values.update(kwargs)
+        exam = Exam(**values)
+        db.session.add(exam)
+        db.session.commit()
+        return exam
+    return make
+
+
+@pytest.fixture
+def make_users(app):
+    def make(count):
+        users = [User(username=f'user{i}', email=f'user{i}@example.com', password_hash='x') for i in range(count)]
+        db.session.add_all(users)
+        db.session.commit()
+        return users
+    return make
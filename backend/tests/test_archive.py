@@ -0,0 +1,28 @@
+from src.models.user import db
+from src.models.exam import Application, Score
+from src.models.archive import ApplicationArchive
+from src.utils.archive import archive_exam, restore_exam, find_application
+
+
+def test_restore_after_new_inserts(make_exam, make_users):
+    closed = make_exam(status='closed')
+    open_exam = make_exam()
+    users = make_users(2)
+    db.session.add(Application(user_id=users[0].id, exam_id=closed.id, application_data={}))
+    db.session.add(Score(user_id=users[0].id, exam_id=closed.id, score=80))
+    db.session.commit()
+    archived_id = Application.query.one().id
+
+    archive_exam(closed)
+    db.session.add(Application(user_id=users[1].id, exam_id=open_exam.id, application_data={}))
+    db.session.add(Score(user_id=users[1].id, exam_id=open_exam.id, score=70))
+    db.session.commit()
+
+    new_application = Application.query.one()
+    assert new_application.id != archived_id
+    assert isinstance(find_application(archived_id), ApplicationArchive)
+
+    assert restore_exam(closed) == {'applications': 1, 'scores': 1}
+    assert find_application(archived_id).exam_id == closed.id
+    assert Application.query.count() == 2
+    assert Score.query.count() == 2
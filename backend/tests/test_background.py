@@ -0,0 +1,24 @@
+import fcntl
+
+from flask import Flask
+
+from src.utils import background
+
+
+def test_only_lock_holder_runs_jobs(tmp_path, monkeypatch):
+    path = tmp_path / 'background.lock'
+    monkeypatch.setattr(background, '_lock_file', None)
+    monkeypatch.setitem(background._settings, 'leader', True)
+
+    # 另一个 worker 已持有锁
+    with open(path, 'a') as holder:
+        fcntl.flock(holder, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        app = Flask(__name__)
+        app.config['BACKGROUND_JOBS_LOCK'] = str(path)
+        background.init_background_jobs(app)
+        assert not background.runs_background_jobs()
+
+    # 持有锁的 worker 退出后，新启动的 worker 接手
+    background.init_background_jobs(app)
+    assert background.runs_background_jobs()
+    background._lock_file.close()
@@ -0,0 +1,26 @@
+from src.models.user import db
+from src.models.exam import Certificate
+from src.utils import certificate_verify
+from src.utils.cache import TTLCache
+
+
+def test_verifies_certificates_issued_by_score_routes(app, make_exam, make_users, monkeypatch):
+    monkeypatch.setattr(certificate_verify, '_cache', TTLCache(maxsize=10, ttl=60))
+    monkeypatch.setattr(certificate_verify, '_filter', {'bloom': None, 'last_ids': {}, 'refreshed_at': 0.0})
+    exam = make_exam(name='二级建造师')
+    user, = make_users(1)
+    db.session.add(Certificate(user_id=user.id, exam_id=exam.id, certificate_number='CERT-001', status='issued'))
+    db.session.commit()
+
+    result = certificate_verify.verify_certificate('CERT-001')
+    assert result['valid'] is True
+    assert result['status'] == 'active'
+    assert result['exam_name'] == '二级建造师'
+    assert result['holder_name'] == 'u****'
+
+    # 过滤器构建之后签发的编号由接口直接加入
+    db.session.add(Certificate(user_id=user.id, exam_id=exam.id, certificate_number='CERT-002', status='issued'))
+    db.session.commit()
+    certificate_verify.note_certificates_issued(['CERT-002'])
+    assert certificate_verify.verify_certificate('CERT-002')['valid'] is True
+    assert certificate_verify.verify_certificate('CERT-003') is None
@@ -0,0 +1,53 @@
+from src.models.user import db
+from src.models.exam import Application, Score
+from src.models.user_version import UserExam, backfill_user_exams
+from src.utils.conditional import data_version_for_user
+
+
+def test_data_version_follows_embedded_exam(make_exam, make_users):
+    exam = make_exam()
+    users = make_users(3)
+    db.session.add(Application(user_id=users[0].id, exam_id=exam.id, application_data={}))
+    db.session.commit()
+    version = data_version_for_user(users[0].id)
+
+    # 其他用户报名改变报名人数
+    db.session.add(Application(user_id=users[1].id, exam_id=exam.id, application_data={}))
+    db.session.commit()
+    assert data_version_for_user(users[0].id) != version
+    version = data_version_for_user(users[0].id)
+
+    # 管理员修改考试
+    exam.location = '第二考场'
+    db.session.commit()
+    assert data_version_for_user(users[0].id) != version
+    version = data_version_for_user(users[0].id)
+
+    # 其他用户的成绩变动可能改变名次
+    db.session.add(Score(user_id=users[2].id, exam_id=exam.id, score=80))
+    db.session.commit()
+    assert data_version_for_user(users[0].id) != version
+    version = data_version_for_user(users[0].id)
+
+    # 无关考试的变动不影响
+    other = make_exam()
+    db.session.add(Application(user_id=users[1].id, exam_id=other.id, application_data={}))
+    other.location = '第三考场'
+    db.session.commit()
+    assert data_version_for_user(users[0].id) == version
+
+
+def test_backfill_user_exams(make_exam, make_users):
+    exam = make_exam()
+    users = make_users(2)
+    db.session.add_all([
+        Application(user_id=users[0].id, exam_id=exam.id, application_data={}),
+        Score(user_id=users[1].id, exam_id=exam.id, score=70)
+    ])
+    db.session.commit()
+    assert backfill_user_exams() == 0
+
+    db.session.query(UserExam).delete()
+    db.session.commit()
+    assert backfill_user_exams() == 2
+    assert {(row.user_id, row.exam_id) for row in UserExam.query} == {(users[0].id, exam.id), (users[1].id, exam.id)}
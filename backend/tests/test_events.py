@@ -0,0 +1,32 @@
+from flask_jwt_extended import JWTManager, create_access_token
+
+from src.routes.me import me_bp
+from src.utils import events
+
+
+def test_stream_token_and_connection_cap(app, make_users, monkeypatch):
+    app.config['SECRET_KEY'] = 'test-secret'
+    app.config['JWT_SECRET_KEY'] = 'test-jwt-secret-with-enough-length'
+    JWTManager(app)
+    app.register_blueprint(me_bp, url_prefix='/api/me')
+    monkeypatch.setitem(events._settings, 'max_connections', 1)
+    user = make_users(1)[0]
+    client = app.test_client()
+    headers = {'Authorization': 'Bearer ' + create_access_token(identity=str(user.id))}
+
+    # 访问令牌不能放在 URL 中
+    assert client.get('/api/me/events?jwt=' + headers['Authorization'][7:]).status_code == 401
+    assert client.get('/api/me/events?token=forged').status_code == 401
+
+    token = client.post('/api/me/events/token', headers=headers).json['token']
+    first = client.get('/api/me/events?token=' + token)
+    assert first.status_code == 200
+
+    # 本进程连接数已满
+    second = client.get('/api/me/events', headers=headers)
+    assert second.status_code == 503
+    assert second.headers['Retry-After']
+
+    first.close()
+    assert events._connections == 0
+    assert client.get('/api/me/events', headers=headers).status_code == 200
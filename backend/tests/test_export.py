@@ -0,0 +1,35 @@
+import csv
+import io
+
+from flask_jwt_extended import JWTManager, create_access_token
+
+from src.models.user import db, User
+from src.models.exam import Application, Certificate
+from src.routes.exam import exam_bp
+
+
+def test_export_has_one_row_per_application(app, make_exam, make_users):
+    app.config['JWT_SECRET_KEY'] = 'test'
+    JWTManager(app)
+    app.register_blueprint(exam_bp, url_prefix='/api')
+    admin = User(username='admin', email='admin@example.com', password_hash='x', role='admin')
+    db.session.add(admin)
+    exam = make_exam()
+    users = make_users(2)
+    db.session.add_all([Application(user_id=user.id, exam_id=exam.id, application_data={}) for user in users])
+    db.session.add_all([
+        Certificate(user_id=users[0].id, exam_id=exam.id, certificate_number='OLD-1', status='issued'),
+        Certificate(user_id=users[0].id, exam_id=exam.id, certificate_number='NEW-1', status='issued')
+    ])
+    db.session.commit()
+
+    token = create_access_token(identity=str(admin.id))
+    response = app.test_client().get(
+        f'/api/exams/{exam.id}/applications/export?format=csv', headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == 200
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True).lstrip('﻿'))))
+    assert [row['user_id'] for row in rows] == [str(users[0].id), str(users[1].id)]
+    assert rows[0]['certificate_number'] == 'NEW-1'
+    assert rows[1]['certificate_number'] == ''
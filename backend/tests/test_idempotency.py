@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+from flask import Blueprint, jsonify
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required
+
+from src.utils import idempotency
+from src.utils.cache import TTLCache
+from src.utils.idempotency import idempotent
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    monkeypatch.setattr(idempotency, '_responses', TTLCache(maxsize=100, ttl=60))
+    monkeypatch.setattr(idempotency, '_in_flight', {})
+    monkeypatch.setitem(idempotency._settings, 'wait_seconds', 5)
+    app.config['JWT_SECRET_KEY'] = 'test'
+    JWTManager(app)
+
+    state = {'calls': 0, 'status': 201, 'entered': threading.Event(), 'release': threading.Event()}
+    state['release'].set()
+    bp = Blueprint('idempotency_test', __name__)
+
+    @bp.route('/orders', methods=['POST'])
+    @jwt_required()
+    @idempotent
+    def create_order():
+        state['calls'] += 1
+        state['entered'].set()
+        state['release'].wait(5)
+        return jsonify({'order': state['calls']}), state['status']
+
+    app.register_blueprint(bp)
+    token = create_access_token(identity='1')
+
+    def post(key, body=None, **kwargs):
+        headers = {'Authorization': f'Bearer {token}', 'Idempotency-Key': key}
+        return app.test_client().post('/orders', json=body or {'item': 'a'}, headers=headers, **kwargs)
+
+    post.state = state
+    return post
+
+
+def test_retry_replays_stored_response(client):
+    first = client('k1')
+    retry = client('k1')
+    assert first.status_code == retry.status_code == 201
+    assert retry.get_json() == first.get_json() == {'order': 1}
+    assert 'Idempotent-Replayed' not in first.headers
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert client.state['calls'] == 1
+
+    assert client('k2').get_json() == {'order': 2}
+
+
+def test_reused_key_with_different_body_is_rejected(client):
+    client('k1', {'item': 'a'})
+    assert client('k1', {'item': 'b'}).status_code == 422
+    assert client.state['calls'] == 1
+
+
+def test_server_errors_are_not_cached(client):
+    client.state['status'] = 500
+    assert client('k1').status_code == 500
+    client.state['status'] = 201
+    retry = client('k1')
+    assert retry.status_code == 201
+    assert 'Idempotent-Replayed' not in retry.headers
+    assert client.state['calls'] == 2
+
+
+def test_concurrent_duplicate_waits_for_in_flight_result(client):
+    client.state['release'].clear()
+    responses = {}
+
+    def send(name):
+        responses[name] = client('k1')
+
+    first = threading.Thread(target=send, args=('first',))
+    first.start()
+    assert client.state['entered'].wait(5)
+    second = threading.Thread(target=send, args=('second',))
+    second.start()
+    # 第二个请求到达时第一个仍在执行
+    second.join(0.2)
+    assert second.is_alive()
+
+    client.state['release'].set()
+    first.join(5)
+    second.join(5)
+    assert client.state['calls'] == 1
+    assert responses['first'].get_json() == responses['second'].get_json() == {'order': 1}
+    assert responses['second'].headers['Idempotent-Replayed'] == 'true'
@@ -0,0 +1,47 @@
+from flask_jwt_extended import JWTManager
+
+from src.models.user import db
+from src.models.exam import Application, Score
+from src.routes.pass_list import pass_list_bp
+from src.utils import pass_list
+from src.utils.cache import TTLCache
+
+
+def test_unknown_exam_is_not_cached(app, make_exam, monkeypatch):
+    monkeypatch.setattr(pass_list, '_cache', TTLCache(maxsize=2, ttl=300))
+    exam = make_exam()
+
+    assert pass_list.find_pass_list_entry(exam.id + 1000, 'key') is None
+    assert pass_list._cache.stats()['size'] == 0
+
+    assert pass_list.find_pass_list_entry(exam.id, 'key') == (None, None)
+    assert pass_list._cache.stats()['size'] == 1
+
+
+def test_lookup_redirects_to_cacheable_get(app, make_exam, make_users, monkeypatch):
+    monkeypatch.setattr(pass_list, '_cache', TTLCache(maxsize=2, ttl=300))
+    app.config['SECRET_KEY'] = 'test'
+    app.config['PASS_LIST_CACHE_TTL'] = 300
+    JWTManager(app)
+    app.register_blueprint(pass_list_bp, url_prefix='/api')
+    exam = make_exam()
+    user, = make_users(1)
+    db.session.add_all([
+        Application(user_id=user.id, exam_id=exam.id, application_data={'name': '张三', 'id_number': '11010119900101123x'}),
+        Score(user_id=user.id, exam_id=exam.id, score=75, is_passed=True)
+    ])
+    db.session.commit()
+    pass_list.publish_pass_list(exam.id)
+
+    client = app.test_client()
+    response = client.post(f'/api/exams/{exam.id}/pass-list/lookup', json={'name': ' 张三', 'id_number': '11010119900101123X'})
+    assert response.status_code == 303
+    assert response.headers['Cache-Control'] == 'no-store'
+
+    response = client.get(response.headers['Location'])
+    assert response.status_code == 200
+    assert response.get_json()['is_passed'] is True
+    assert response.headers['Cache-Control'] == 'public, max-age=300'
+
+    assert client.get(f'/api/exams/{exam.id}/pass-list/{"0" * 64}').status_code == 404
+    assert client.get(f'/api/exams/{exam.id}/pass-list/not-a-key').status_code == 400
@@ -0,0 +1,66 @@
+from src.models.user import db
+from src.models.exam import Score
+from src.models.stats import ExamStatCounter
+from src.models.user_version import get_user_version
+from src.utils import pass_rules
+
+
+def test_top_n_includes_ties_at_cutoff():
+    rule = {'type': 'top_n', 'n': 2}
+    assert pass_rules.evaluate(rule, [90, 85, 85, 70, None]).tolist() == [True, True, True, False, False]
+    assert pass_rules.evaluate({'type': 'top_n', 'n': 0}, [90, 85]).tolist() == [False, False]
+    # 名额多于考生时全部合格，缺考除外
+    assert pass_rules.evaluate({'type': 'top_n', 'n': 10}, [60, None]).tolist() == [True, False]
+
+
+def test_top_percent_rounds_quota_up():
+    scores = [100 - i for i in range(10)]
+    # 10 人的 15% 为 1.5，向上取整取前 2 名
+    assert pass_rules.evaluate({'type': 'top_percent', 'percent': 15}, scores).sum() == 2
+    # 缺考不计入人数：4 人的 50% 为 2 名
+    passed = pass_rules.evaluate({'type': 'top_percent', 'percent': 50}, [80, 70, 60, 50, None, None])
+    assert passed.tolist() == [True, True, False, False, False, False]
+
+
+def test_section_minimums_reject_missing_sections():
+    rule = {'type': 'threshold', 'threshold': 60, 'section_minimums': {'理论': 40, '实操': 50}}
+    sections = [{'理论': 45, '实操': 55}, {'理论': 45}, None, {'理论': 45, '实操': 49}]
+    assert pass_rules.evaluate(rule, [80, 80, 80, 80], sections).tolist() == [True, False, False, False]
+
+    # 不满足分科要求的考生不参与排名
+    rule = {'type': 'top_n', 'n': 1, 'section_minimums': {'理论': 40}}
+    assert pass_rules.evaluate(rule, [90, 80], [{'理论': 30}, {'理论': 50}]).tolist() == [False, True]
+
+
+def _counter(exam_id, metric):
+    return db.session.get(ExamStatCounter, (exam_id, metric)).value
+
+
+def test_apply_rule_to_exam_updates_rows_and_counters(make_exam, make_users):
+    exam = make_exam()
+    users = make_users(4)
+    totals = [90, 85, 85, 70]
+    db.session.add_all([
+        Score(user_id=user.id, exam_id=exam.id, score=total, is_passed=True,
+              section_scores={'理论': 30 if i == 1 else 50})
+        for i, (user, total) in enumerate(zip(users, totals))
+    ])
+    db.session.commit()
+    version = _counter(exam.id, 'score:version')
+    user_versions = [get_user_version(user.id) for user in users]
+
+    exam.pass_rule = {'type': 'top_n', 'n': 2}
+    assert pass_rules.apply_rule_to_exam(db.session, exam) == (3, 1)
+    db.session.commit()
+    assert {s.user_id: s.is_passed for s in Score.query} == dict(zip([u.id for u in users], [True, True, True, False]))
+    assert _counter(exam.id, 'score:passed') == 3
+    assert _counter(exam.id, 'score:version') == version + 1
+    # 只有判定结果变化的考生版本号递增
+    assert [get_user_version(user.id) - v for user, v in zip(users, user_versions)] == [0, 0, 0, 1]
+
+    # 分科规则逐行写回
+    exam.pass_rule = {'type': 'top_n', 'n': 2, 'section_minimums': {'理论': 40}}
+    assert pass_rules.apply_rule_to_exam(db.session, exam) == (2, 2)
+    db.session.commit()
+    assert {s.user_id: s.is_passed for s in Score.query} == dict(zip([u.id for u in users], [True, False, True, False]))
+    assert _counter(exam.id, 'score:passed') == 2
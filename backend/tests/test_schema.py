@@ -0,0 +1,41 @@
+from sqlalchemy import inspect
+
+from src.models.user import db
+from src.models.exam import Exam, Score
+from src.utils import schema
+from src.utils.schema import ADDED_COLUMNS, ADDED_INDEXES, upgrade_schema
+
+
+def _drop_added_columns():
+    """模拟旧版本建立的数据库"""
+    db.session.remove()
+    with db.engine.begin() as conn:
+        for index_names in ADDED_INDEXES.values():
+            for index_name in index_names:
+                conn.exec_driver_sql(f'DROP INDEX {index_name}')
+        for table_name, column_names in ADDED_COLUMNS.items():
+            for column_name in column_names:
+                conn.exec_driver_sql(f'ALTER TABLE {table_name} DROP COLUMN {column_name}')
+
+
+def test_upgrade_adds_missing_columns(app, make_exam, monkeypatch):
+    # 补算另有测试（test_search.py），这里不启动后台线程
+    monkeypatch.setattr(schema, 'BACKFILLS', {})
+    _drop_added_columns()
+
+    added = upgrade_schema(app)
+    assert set(added) == {
+        (table_name, column_name)
+        for table_name, column_names in ADDED_COLUMNS.items() for column_name in column_names
+    }
+    columns = {column['name'] for column in inspect(db.engine).get_columns('exam')}
+    assert 'pass_rule' in columns
+    indexes = {index['name'] for index in inspect(db.engine).get_indexes('application')}
+    assert set(ADDED_INDEXES['application']) <= indexes
+
+    exam = make_exam(pass_rule={'type': 'min_score', 'min_score': 60})
+    assert db.session.get(Exam, exam.id).pass_rule['min_score'] == 60
+    assert Score.query.count() == 0
+
+    # 已是最新结构时不做修改
+    assert upgrade_schema(app) == []
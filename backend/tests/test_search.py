@@ -0,0 +1,55 @@
+from sqlalchemy import update
+
+from src.models.user import db
+from src.models.exam import Application
+from src.utils import search
+from src.utils.search import SEARCH_COLUMNS, backfill_search_columns, init_application_search, search_applications
+
+
+def test_backfill_fills_rows_written_before_upgrade(make_exam, make_users):
+    exam = make_exam()
+    users = make_users(3)
+    forms = [{'name': '张三', 'phone': '138-0013-8000'}, {'id_number': '11010119900101123x'}, {}]
+    db.session.add_all([
+        Application(user_id=user.id, exam_id=exam.id, application_data=form) for user, form in zip(users, forms)
+    ])
+    db.session.commit()
+    # 升级前写入的行没有检索列
+    db.session.execute(update(Application).values({column: None for column in SEARCH_COLUMNS}))
+    db.session.commit()
+
+    assert backfill_search_columns(batch_size=1) == 2
+    rows = {row.user_id: row for row in Application.query.all()}
+    assert rows[users[0].id].search_phone == '13800138000'
+    assert rows[users[1].id].search_id_number == '11010119900101123X'
+    assert backfill_search_columns() == 0
+
+
+def test_search_normalizes_each_column(app, make_exam, make_users, monkeypatch):
+    monkeypatch.setitem(search._state, 'backend', None)
+    init_application_search(app)
+    assert search._state['backend'] == 'fts5'
+    exam = make_exam()
+    users = make_users(3)
+    forms = [
+        {'name': '张三丰', 'phone': '13800138000', 'id_number': '110101199001011234'},
+        {'name': '李四', 'phone': '13900139000', 'id_number': '11010119900101123X'},
+        {'name': 'Wang Wu', 'phone': '13700137000', 'id_number': '310104198502023456'}
+    ]
+    db.session.add_all([
+        Application(user_id=user.id, exam_id=exam.id, application_data=form) for user, form in zip(users, forms)
+    ])
+    db.session.commit()
+
+    def found(q):
+        return {row['user_id'] for row in search_applications(exam.id, q)}
+
+    # 带分隔符的电话只按数字匹配电话列
+    assert found('138-0013-8000') == {users[0].id}
+    assert found('0013 8') == {users[0].id}
+    # 证件号末位 x 规范化为大写
+    assert found('0101123x') == {users[1].id}
+    # 姓名忽略空格和大小写
+    assert found('wang wu') == {users[2].id}
+    # 不足 3 个字符按前缀检索
+    assert found('李四') == {users[1].id}
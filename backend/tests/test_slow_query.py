@@ -0,0 +1,20 @@
+from types import SimpleNamespace
+
+from src.models.user import db, User
+from src.utils.slow_query import _explain
+
+
+def test_failed_explain_keeps_request_transaction(app, make_users):
+    make_users(1)
+    db.session.add(User(username='pending', email='pending@example.com', password_hash='x'))
+    db.session.flush()
+
+    connection = db.session.connection()
+    cursor = connection.connection.driver_connection.cursor()
+    # 按 PostgreSQL 的方式在 SAVEPOINT 中执行
+    conn = SimpleNamespace(dialect=SimpleNamespace(name='postgresql'))
+    plan = _explain(conn, cursor, 'SELECT * FROM missing_table', ())
+    assert plan[0].startswith('EXPLAIN 失败')
+
+    db.session.commit()
+    assert User.query.filter_by(username='pending').count() == 1
@@ -0,0 +1,39 @@
+import json
+
+from src.models.user import db
+from src.models.exam import Application
+from src.utils import static_publisher
+
+
+def test_catalog_counts_applications(app, make_exam, make_users, tmp_path, monkeypatch):
+    monkeypatch.setitem(static_publisher._settings, 'directory', str(tmp_path / 'snapshots'))
+    exam = make_exam()
+    empty = make_exam(status='draft')
+    users = make_users(3)
+    db.session.add_all([Application(user_id=user.id, exam_id=exam.id, application_data={}) for user in users])
+    db.session.commit()
+
+    static_publisher.publish_catalog()
+
+    with open(tmp_path / 'snapshots' / 'exams' / f'{exam.id}.json', encoding='utf-8') as f:
+        assert json.load(f)['application_count'] == 3
+    with open(tmp_path / 'snapshots' / 'exams' / 'list' / 'all' / '1.json', encoding='utf-8') as f:
+        counts = {item['id']: item['application_count'] for item in json.load(f)['exams']}
+    assert counts == {exam.id: 3, empty.id: 0}
+
+
+def test_catalog_skips_deleting_exams(app, make_exam, tmp_path, monkeypatch):
+    monkeypatch.setitem(static_publisher._settings, 'directory', str(tmp_path / 'snapshots'))
+    exam = make_exam()
+    deleting = make_exam()
+    static_publisher.publish_catalog()
+    assert (tmp_path / 'snapshots' / 'exams' / f'{deleting.id}.json').exists()
+
+    deleting.status = 'deleting'
+    db.session.commit()
+    static_publisher.publish_catalog()
+
+    assert not (tmp_path / 'snapshots' / 'exams' / f'{deleting.id}.json').exists()
+    assert not (tmp_path / 'snapshots' / 'exams' / 'list' / 'deleting').exists()
+    with open(tmp_path / 'snapshots' / 'exams' / 'list' / 'all' / '1.json', encoding='utf-8') as f:
+        assert [item['id'] for item in json.load(f)['exams']] == [exam.id]
@@ -0,0 +1,41 @@
+from sqlalchemy import delete
+
+from src.models.user import db
+from src.models.exam import Application, Certificate as ExamCertificate
+from src.models.certificate import Certificate
+from src.models.stats import ExamStatCounter, apply_counter_deltas, backfill_exam_stats, get_exam_stats
+
+
+def test_backfill_after_upgrade(make_exam, make_users):
+    exam = make_exam()
+    users = make_users(2)
+    db.session.add_all([Application(user_id=user.id, exam_id=exam.id, application_data={}) for user in users])
+    db.session.commit()
+    # 模拟从没有计数器表的版本升级
+    db.session.execute(delete(ExamStatCounter))
+    db.session.commit()
+
+    assert backfill_exam_stats() == 1
+    counter = db.session.get(ExamStatCounter, (exam.id, 'application:pending'))
+    assert counter.value == 2
+    assert backfill_exam_stats() == 0
+
+
+def test_certificate_statuses_share_one_vocabulary(make_exam, make_users):
+    exam = make_exam()
+    users = make_users(2)
+    db.session.add_all([
+        ExamCertificate(user_id=users[0].id, exam_id=exam.id, certificate_number='A-1', status='issued'),
+        Certificate(user_id=users[1].id, exam_id=exam.id, certificate_number='B-1', status='active')
+    ])
+    db.session.commit()
+    assert get_exam_stats(exam.id)['certificates']['by_status'] == {'active': 2}
+
+    # 旧版本按 issued 计数的考试在启动时重算
+    apply_counter_deltas(db.session.connection(), {
+        (exam.id, 'certificate:status:active'): -1, (exam.id, 'certificate:status:issued'): 1
+    })
+    db.session.commit()
+    assert backfill_exam_stats() == 1
+    assert get_exam_stats(exam.id)['certificates']['by_status'] == {'active': 2}
+    assert backfill_exam_stats() == 0
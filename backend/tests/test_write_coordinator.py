@@ -0,0 +1,67 @@
+from concurrent.futures import Future
+
+from sqlalchemy import event
+
+from src.models.user import db
+from src.models.exam import Application
+from src.utils import write_coordinator
+
+
+def _insert(user_id, exam_id):
+    def work():
+        application = Application(user_id=user_id, exam_id=exam_id, application_data={})
+        db.session.add(application)
+        db.session.flush()
+        return application
+    return work
+
+
+def _reject():
+    raise ValueError('您已经报名过此考试')
+
+
+def _trace_statements():
+    statements = []
+
+    def trace(dbapi_connection, connection_record):
+        dbapi_connection.set_trace_callback(statements.append)
+
+    event.listen(db.engine, 'connect', trace)
+    db.session.remove()
+    db.engine.dispose()
+    return statements
+
+
+def test_group_is_committed_once(make_exam, make_users):
+    exam_id = make_exam().id
+    user_ids = [user.id for user in make_users(3)]
+    statements = _trace_statements()
+
+    group = [(_insert(user_id, exam_id), lambda application: application.id, Future()) for user_id in user_ids]
+    group.insert(1, (_reject, None, Future()))
+    write_coordinator._commit_group(group)
+
+    commits = [sql for sql in statements if sql.strip().upper() == 'COMMIT']
+    assert len(commits) == 1
+    assert any(sql.startswith('BEGIN IMMEDIATE') for sql in statements)
+    assert isinstance(group[1][2].exception(), ValueError)
+    ids = [future.result() for _, _, future in group if future.exception() is None]
+    assert len(ids) == 3
+    assert Application.query.count() == 3
+
+
+def test_failed_commit_keeps_group_uncommitted(make_exam, make_users, monkeypatch):
+    exam = make_exam()
+    users = make_users(3)
+
+    def fail():
+        raise RuntimeError('disk I/O error')
+
+    group = [(_insert(user.id, exam.id), None, Future()) for user in users]
+    monkeypatch.setattr(db.session, 'commit', fail)
+    write_coordinator._commit_group(group)
+    monkeypatch.undo()
+
+    assert all(isinstance(future.exception(), RuntimeError) for _, _, future in group)
+    db.session.remove()
+    assert Application.query.count() == 0